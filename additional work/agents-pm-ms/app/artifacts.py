@@ -0,0 +1,309 @@
+"""LLM-written RAID/RACI/email, status deck and ops update.
+
+By default the Docs, Deck and Ops agents fill Markdown templates from the
+notes stage's summary, and no LLM is called. `ARTIFACTS_LLM` changes that:
+
+- `off` (default): templates only.
+- `separate`: each agent sends its own prompt (`agents/docs_agent.md`,
+  `deck_agent.md`, `ops_agent.md`), so three calls run in parallel.
+- `coalesced`: one call on `agents/artifacts_agent.md` asks for all five
+  files at once. The stage that asks first sends it, and the other two
+  stages wait for that response. The shared instructions and context are
+  then sent and billed once instead of three times.
+
+Every response is cut into files at `=== FILE: <name> ===` lines and each
+file is checked before it is used. In coalesced mode a file that is missing
+or fails its check is asked for again with the owning agent's own prompt.
+Anything still unusable falls back to the template, so a bad response costs
+quality but never fails the run. Dry runs always use the templates.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional
+
+from models import ActionItem, MeetingSummary
+from providers import LLMProvider
+from providers import telemetry
+from providers.batch import DeferredRequest
+from templating import default_registry
+
+if TYPE_CHECKING:
+    from store import ProjectBacklog
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "separate", "coalesced")
+
+# Files each agent writes, in the order the combined prompt asks for them.
+ARTIFACT_FILES: Dict[str, tuple] = {
+    "docs": ("RAID.md", "RACI.md", "update_email.md"),
+    "deck": ("status_deck.md",),
+    "ops": ("ops_update.md",),
+}
+
+PROMPTS = Path(__file__).parent / "agents"
+
+# (max_tokens ceiling, expected output tokens per context token) per call.
+_BUDGETS = {"docs": (1_500, 4.0), "deck": (1_500, 4.0), "ops": (800, 2.0), "all": (3_500, 8.0)}
+
+
+# ---------------------------------------------------------------------------
+# Parsing and validation
+# ---------------------------------------------------------------------------
+
+
+_HEADER = re.compile(r"^[\s#=*_>-]*(?:file\s*:\s*)?[`*_]*([\w.-]+\.md)[`*_]*\s*:?[\s=*#-]*$", re.IGNORECASE)
+_OPEN_FENCE = re.compile(r"^```\s*(?:markdown|md)?\s*$", re.IGNORECASE)
+
+
+def format_context(
+    summary: MeetingSummary, actions: List[ActionItem], backlog: Optional["ProjectBacklog"] = None
+) -> str:
+    """The summary and action items, plus the project's carried risks and actions, as prompt input."""
+
+    def block(title: str, items: Iterable[str]) -> str:
+        lines = [f"- {item}" for item in items]
+        return f"{title}:\n" + ("\n".join(lines) if lines else "- none")
+
+    blocks = [
+        f"STATUS: {summary.status}",
+        block("SUMMARY", summary.bullets),
+        block("DECISIONS", summary.decisions),
+        block("OPEN QUESTIONS", summary.questions),
+        block("RISKS", summary.risks),
+        "ACTION_ITEMS:\n" + json.dumps([item.as_dict() for item in actions], indent=2),
+    ]
+    if backlog is not None:
+        blocks += [
+            block(
+                "CARRIED RISKS (open from earlier meetings)",
+                (f"{risk.text} (open since {risk.first_meeting})" for risk in backlog.carried_risks()),
+            ),
+            block(
+                "CARRIED ACTIONS (open from earlier meetings)",
+                (f"{item.title} – {item.owner} (open since {item.first_meeting})" for item in backlog.carried_actions()),
+            ),
+        ]
+    return "\n\n".join(blocks)
+
+
+def _unfence(text: str) -> str:
+    """Drop a code fence wrapped around a whole file (or left over from one around the response)."""
+
+    lines = text.strip().splitlines()
+    if lines and _OPEN_FENCE.match(lines[0]):
+        lines = lines[1:]
+        if lines and lines[-1].strip() == "```":
+            lines = lines[:-1]
+    elif lines and lines[-1].strip() == "```" and sum(line.lstrip().startswith("```") for line in lines) % 2:
+        lines = lines[:-1]
+    return "\n".join(lines).strip()
+
+
+def split_sections(text: str, names: Iterable[str]) -> Dict[str, str]:
+    """Cut a response into files at header lines naming one of `names`.
+
+    Headers may be decorated (`=== FILE: RAID.md ===`, `## RAID.md`,
+    `**RAID.md**:`); text before the first header is ignored and the first
+    non-empty copy of a repeated file wins. A response for a single file
+    without any header is taken whole.
+    """
+
+    wanted = {name.lower(): name for name in names}
+    sections: Dict[str, str] = {}
+    current: Optional[str] = None
+    buffer: List[str] = []
+    found = False
+
+    def flush() -> None:
+        if current is not None:
+            body = _unfence("\n".join(buffer))
+            if body and current not in sections:
+                sections[current] = body
+
+    for line in text.splitlines():
+        match = _HEADER.match(line)
+        name = wanted.get(match.group(1).lower()) if match else None
+        if name is not None:
+            flush()
+            current, buffer, found = name, [], True
+        elif current is not None:
+            buffer.append(line)
+    flush()
+    if not found and len(wanted) == 1:
+        body = _unfence(text)
+        if body:
+            sections[next(iter(wanted.values()))] = body
+    return sections
+
+
+def _words(text: str) -> int:
+    return len(re.findall(r"\w+", text))
+
+
+def _valid_raid(text: str) -> bool:
+    lowered = text.lower()
+    return all(term in lowered for term in ("risk", "assumption", "issue", "dependenc"))
+
+
+def _valid_raci(text: str) -> bool:
+    lowered = text.lower()
+    return "responsible" in lowered and "accountable" in lowered and re.search(r"^\s*\|?\s*:?-{3,}", text, re.M) is not None
+
+
+def _valid_email(text: str) -> bool:
+    # The prompt asks for 120 words; a little slack for greetings and sign-off.
+    return 0 < _words(text) <= 150
+
+
+def _valid_deck(text: str) -> bool:
+    slides = re.findall(r"^# \S", text, re.M)
+    return len(slides) >= 7 and ("```mermaid" in text or "-->" in text or "->" in text)
+
+
+def _valid_ops(text: str) -> bool:
+    return re.search(r"\b(red|amber|yellow|green|r/?y/?g)\b", text, re.I) is not None
+
+
+VALIDATORS: Dict[str, Callable[[str], bool]] = {
+    "RAID.md": _valid_raid,
+    "RACI.md": _valid_raci,
+    "update_email.md": _valid_email,
+    "status_deck.md": _valid_deck,
+    "ops_update.md": _valid_ops,
+}
+
+
+def valid_sections(sections: Dict[str, str], names: Iterable[str]) -> Dict[str, str]:
+    """The entries of `sections` among `names` that pass their file's check."""
+
+    return {name: sections[name] for name in names if name in sections and VALIDATORS[name](sections[name])}
+
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+
+class ArtifactWriter:
+    """Drafts the Docs/Deck/Ops files with the LLM; shared by the three agents of a Supervisor."""
+
+    system_prompt = "You are an expert project manager who writes concise, accurate project documents in Markdown."
+
+    # Combined responses kept for stages that have not asked yet.
+    memo_size = 16
+
+    def __init__(self, provider: LLMProvider, mode: str = "off") -> None:
+        if mode not in MODES:
+            raise ValueError(f"ARTIFACTS_LLM must be one of {', '.join(MODES)} (got '{mode}').")
+        self.provider = provider
+        self.mode = mode
+        self.prompts = {kind: PROMPTS / f"{kind}_agent.md" for kind in ARTIFACT_FILES}
+        self.prompts["all"] = PROMPTS / "artifacts_agent.md"
+        self._combined: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, provider: LLMProvider) -> "ArtifactWriter":
+        return cls(provider, os.getenv("ARTIFACTS_LLM", "off").strip().lower() or "off")
+
+    @property
+    def active(self) -> bool:
+        return self.mode != "off" and not self.provider.config.dry_run
+
+    def fingerprint_inputs(self) -> Dict[str, Any]:
+        if not self.active:
+            return {}
+        config = self.provider.config
+        return {
+            "artifacts_llm": self.mode,
+            "prompts": sorted(self.prompts.values()),
+            "artifacts_provider": [config.provider, config.model],
+        }
+
+    def draft(
+        self,
+        kind: str,
+        summary: MeetingSummary,
+        actions: List[ActionItem],
+        backlog: Optional["ProjectBacklog"] = None,
+    ) -> Dict[str, str]:
+        """LLM-written files for agent `kind` that passed their checks; callers template the rest.
+
+        The backlog is part of the context, and so of the key that combined
+        calls are shared by, so every stage of a run must pass the same one.
+        In bulk mode a call queued for the batch API raises `DeferredRequest`
+        rather than falling back.
+        """
+
+        if not self.active:
+            return {}
+        names = ARTIFACT_FILES[kind]
+        context = format_context(summary, actions, backlog)
+        drafts: Dict[str, str] = {}
+        try:
+            if self.mode == "coalesced":
+                try:
+                    drafts = valid_sections(self._combined_sections(context), names)
+                except DeferredRequest:
+                    raise
+                except Exception:  # noqa: BLE001 - each stage retries with its own prompt below
+                    logger.exception("Combined artifacts call failed")
+                missing = [name for name in names if name not in drafts]
+                if missing:
+                    logger.info("Combined response lacks usable %s; asking the %s prompt", ", ".join(missing), kind)
+                    telemetry.record_count("artifact_fallbacks", len(missing))
+                    drafts.update(valid_sections(self._sections(kind, context), missing))
+            else:
+                drafts = valid_sections(self._sections(kind, context), names)
+        except DeferredRequest:
+            raise
+        except Exception:  # noqa: BLE001 - the templates still produce every file
+            logger.exception("LLM drafting for %s failed; using the templates", kind)
+        templated = [name for name in names if name not in drafts]
+        if templated:
+            logger.warning("Using the template for %s", ", ".join(templated))
+            telemetry.record_count("artifact_template_fallbacks", len(templated))
+        return drafts
+
+    def _combined_sections(self, context: str) -> Dict[str, str]:
+        """One combined call per distinct context; concurrent stages wait on the first caller's."""
+
+        key = hashlib.sha256(context.encode("utf-8")).hexdigest()
+        with self._lock:
+            future = self._combined.get(key)
+            owner = future is None
+            if owner:
+                future = self._combined[key] = Future()
+                while len(self._combined) > self.memo_size:
+                    self._combined.popitem(last=False)
+        if owner:
+            names = [name for files in ARTIFACT_FILES.values() for name in files]
+            try:
+                future.set_result(split_sections(self._call("all", context), names))
+            except Exception as exc:
+                with self._lock:
+                    self._combined.pop(key, None)
+                future.set_exception(exc)
+        return future.result()
+
+    def _sections(self, kind: str, context: str) -> Dict[str, str]:
+        return split_sections(self._call(kind, context), ARTIFACT_FILES[kind])
+
+    def _call(self, kind: str, context: str) -> str:
+        ceiling, ratio = _BUDGETS[kind]
+        with telemetry.span("template", self.prompts[kind].name):
+            prompt = default_registry().render_prompt(self.prompts[kind], context=context, inputs=context)
+        return self.provider.generate(
+            prompt, system_prompt=self.system_prompt, temperature=0.3, max_tokens=ceiling, output_ratio=ratio
+        )
@@ -0,0 +1,254 @@
+"""Bulk mode: reprocess a corpus of transcripts through the provider batch APIs.
+
+`run_batch.py --bulk` trades latency for price: the batch APIs bill at about
+half the interactive rate but may take hours to return. The work proceeds in
+rounds:
+
+1. Collect. The notes stage runs for every transcript with a
+   `BatchCollector` on the provider. Each cache-missing LLM request is
+   queued instead of sent, and the transcript's run stops at that point.
+2. Submit. The queued requests go out as one or more batches, and the batch
+   ids are written to the job file.
+3. Poll. Once a batch ends, its results are stored in the response cache
+   under each request's cache key.
+
+Each round gets a transcript one step further: chunk summaries, then each
+reduce level, then the final notes call, then a repair call if needed. With
+`ARTIFACTS_LLM` set, the Docs/Deck/Ops drafts (and any per-file retries) are
+collected once a transcript's notes are cached. When a round queues nothing,
+the normal batch run renders every artifact from the cache.
+
+The job file records the in-flight batches. A bulk run that is interrupted,
+or started again by a nightly job, polls those batches instead of submitting
+the work again. Requests that keep failing in batches are sent interactively
+after `BULK_MAX_ATTEMPTS` tries.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from artifacts import ARTIFACT_FILES, ArtifactWriter
+from ingest import TranscriptSource
+from outputs import MemorySink, use_sink
+from providers import LLMProvider, ResponseCache
+from providers import telemetry
+from providers.batch import BatchBackend, BatchCollector, DeferredRequest, batch_backend_for, split_requests
+from run_supervisor import NotesAgent
+
+logger = logging.getLogger(__name__)
+
+JOB_FILE_VERSION = 1
+
+
+# ---------------------------------------------------------------------------
+# Job file
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class BulkJob:
+    """Persisted state of a bulk run, so an interrupted run resumes instead of resubmitting."""
+
+    provider: str
+    model: str
+    round: int = 0
+    # Batches submitted but not yet read back: [{"id": ..., "keys": [...]}]
+    batches: List[Dict[str, Any]] = field(default_factory=list)
+    # Batch attempts that did not return a usable result, by cache key.
+    failures: Dict[str, int] = field(default_factory=dict)
+    history: List[Dict[str, Any]] = field(default_factory=list)
+    version: int = JOB_FILE_VERSION
+
+    @classmethod
+    def load(cls, path: Path, provider: str, model: str) -> "BulkJob":
+        """Read the job file, or start a new job if there is none."""
+
+        if not path.exists():
+            return cls(provider=provider, model=model)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != JOB_FILE_VERSION:
+            raise ValueError(f"{path} was written by an incompatible version; remove it to start over.")
+        job = cls(**data)
+        if job.batches and (job.provider, job.model) != (provider, model):
+            raise ValueError(
+                f"{path} has batches in flight for {job.provider}/{job.model}, but the provider is now "
+                f"{provider}/{model}. Restore that configuration to collect them, or remove the file to start over."
+            )
+        job.provider, job.model = provider, model
+        return job
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(asdict(self), indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Rounds
+# ---------------------------------------------------------------------------
+
+
+def collect_requests(provider: LLMProvider, jobs: List[Any], live_keys: set) -> Dict[str, Any]:
+    """Run the LLM stages for every job and return the requests they queued, by cache key.
+
+    The notes stage runs first; once its result is cached, the artifact
+    drafts the render pass would request (`ARTIFACTS_LLM`) are collected too,
+    with the same inputs, so they hit the same cache keys. Artifacts go to a
+    `MemorySink` and are discarded; only the requests count here. Requests in
+    `live_keys` are sent interactively.
+    """
+
+    collector = BatchCollector(live_keys)
+    notes_agent = NotesAgent(provider)
+    writer = ArtifactWriter.from_env(provider)
+    waiting = 0
+    provider.collector = collector
+    try:
+        for job in jobs:
+            try:
+                with use_sink(MemorySink(job.outdir)):
+                    summary, actions = notes_agent.run(TranscriptSource(job.transcript), job.outdir)
+                deferred = False
+                for kind in ARTIFACT_FILES if writer.active else ():
+                    try:
+                        writer.draft(kind, summary, actions)
+                    except DeferredRequest:
+                        deferred = True
+                if deferred:
+                    waiting += 1
+            except DeferredRequest:
+                waiting += 1
+            except Exception:  # noqa: BLE001 - the render pass retries it and reports the failure
+                logger.exception("Bulk collection for %s failed", job.name)
+    finally:
+        provider.collector = None
+    pending = collector.drain()
+    logger.info("%s transcript(s) waiting on %s request(s); %s ready", waiting, len(pending), len(jobs) - waiting)
+    return pending
+
+
+def submit(backend: BatchBackend, requests: Dict[str, Any]) -> List[Dict[str, Any]]:
+    batches = []
+    for part in split_requests(requests, backend.max_requests):
+        batch_id = backend.submit(part)
+        logger.info("Submitted batch %s with %s request(s)", batch_id, len(part))
+        batches.append({"id": batch_id, "keys": list(part)})
+    return batches
+
+
+def wait_for(backend: BatchBackend, batches: List[Dict[str, Any]], poll: float) -> None:
+    """Block until every batch in `batches` has ended."""
+
+    remaining = [batch["id"] for batch in batches]
+    while remaining:
+        for batch_id in list(remaining):
+            status = backend.status(batch_id)
+            if status.done:
+                logger.info("Batch %s %s (%s ok, %s failed)", batch_id, status.state, status.succeeded, status.failed)
+                remaining.remove(batch_id)
+        if remaining:
+            logger.info("Waiting on %s batch(es); next check in %.0fs", len(remaining), poll)
+            time.sleep(poll)
+
+
+def store_results(provider: LLMProvider, backend: BatchBackend, batch: Dict[str, Any], job: BulkJob) -> Dict[str, int]:
+    """Cache the results of one ended batch; keys without a usable result count as failures."""
+
+    assert provider.cache is not None
+    missing = set(batch["keys"])
+    stored = 0
+    for item in backend.results(batch["id"]):
+        if item.key not in missing:
+            continue
+        missing.discard(item.key)
+        if item.text is None:
+            logger.warning("Batch request %s failed: %s", item.key[:12], item.error)
+            job.failures[item.key] = job.failures.get(item.key, 0) + 1
+            continue
+        provider.cache.put(item.key, item.text, provider=provider._label, model=provider.config.model)
+        telemetry.record_usage(
+            provider.config.provider, provider.config.model, item.prompt_tokens, item.completion_tokens, batch=True
+        )
+        job.failures.pop(item.key, None)
+        stored += 1
+    for key in missing:
+        job.failures[key] = job.failures.get(key, 0) + 1
+    return {"succeeded": stored, "failed": len(batch["keys"]) - stored}
+
+
+def run_bulk(
+    jobs: List[Any],
+    *,
+    cache: Optional[ResponseCache],
+    job_file: Path,
+    dry_run: bool = False,
+    poll: Optional[float] = None,
+    max_attempts: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Fill the response cache for `jobs` through batches; returns a summary for the report.
+
+    The caller renders the artifacts afterwards with a normal batch run over
+    the same cache.
+    """
+
+    if cache is None:
+        raise ValueError("Bulk mode keeps batch results in the response cache; run it without --no-cache.")
+    poll = poll if poll is not None else float(os.getenv("BULK_POLL", "30"))
+    max_attempts = max_attempts if max_attempts is not None else int(os.getenv("BULK_MAX_ATTEMPTS", "3"))
+
+    provider = LLMProvider.from_env(dry_override=dry_run, cache=cache)
+    job = BulkJob.load(job_file, provider.config.provider, provider.config.model)
+    backend: Optional[BatchBackend] = None
+    metrics = telemetry.RunMetrics()
+
+    with telemetry.collect(metrics):
+        while True:
+            if job.batches:
+                backend = backend or batch_backend_for(provider)
+                logger.info("Round %s: polling %s batch(es) from %s", job.round, len(job.batches), job_file)
+                wait_for(backend, job.batches, poll)
+                for batch in job.batches:
+                    counts = store_results(provider, backend, batch, job)
+                    job.history.append({"round": job.round, "id": batch["id"], **counts})
+                job.batches = []
+                job.save(job_file)
+
+            live = {key for key, count in job.failures.items() if count >= max_attempts}
+            pending = collect_requests(provider, jobs, live)
+            if not pending:
+                break
+            backend = backend or batch_backend_for(provider)
+            job.round += 1
+            job.batches = submit(backend, pending)
+            job.save(job_file)
+
+    # Nothing is in flight, so there is nothing left to resume.
+    job_file.unlink(missing_ok=True)
+    usage = metrics.summary()
+    summary = {
+        "provider": job.provider,
+        "model": job.model,
+        "rounds": job.round,
+        "batches": len(job.history),
+        "requests": sum(entry["succeeded"] + entry["failed"] for entry in job.history),
+        "failed": sum(entry["failed"] for entry in job.history),
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "cost_usd": usage.get("cost_usd"),
+    }
+    logger.info(
+        "Bulk: %s round(s), %s batch(es), %s request(s), %s failed, est. $%s",
+        summary["rounds"],
+        summary["batches"],
+        summary["requests"],
+        summary["failed"],
+        summary["cost_usd"],
+    )
+    return summary
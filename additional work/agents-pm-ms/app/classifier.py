@@ -0,0 +1,181 @@
+"""Single-pass, precompiled heuristics for meeting-note extraction.
+
+`TranscriptClassifier` compiles its keyword vocabulary once and labels every
+sentence with one combined alternation (named groups per category), and every
+line with one action check. Decisions, questions, risks, action items, owners,
+due dates and tags all come out of the same scan. Scanning stops as soon as
+every capped list is full.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from models import ActionItem
+
+SENTENCE_CATEGORIES = ("decision", "question", "risk")
+
+
+@dataclass
+class Vocabulary:
+    """Keyword lists that drive the heuristics; every match is case-insensitive."""
+
+    decision: Sequence[str] = ("decided", "approved", "confirmed")
+    question: Sequence[str] = ("?",)
+    risk: Sequence[str] = ("risk", "concern", "blocked", "slip")
+    action_prefixes: Sequence[str] = ("action", "todo", "task", "follow up")
+    owner_markers: Sequence[str] = ("owner", "assigned", "to")
+    tags: Dict[str, Sequence[str]] = field(default_factory=lambda: {"risk": ("risk",), "client": ("client",)})
+
+    @classmethod
+    def from_file(cls, path: Path) -> "Vocabulary":
+        """Load overrides from a JSON object whose keys match the field names."""
+
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        unknown = set(data) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown vocabulary key(s): {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    @classmethod
+    def from_env(cls) -> "Vocabulary":
+        path = os.getenv("NOTES_VOCABULARY")
+        return cls.from_file(Path(path)) if path else cls()
+
+
+def _alternation(words: Iterable[str]) -> str:
+    # Longest first so a longer keyword wins over one of its prefixes.
+    return "|".join(re.escape(word) for word in sorted(set(words), key=len, reverse=True))
+
+
+@dataclass
+class Classification:
+    bullets: List[str] = field(default_factory=list)
+    decisions: List[str] = field(default_factory=list)
+    questions: List[str] = field(default_factory=list)
+    risks: List[str] = field(default_factory=list)
+    actions: List[ActionItem] = field(default_factory=list)
+
+
+class TranscriptClassifier:
+    """Compiled classifier for transcript sentences and action lines."""
+
+    def __init__(
+        self,
+        vocabulary: Optional[Vocabulary] = None,
+        *,
+        limit: int = 3,
+        bullet_limit: int = 6,
+    ) -> None:
+        self.vocabulary = vocabulary or Vocabulary()
+        self.limit = limit
+        self.bullet_limit = bullet_limit
+        vocab = self.vocabulary
+
+        self._sentence_pattern = re.compile(
+            "|".join(f"(?P<{name}>{_alternation(getattr(vocab, name))})" for name in SENTENCE_CATEGORIES),
+            re.IGNORECASE,
+        )
+        prefixes = _alternation(vocab.action_prefixes)
+        self._action_start = re.compile(rf"^(?:{prefixes})\b", re.IGNORECASE)
+        self._action_marker = "action"
+        self._title_strip = re.compile(rf"(?:{prefixes})[^:]*:?", re.IGNORECASE)
+        self._owner_marker = re.compile(
+            rf"(?:(?:{_alternation(vocab.owner_markers)})\s*(?:to)?\s*:?\s*)([A-Z][a-zA-Z]+)"
+        )
+        self._owner_prefix = re.compile(r"([A-Z][a-zA-Z]+)[:\-]")
+        self._due_date = re.compile(r"(\d{4}-\d{2}-\d{2})")
+        self._tags: List[Tuple[str, Tuple[str, ...]]] = [
+            (tag, tuple(word.lower() for word in words)) for tag, words in vocab.tags.items()
+        ]
+
+    # ------------------------------------------------------------------
+    # Per-item classification
+    # ------------------------------------------------------------------
+    def labels(self, sentence: str) -> Set[str]:
+        """Return every sentence category matched by `sentence` in one scan."""
+
+        return {match.lastgroup for match in self._sentence_pattern.finditer(sentence)}  # type: ignore[misc]
+
+    def is_action_line(self, line: str) -> bool:
+        stripped = line.strip()
+        if self._action_start.match(stripped):
+            return True
+        return ":" in line and self._action_marker in line.lower()
+
+    def detect_owner(self, line: str) -> str:
+        owner_match = self._owner_marker.search(line)
+        if owner_match:
+            return owner_match.group(1)
+        prefix_match = self._owner_prefix.match(line)
+        if prefix_match:
+            return prefix_match.group(1)
+        return "Unassigned"
+
+    def parse_action(self, line: str) -> ActionItem:
+        line = line.strip()
+        lowered = line.lower()
+        title = self._title_strip.sub("", line).strip() or "Document action item"
+        date_match = self._due_date.search(line)
+        tags = [tag for tag, words in self._tags if any(word in lowered for word in words)]
+        return ActionItem(
+            title=title,
+            owner=self.detect_owner(line),
+            due_date=date_match.group(1) if date_match else None,
+            tags=tags,
+        )
+
+    def extract_actions(self, lines: Iterable[str]) -> List[ActionItem]:
+        return [self.parse_action(line) for line in lines if self.is_action_line(line)]
+
+    # ------------------------------------------------------------------
+    # Whole-transcript classification
+    # ------------------------------------------------------------------
+    def is_full(self, result: Classification) -> bool:
+        """True once every capped list in `result` has reached its limit."""
+
+        return (
+            len(result.bullets) >= self.bullet_limit
+            and len(result.decisions) >= self.limit
+            and len(result.questions) >= self.limit
+            and len(result.risks) >= self.limit
+        )
+
+    def classify_sentences(self, sentences: Iterable[str], into: Optional[Classification] = None) -> Classification:
+        """Fill bullets, decisions, questions and risks, stopping once all are full."""
+
+        result = into or Classification()
+        buckets = {"decision": result.decisions, "question": result.questions, "risk": result.risks}
+        open_buckets = {name for name, bucket in buckets.items() if len(bucket) < self.limit}
+        for sentence in sentences:
+            if len(result.bullets) < self.bullet_limit:
+                result.bullets.append(sentence)
+            elif not open_buckets:
+                break
+            if not open_buckets:
+                continue
+            for name in self.labels(sentence) & open_buckets:
+                bucket = buckets[name]
+                bucket.append(sentence)
+                if len(bucket) >= self.limit:
+                    open_buckets.discard(name)
+        return result
+
+    def classify(self, sentences: Iterable[str], lines: Iterable[str]) -> Classification:
+        result = self.classify_sentences(sentences)
+        result.actions = self.extract_actions(lines)
+        return result
+
+
+_DEFAULT = TranscriptClassifier()
+
+
+def detect_owner(line: str) -> str:
+    """Owner heuristic using the default vocabulary."""
+
+    return _DEFAULT.detect_owner(line)
@@ -0,0 +1,154 @@
+"""Transcript compaction ahead of the notes prompt.
+
+Only the text sent to the LLM is compacted; the heuristics digest still sees
+the transcript as spoken. Line by line, `TranscriptCompactor`:
+
+- keeps a speaker's full "Name Surname (Role):" label the first time it
+  appears, so the model learns who is who, and shortens later turns to a
+  first-name alias ("Priya:"). If two speakers would get the same alias,
+  the second keeps its full name;
+- strips filler words ("um", "uh", "you know,") and drops lines that are
+  only back-channel ("Okay.", "Mm-hmm.");
+- drops lines that repeat one of the recent lines word for word, as caption
+  exports often do.
+
+The counts are kept in `CompactionStats`. `report()` logs them and adds the
+tokens saved to the run metrics.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Optional
+
+from ingest import split_speaker
+from providers import telemetry
+from providers.tokens import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+# A filler word takes its commas with it: "the plan, um, stands" -> "the plan stands".
+_FILLER = re.compile(r"(?:,\s*)?\b(?:u+m+|u+h+|uhm|erm|hmm+|mm-?hmm)\b(?:\s*,)?|\b(?:you know|I mean)\s*,", re.IGNORECASE)
+_BACKCHANNEL = re.compile(
+    r"^(?:ok(?:ay)?|right|mm-?hmm|uh-?huh|got it|cool|thanks|thank you)[.!]*$", re.IGNORECASE
+)
+_SPACES = re.compile(r"\s{2,}")
+_WORD = re.compile(r"\w")
+_SPACE_BEFORE_PUNCTUATION = re.compile(r"\s+([,.!?;:])")
+
+
+def _tokens(characters: int) -> int:
+    return (characters + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class CompactionStats:
+    lines_in: int = 0
+    lines_out: int = 0
+    characters_in: int = 0
+    characters_out: int = 0
+    filler_lines: int = 0
+    duplicate_lines: int = 0
+    aliased_labels: int = 0
+
+    @property
+    def tokens_in(self) -> int:
+        return _tokens(self.characters_in)
+
+    @property
+    def tokens_out(self) -> int:
+        return _tokens(self.characters_out)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+
+class TranscriptCompactor:
+    """Stateful, streaming compaction; one instance per transcript."""
+
+    def __init__(self, *, duplicate_window: int = 256) -> None:
+        self.duplicate_window = duplicate_window
+        self.stats = CompactionStats()
+        # Full label -> alias, and alias -> the full label that owns it.
+        self._aliases: Dict[str, str] = {}
+        self._owners: Dict[str, str] = {}
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+
+    def compact_line(self, line: str) -> Optional[str]:
+        """Return the compacted line, or None when it should be dropped."""
+
+        stats = self.stats
+        stats.lines_in += 1
+        stats.characters_in += len(line) + 1
+        if not line.strip():
+            return self._emit("")
+
+        name, role, text = split_speaker(line)
+        text = _SPACE_BEFORE_PUNCTUATION.sub(r"\1", _SPACES.sub(" ", _FILLER.sub("", text))).strip(" ,")
+        if not _WORD.search(text) or _BACKCHANNEL.match(text):
+            stats.filler_lines += 1
+            return None
+
+        key = f"{name or ''}\0{text.casefold()}"
+        if key in self._recent:
+            stats.duplicate_lines += 1
+            return None
+        self._recent[key] = None
+        if len(self._recent) > self.duplicate_window:
+            self._recent.popitem(last=False)
+
+        if name is None:
+            return self._emit(text)
+        return self._emit(f"{self._label(name, role)}: {text}")
+
+    def compact(self, lines: Iterable[str]) -> Iterator[str]:
+        for line in lines:
+            compacted = self.compact_line(line)
+            if compacted is not None:
+                yield compacted
+
+    def report(self) -> CompactionStats:
+        stats = self.stats
+        if stats.lines_in:
+            logger.info(
+                "Compacted transcript for the LLM: %s -> %s estimated tokens (%s saved, %.0f%%; "
+                "%s filler and %s duplicate line(s) dropped, %s label(s) shortened)",
+                stats.tokens_in,
+                stats.tokens_out,
+                stats.tokens_saved,
+                100 * stats.tokens_saved / max(1, stats.tokens_in),
+                stats.filler_lines,
+                stats.duplicate_lines,
+                stats.aliased_labels,
+            )
+            telemetry.record_count("transcript_tokens_saved", stats.tokens_saved)
+        return stats
+
+    def _label(self, name: str, role: Optional[str]) -> str:
+        full = f"{name} ({role})" if role else name
+        alias = self._aliases.get(full)
+        if alias is not None:
+            if alias != full:
+                self.stats.aliased_labels += 1
+            return alias
+        # Reserve the full label too, so no later speaker takes it as an alias.
+        self._owners.setdefault(full, full)
+        short = next(
+            (
+                candidate
+                for candidate in (name.split()[0], name)
+                if self._owners.setdefault(candidate, full) == full
+            ),
+            full,
+        )
+        self._aliases[full] = short
+        return full
+
+    def _emit(self, line: str) -> str:
+        self.stats.lines_out += 1
+        self.stats.characters_out += len(line) + 1
+        return line
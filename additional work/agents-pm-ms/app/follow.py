@@ -0,0 +1,283 @@
+"""Live "tail" mode: keep the artifacts current while a transcript file grows.
+
+`run_supervisor.py --follow` polls the transcript and hands only the newly
+appended lines to a `LiveSession`, which keeps the running state a full run
+would rebuild from scratch:
+
+- the heuristics digest (sentence classifications, action items, excerpt),
+  fed line by line;
+- a rolling LLM summary. Completed speaker turns are buffered and folded into
+  the previous notes once they reach `fold_tokens`, or once the transcript
+  has been quiet for `settle` seconds, so each call costs about one segment
+  plus the notes instead of the whole meeting so far.
+
+After each update, only the agents whose inputs changed (see each agent's
+`live_inputs`) render again, and the update is published atomically through a
+`DirectorySink`. When following stops (Ctrl+C or `idle_exit`), the open turn
+is folded in, the meeting is added to the project store if one is configured,
+and the final artifacts are written.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ingest import TranscriptDigest, TranscriptSource, starts_turn
+from manifest import fingerprint
+from models import ActionItem, MeetingSummary
+from notes_parser import NotesParseError, ParsedNotes, parse_notes_response
+from outputs import DirectorySink, use_sink
+from providers import estimate_tokens
+from run_supervisor import Supervisor, ensure_outdir
+from store import ProjectBacklog
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Reading appended text
+# ---------------------------------------------------------------------------
+
+
+class TranscriptTail:
+    """Returns the complete lines appended to a file since the last read.
+
+    A trailing line without its newline is held back until it is finished.
+    """
+
+    def __init__(self, path: Path, encoding: str = "utf-8") -> None:
+        self.path = Path(path)
+        self.encoding = encoding
+        self.offset = 0
+        self._remainder = b""
+
+    def read_lines(self) -> Optional[List[str]]:
+        """New complete lines, or None when the file shrank and must be read again from the start."""
+
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return []
+        if size < self.offset:
+            self.offset, self._remainder = 0, b""
+            return None
+        if size == self.offset:
+            return []
+        with self.path.open("rb") as handle:
+            handle.seek(self.offset)
+            data = handle.read(size - self.offset)
+        self.offset += len(data)
+        data = self._remainder + data
+        complete, newline, self._remainder = data.rpartition(b"\n")
+        if not newline:
+            self._remainder = data
+            return []
+        text = complete.decode(self.encoding, errors="replace")
+        return [line.rstrip("\r") for line in text.split("\n")]
+
+    def flush(self) -> List[str]:
+        """The held-back unterminated last line, once the file is known to be finished."""
+
+        data, self._remainder = self._remainder, b""
+        return [data.decode(self.encoding, errors="replace").rstrip("\r")] if data else []
+
+
+class TurnBuffer:
+    """Groups streamed lines into speaker turns, like `iter_turns`, one line at a time."""
+
+    def __init__(self) -> None:
+        self._current: List[str] = []
+
+    def add(self, line: str) -> Optional[str]:
+        """Add one line; returns the previous turn when `line` starts a new one."""
+
+        stripped = line.strip()
+        if not stripped:
+            return None
+        finished = None
+        if self._current and starts_turn(stripped):
+            finished = self.flush()
+        self._current.append(stripped)
+        return finished
+
+    def flush(self) -> Optional[str]:
+        """Return the open turn, if any, and start afresh."""
+
+        if not self._current:
+            return None
+        turn, self._current = "\n".join(self._current), []
+        return turn
+
+
+# ---------------------------------------------------------------------------
+# Running state
+# ---------------------------------------------------------------------------
+
+
+class LiveSession:
+    """Incremental notes, summary and artifacts for one growing transcript."""
+
+    def __init__(self, supervisor: Supervisor, outdir: Path, *, fold_tokens: int) -> None:
+        self.supervisor = supervisor
+        self.outdir = outdir
+        self.fold_tokens = max(1, fold_tokens)
+        self.reset()
+
+    def reset(self) -> None:
+        notes_agent = self.supervisor.notes_agent
+        self.digest = TranscriptDigest(notes_agent.classifier)
+        self.turns = TurnBuffer()
+        # Only the text folded by the LLM is compacted; the digest sees every line.
+        self.compactor = notes_agent.compactor()
+        self.pending: List[str] = []
+        self.pending_tokens = 0
+        # Last successfully parsed rolling notes response, and what it parsed to.
+        self.rolling: Optional[str] = None
+        self.notes: Optional[ParsedNotes] = None
+        self.folds = 0
+        self._rendered: Dict[str, str] = {}
+        self._changed = False
+
+    def feed(self, lines: List[str]) -> None:
+        for line in lines:
+            self.digest.add_line(line)
+            if self.compactor is not None:
+                line = self.compactor.compact_line(line)
+                if line is None:
+                    continue
+            self._queue(self.turns.add(line))
+        self._changed = self._changed or bool(lines)
+
+    def fold(self, *, force: bool = False) -> bool:
+        """Fold buffered turns into the rolling notes; returns True if an LLM call was made.
+
+        With `force`, the open turn is closed and any buffered text is folded
+        regardless of size.
+        """
+
+        if force:
+            self._queue(self.turns.flush())
+        if not self.pending or (not force and self.pending_tokens < self.fold_tokens):
+            return False
+        segment = "\n".join(self.pending)
+        self.pending, self.pending_tokens = [], 0
+        logger.info("Folding %s estimated tokens of new transcript into the notes...", estimate_tokens(segment))
+        response = self.supervisor.notes_agent.fold(self.rolling, segment)
+        self.folds += 1
+        self._changed = True
+        try:
+            self.notes = parse_notes_response(response)
+            self.rolling = response
+        except NotesParseError as exc:
+            # The heuristics digest has already seen these lines, so nothing is lost from the artifacts.
+            log = logger.info if self.supervisor.provider.config.dry_run else logger.warning
+            log("Rolling notes update is not structured (%s); keeping the previous notes.", exc)
+        return True
+
+    def render(self, backlog: Optional[ProjectBacklog] = None, *, final: bool = False) -> List[str]:
+        """Re-render the agents whose inputs changed and publish them together; returns their names."""
+
+        if not (self._changed or final):
+            return []
+        self._changed = False
+        summary, actions = self.summary()
+        agents = [
+            (agent, agent.live_inputs(summary, actions))
+            for agent in (self.supervisor.notes_agent, self.supervisor.docs_agent, self.supervisor.deck_agent, self.supervisor.ops_agent)
+        ]
+        sink = DirectorySink(self.outdir)
+        rendered = []
+        with use_sink(sink):
+            for agent, inputs in agents:
+                digest = fingerprint(inputs, backlog)
+                if self._rendered.get(agent.name) == digest:
+                    continue
+                self._render(agent, summary, actions, backlog)
+                self._rendered[agent.name] = digest
+                rendered.append(agent.name)
+        sink.commit()
+        if rendered:
+            logger.info("Updated %s (%s lines, %s fold(s))", ", ".join(rendered), self.digest.line_count, self.folds)
+        return rendered
+
+    def summary(self) -> Tuple[MeetingSummary, List[ActionItem]]:
+        return self.supervisor.notes_agent.build_summary(self.notes, self.digest)
+
+    def _queue(self, turn: Optional[str]) -> None:
+        if turn:
+            self.pending.append(turn)
+            self.pending_tokens += estimate_tokens(turn)
+
+    def _render(
+        self, agent: Any, summary: MeetingSummary, actions: List[ActionItem], backlog: Optional[ProjectBacklog]
+    ) -> None:
+        if agent is self.supervisor.notes_agent:
+            agent.write_notes(summary, actions, self.outdir)
+        elif "backlog" in agent.inputs:
+            agent.run(summary, actions, self.outdir, backlog=backlog)
+        else:
+            agent.run(summary, actions, self.outdir)
+
+
+# ---------------------------------------------------------------------------
+# Follow loop
+# ---------------------------------------------------------------------------
+
+
+def follow_transcript(
+    supervisor: Supervisor,
+    transcript_path: Path,
+    outdir: Path,
+    *,
+    poll: Optional[float] = None,
+    settle: Optional[float] = None,
+    idle_exit: float = 0.0,
+    fold_tokens: Optional[int] = None,
+) -> LiveSession:
+    """Follow `transcript_path` until interrupted (or idle for `idle_exit` seconds, if set)."""
+
+    poll = poll if poll is not None else float(os.getenv("FOLLOW_POLL", "1.0"))
+    settle = settle if settle is not None else float(os.getenv("FOLLOW_SETTLE", "15"))
+    fold_tokens = fold_tokens if fold_tokens is not None else int(os.getenv("FOLLOW_FOLD_TOKENS", "1500"))
+
+    ensure_outdir(outdir)
+    tail = TranscriptTail(transcript_path)
+    session = LiveSession(supervisor, outdir, fold_tokens=fold_tokens)
+    logger.info("Following %s (poll %.1fs, fold at %s tokens); press Ctrl+C to stop.", transcript_path, poll, fold_tokens)
+
+    last_growth = time.monotonic()
+    try:
+        while True:
+            lines = tail.read_lines()
+            if lines is None:
+                logger.warning("%s was truncated; starting the notes over.", transcript_path)
+                session.reset()
+                lines = tail.read_lines() or []
+            if lines:
+                session.feed(lines)
+                last_growth = time.monotonic()
+            quiet = time.monotonic() - last_growth
+            session.fold(force=quiet >= settle)
+            session.render()
+            if idle_exit and quiet >= idle_exit:
+                logger.info("No new transcript lines for %.0fs; stopping.", quiet)
+                break
+            time.sleep(poll)
+    except KeyboardInterrupt:
+        logger.info("Stopping follow mode...")
+
+    session.feed((tail.read_lines() or []) + tail.flush())
+    session.fold(force=True)
+    backlog = None
+    project_agent = supervisor.project_agent
+    if project_agent.store is not None and transcript_path.exists():
+        summary, actions = session.summary()
+        backlog = project_agent.run(TranscriptSource(transcript_path), summary, actions)
+    session.render(backlog, final=True)
+    if session.compactor is not None:
+        session.compactor.report()
+    return session
@@ -0,0 +1,177 @@
+"""Streaming transcript ingestion.
+
+Transcripts are read incrementally and turned into sentences, speaker turns
+and token-budgeted chunks lazily. `TranscriptDigest` keeps only the capped
+heuristic results (bullets, decisions, questions, risks, excerpt) plus the
+action items while lines stream past, so peak memory no longer scales with
+the transcript.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from classifier import Classification, TranscriptClassifier
+from models import ActionItem
+from providers import estimate_tokens
+
+# Lines longer than this are yielded in pieces so one runaway caption line
+# cannot pull an unbounded amount of text into memory.
+MAX_LINE_CHARS = 1 << 20
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+_SPEAKER_TURN = re.compile(r"^(?P<name>[A-Z][\w.'\- ]{0,40}?)(?:\s*\((?P<role>[^)]*)\))?\s*:\s")
+# Labels that open a content line ("Action item: Dana to send the SOW", "Risk (high): ..."),
+# not a speaker turn.
+_CONTENT_LABEL = re.compile(
+    r"(?:action(?: item)?|decision|risk|(?:open )?question|note|issue|blocker|next step|follow[- ]up|to-?do)s?",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class TranscriptSource:
+    """A transcript on disk that can be streamed more than once."""
+
+    path: Path
+    encoding: str = "utf-8"
+
+    def size(self) -> int:
+        return self.path.stat().st_size
+
+    def lines(self) -> Iterator[str]:
+        with self.path.open("r", encoding=self.encoding, newline=None) as handle:
+            while True:
+                line = handle.readline(MAX_LINE_CHARS)
+                if not line:
+                    return
+                yield line.rstrip("\r\n")
+
+
+def sanitize_sentence(sentence: str) -> str:
+    return sentence.strip().replace("\n", " ")
+
+
+def iter_sentences(lines: Iterable[str]) -> Iterator[str]:
+    """Lazily split non-blank lines on sentence boundaries."""
+
+    for line in lines:
+        block = line.strip()
+        if not block:
+            continue
+        for part in _SENTENCE_BOUNDARY.split(block):
+            sentence = sanitize_sentence(part)
+            if sentence:
+                yield sentence
+
+
+def _speaker_label(line: str) -> Optional["re.Match[str]"]:
+    match = _SPEAKER_TURN.match(line)
+    if match is None or _CONTENT_LABEL.fullmatch(match.group("name").strip()):
+        return None
+    return match
+
+
+def starts_turn(line: str) -> bool:
+    """True when `line` opens a speaker turn ("Name:" / "Name (Role):"), not a "Decision:" style line."""
+
+    return _speaker_label(line.strip()) is not None
+
+
+def split_speaker(line: str) -> Tuple[Optional[str], Optional[str], str]:
+    """Split "Name (Role): text" into `(name, role, text)`; name and role are None without a label.
+
+    Content labels such as "Action item:" or "Decision:" stay part of the text.
+    """
+
+    stripped = line.strip()
+    match = _speaker_label(stripped)
+    if match is None:
+        return None, None, stripped
+    return match.group("name").strip(), match.group("role"), stripped[match.end() :].strip()
+
+
+def iter_turns(lines: Iterable[str]) -> Iterator[str]:
+    """Group lines into speaker turns ("Name:" / "Name (Role):" starts one)."""
+
+    current: List[str] = []
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if current and starts_turn(stripped):
+            yield "\n".join(current)
+            current = []
+        current.append(stripped)
+    if current:
+        yield "\n".join(current)
+
+
+def iter_chunks(lines: Iterable[str], token_budget: int) -> Iterator[str]:
+    """Pack speaker turns into chunks of at most `token_budget` estimated tokens.
+
+    Turns that exceed the budget on their own are split on sentence boundaries,
+    and sentences that still exceed it are hard-wrapped.
+    """
+
+    def _pieces() -> Iterator[str]:
+        for turn in iter_turns(lines):
+            if estimate_tokens(turn) <= token_budget:
+                yield turn
+                continue
+            for sentence in iter_sentences(turn.split("\n")):
+                if estimate_tokens(sentence) <= token_budget:
+                    yield sentence
+                    continue
+                width = token_budget * 4
+                yield from (sentence[i : i + width] for i in range(0, len(sentence), width))
+
+    current: List[str] = []
+    used = 0
+    for piece in _pieces():
+        cost = estimate_tokens(piece)
+        if current and used + cost > token_budget:
+            yield "\n".join(current)
+            current, used = [], 0
+        current.append(piece)
+        used += cost
+    if current:
+        yield "\n".join(current)
+
+
+class TranscriptDigest:
+    """Running heuristic state fed one line at a time."""
+
+    def __init__(self, classifier: TranscriptClassifier, *, excerpt_lines: int = 5) -> None:
+        self.classifier = classifier
+        self.excerpt_lines = excerpt_lines
+        self.found = Classification()
+        self.actions: List[ActionItem] = []
+        self.excerpt: List[str] = []
+        self.characters = 0
+        self.line_count = 0
+
+    def add_line(self, line: str) -> None:
+        self.characters += len(line) + 1
+        self.line_count += 1
+        if len(self.excerpt) < self.excerpt_lines:
+            self.excerpt.append(line)
+        if self.classifier.is_action_line(line):
+            self.actions.append(self.classifier.parse_action(line))
+        if not self.classifier.is_full(self.found):
+            self.classifier.classify_sentences(iter_sentences((line,)), into=self.found)
+
+    def observe(self, lines: Iterable[str]) -> Iterator[str]:
+        """Pass `lines` through unchanged while updating the digest."""
+
+        for line in lines:
+            self.add_line(line)
+            yield line
+
+    def consume(self, lines: Iterable[str]) -> "TranscriptDigest":
+        for line in lines:
+            self.add_line(line)
+        return self
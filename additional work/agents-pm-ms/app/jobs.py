@@ -0,0 +1,636 @@
+"""Durable job queue for running transcripts across worker processes and machines.
+
+Jobs live in one SQLite file. Put it on a volume every worker can reach, such
+as `/workspace` in docker-compose. Each transcript is one job. A worker claims
+a job by taking a lease on it and renews the lease with a heartbeat while the
+Supervisor runs. A worker that crashes or hangs stops renewing its lease, and
+once the lease expires any other worker may claim the job.
+
+Every stage that finishes saves a checkpoint: its result and the artifacts it
+staged. A retried job therefore resumes after the last completed stage. The
+notes from a finished LLM call are not requested again because docs, deck or
+ops failed, or because the worker died before the artifacts were published.
+
+SQLite's WAL mode needs a local file system shared by every process. For a
+network file system, set `JOB_QUEUE_WAL=0`.
+
+Usage:
+    python app/jobs.py enqueue --input archive/ --outdir /workspace/outputs/archive
+    python app/jobs.py work --workers 4
+    python app/jobs.py status
+    python app/jobs.py retry
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from outputs import DirectorySink
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = Path.home() / ".local" / "share" / "agents-pm-ms" / "jobs.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    transcript TEXT NOT NULL,
+    outdir TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    available_at REAL NOT NULL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    seconds REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id INTEGER NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    result TEXT,
+    artifacts TEXT NOT NULL,
+    saved_at REAL NOT NULL,
+    PRIMARY KEY (job_id, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, available_at, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (status, finished_at);
+-- One live job per output folder; finished jobs may be queued again.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_live_outdir ON jobs (outdir) WHERE status IN ('queued', 'running');
+"""
+
+_JOB_COLUMNS = "id, name, transcript, outdir, status, attempts, worker, lease_until, error"
+
+
+@dataclass
+class QueuedJob:
+    id: int
+    name: str
+    transcript: str
+    outdir: str
+    status: str
+    attempts: int
+    worker: Optional[str] = None
+    lease_until: Optional[float] = None
+    error: Optional[str] = None
+
+
+class LeaseLost(RuntimeError):
+    """The job's lease expired and another worker may have claimed it."""
+
+
+# ---------------------------------------------------------------------------
+# Queue
+# ---------------------------------------------------------------------------
+
+
+class JobQueue:
+    """SQLite-backed queue of transcript jobs with leases and stage checkpoints."""
+
+    def __init__(self, path: Path, *, lease: float = 120.0, max_attempts: int = 3, wal: bool = True) -> None:
+        self.path = Path(path)
+        self.lease = lease
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls, path: Optional[Path] = None) -> "JobQueue":
+        """Open the queue at `path`, `JOB_QUEUE` or the default location."""
+
+        return cls(
+            path or Path(os.getenv("JOB_QUEUE") or DEFAULT_QUEUE_PATH),
+            lease=float(os.getenv("JOB_LEASE", "120")),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+            wal=os.getenv("JOB_QUEUE_WAL", "1") != "0",
+        )
+
+    # ------------------------------------------------------------------
+    # Producing
+    # ------------------------------------------------------------------
+    def enqueue(self, name: str, transcript: Path, outdir: Path) -> Optional[int]:
+        """Add a job; returns its id, or None if `outdir` already has a queued or running job."""
+
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO jobs (name, transcript, outdir, available_at, enqueued_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (name, str(transcript), str(outdir), now, now),
+            )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def retry_failed(self) -> int:
+        """Queue failed jobs again with a fresh attempt budget; returns how many.
+
+        Only the newest failed job per output folder is queued, since a folder
+        may hold one live job at a time; folders that already have a queued or
+        running job are left alone.
+        """
+
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs SET status = 'queued', attempts = 0, available_at = ?, error = NULL
+                WHERE id IN (SELECT MAX(id) FROM jobs WHERE status = 'failed' GROUP BY outdir)
+                  AND outdir NOT IN (SELECT outdir FROM jobs WHERE status IN ('queued', 'running'))
+                """,
+                (now,),
+            )
+        return cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Consuming
+    # ------------------------------------------------------------------
+    def claim(self, worker: str) -> Optional[QueuedJob]:
+        """Lease the oldest available job to `worker`.
+
+        A job is available when it is queued, or running under an expired
+        lease. A job whose lease expired after its last attempt is failed
+        instead. Two workers racing for the same row are told apart by the
+        guarded UPDATE, so only one of them gets it.
+        """
+
+        while True:
+            now = time.time()
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    f"""
+                    SELECT {_JOB_COLUMNS} FROM jobs
+                    WHERE (status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_until < ?)
+                    ORDER BY id LIMIT 1
+                    """,
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                job = QueuedJob(*row)
+                if job.status == "running" and job.attempts >= self.max_attempts:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'failed', finished_at = ?, error = ?, worker = NULL WHERE id = ? AND status = 'running' AND lease_until < ?",
+                        (now, f"lease expired on attempt {job.attempts} ({job.worker})", job.id, now),
+                    )
+                    continue
+                cursor = self._conn.execute(
+                    """
+                    UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, started_at = ?
+                    WHERE id = ? AND ((status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_until < ?))
+                    """,
+                    (worker, now + self.lease, now, job.id, now, now),
+                )
+            if cursor.rowcount:
+                if job.status == "running":
+                    logger.warning("Reclaimed job %s (%s) from %s after its lease expired", job.id, job.name, job.worker)
+                job.status, job.worker, job.lease_until, job.attempts = "running", worker, now + self.lease, job.attempts + 1
+                return job
+
+    def heartbeat(self, job: QueuedJob) -> None:
+        """Extend the lease on `job`; raises `LeaseLost` if the worker no longer holds it."""
+
+        until = time.time() + self.lease
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (until, job.id, job.worker),
+            )
+        if not cursor.rowcount:
+            raise LeaseLost(f"Job {job.id} is no longer leased to {job.worker}.")
+        job.lease_until = until
+
+    def complete(self, job: QueuedJob, seconds: float) -> bool:
+        """Mark `job` done; returns False if the lease was lost in the meantime."""
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs SET status = 'done', finished_at = ?, seconds = ?, error = NULL, lease_until = NULL
+                WHERE id = ? AND worker = ? AND status = 'running'
+                """,
+                (time.time(), seconds, job.id, job.worker),
+            )
+            if cursor.rowcount:
+                self._conn.execute("DELETE FROM checkpoints WHERE job_id = ?", (job.id,))
+        return cursor.rowcount > 0
+
+    def fail(self, job: QueuedJob, error: str, seconds: float, *, backoff: float = 0.0) -> str:
+        """Record a failed attempt; the job is queued again until its attempts run out.
+
+        Returns the job's new status. Checkpoints are kept, so the next
+        attempt resumes after the last stage that finished.
+        """
+
+        now = time.time()
+        status = "failed" if job.attempts >= self.max_attempts else "queued"
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, error = ?, seconds = ?, lease_until = NULL, available_at = ?,
+                    finished_at = CASE WHEN ? = 'failed' THEN ? ELSE finished_at END
+                WHERE id = ? AND worker = ? AND status = 'running'
+                """,
+                (status, error, seconds, now + backoff, status, now, job.id, job.worker),
+            )
+        return status if cursor.rowcount else "lost"
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+    def load_checkpoint(self, job_id: int, stage: str, inputs: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, artifacts FROM checkpoints WHERE job_id = ? AND stage = ? AND inputs = ?",
+                (job_id, stage, inputs),
+            ).fetchone()
+        if row is None:
+            return None
+        artifacts = {name: text.encode("utf-8") if text is not None else None for name, text in json.loads(row[1]).items()}
+        return {"result": json.loads(row[0]) if row[0] is not None else None, "artifacts": artifacts}
+
+    def save_checkpoint(
+        self, job_id: int, stage: str, inputs: str, result: Any, artifacts: Dict[str, Optional[bytes]]
+    ) -> None:
+        encoded = {name: data.decode("utf-8") if data is not None else None for name, data in artifacts.items()}
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO checkpoints (job_id, stage, inputs, result, artifacts, saved_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (job_id, stage, inputs, json.dumps(result) if result is not None else None, json.dumps(encoded), time.time()),
+            )
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def status(self, window: float = 3600.0) -> Dict[str, Any]:
+        """Queue depth by status, running leases and throughput over the last `window` seconds."""
+
+        now = time.time()
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            ready = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND available_at <= ?", (now,)
+            ).fetchone()[0]
+            running = self._conn.execute(
+                "SELECT id, name, worker, attempts, lease_until, started_at FROM jobs WHERE status = 'running' ORDER BY id"
+            ).fetchall()
+            done, average = self._conn.execute(
+                "SELECT COUNT(*), AVG(seconds) FROM jobs WHERE status = 'done' AND finished_at >= ?", (now - window,)
+            ).fetchone()
+            failed = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'failed' AND finished_at >= ?", (now - window,)
+            ).fetchone()[0]
+            checkpoints = self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        return {
+            "queue": str(self.path),
+            "counts": {name: counts.get(name, 0) for name in ("queued", "running", "done", "failed")},
+            "ready": ready,
+            "running": [
+                {
+                    "id": job_id,
+                    "name": name,
+                    "worker": worker,
+                    "attempt": attempts,
+                    "lease_left": round(lease_until - now, 1),
+                    "expired": lease_until < now,
+                    "seconds": round(now - started_at, 1),
+                }
+                for job_id, name, worker, attempts, lease_until, started_at in running
+            ],
+            "window_seconds": window,
+            "done_in_window": done,
+            "failed_in_window": failed,
+            "jobs_per_minute": round(done * 60 / window, 3),
+            "avg_job_seconds": round(average, 3) if average is not None else None,
+            "checkpoints": checkpoints,
+        }
+
+    def jobs(self, status: Optional[str] = None, limit: int = 50) -> List[QueuedJob]:
+        query = f"SELECT {_JOB_COLUMNS} FROM jobs"
+        params: List[Any] = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [QueuedJob(*row) for row in self._conn.execute(query, params).fetchall()]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobCheckpoint:
+    """Stage checkpoints for one job, in the form `Supervisor.run(checkpoint=...)` expects."""
+
+    def __init__(self, queue: JobQueue, job: QueuedJob) -> None:
+        self.queue = queue
+        self.job = job
+
+    def load(self, stage: str, inputs: str) -> Optional[Dict[str, Any]]:
+        return self.queue.load_checkpoint(self.job.id, stage, inputs)
+
+    def save(self, stage: str, inputs: str, result: Any, artifacts: Dict[str, Optional[bytes]]) -> None:
+        self.queue.save_checkpoint(self.job.id, stage, inputs, result, artifacts)
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+
+
+class Heartbeat:
+    """Renews a job's lease in the background while it runs."""
+
+    def __init__(self, queue: JobQueue, job: QueuedJob) -> None:
+        self.queue = queue
+        self.job = job
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"heartbeat-{job.id}", daemon=True)
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def check(self) -> None:
+        """Renew the lease now; raises `LeaseLost` if it is gone (also if a background beat found so)."""
+
+        if not self.lost:
+            try:
+                self.queue.heartbeat(self.job)
+            except LeaseLost:
+                self.lost = True
+        if self.lost:
+            raise LeaseLost(f"Job {self.job.id} is no longer leased to {self.job.worker}.")
+
+    def _beat(self) -> None:
+        interval = max(0.5, self.queue.lease / 3)
+        while not self._stop.wait(interval):
+            try:
+                self.queue.heartbeat(self.job)
+            except LeaseLost as exc:
+                logger.warning("%s Its result will be discarded.", exc)
+                self.lost = True
+                return
+            except sqlite3.Error as exc:
+                # A busy database is not a lost lease; the next beat tries again.
+                logger.warning("Heartbeat for job %s failed: %s", self.job.id, exc)
+
+
+class LeasedSink(DirectorySink):
+    """A `DirectorySink` that publishes only while its job's lease is still held.
+
+    Once the lease has passed to another worker, that worker owns the output
+    folder; `commit` then raises `LeaseLost` before touching it, which also
+    stops `Supervisor.run` before it saves the build manifest.
+    """
+
+    def __init__(self, outdir: Path, heartbeat: Heartbeat) -> None:
+        super().__init__(outdir)
+        self.heartbeat = heartbeat
+
+    def commit(self) -> List[str]:
+        self.heartbeat.check()
+        return super().commit()
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def run_queued_job(queue: JobQueue, supervisor: Any, job: QueuedJob, *, backoff: float = 5.0) -> str:
+    """Run one claimed job under a heartbeat; returns its new status."""
+
+    from pipeline import PipelineError
+    from run_supervisor import ensure_outdir
+
+    started = time.perf_counter()
+    error = None
+    with Heartbeat(queue, job) as heartbeat:
+        try:
+            outdir = Path(job.outdir)
+            ensure_outdir(outdir)
+            sink = LeasedSink(outdir, heartbeat)
+            supervisor.run(Path(job.transcript), outdir, sink=sink, checkpoint=JobCheckpoint(queue, job))
+        except LeaseLost as exc:
+            logger.warning("%s Its artifacts were not published.", exc)
+        except PipelineError as exc:
+            error = str(exc)
+        except Exception as exc:  # noqa: BLE001 - one bad transcript must not stop the worker
+            logger.exception("Job %s (%s) failed", job.id, job.name)
+            error = f"{type(exc).__name__}: {exc}"
+    seconds = round(time.perf_counter() - started, 4)
+    if heartbeat.lost:
+        return "lost"
+    if error is None:
+        return "done" if queue.complete(job, seconds) else "lost"
+    return queue.fail(job, error, seconds, backoff=backoff * job.attempts)
+
+
+def work(
+    queue: JobQueue,
+    supervisor: Any,
+    *,
+    workers: int = 1,
+    poll: float = 2.0,
+    drain: bool = False,
+    max_jobs: Optional[int] = None,
+) -> Dict[str, int]:
+    """Claim and run jobs on `workers` threads until stopped, or until the queue is empty with `drain`.
+
+    Threads share `supervisor` and its provider, as `run_batch.py` thread workers do.
+    """
+
+    totals: Dict[str, int] = {}
+    totals_lock = threading.Lock()
+    stop = threading.Event()
+
+    def loop() -> None:
+        name = worker_name()
+        while not stop.is_set():
+            job = queue.claim(name)
+            if job is None:
+                counts = queue.status()["counts"] if drain else None
+                if counts is not None and not (counts["queued"] or counts["running"]):
+                    return
+                stop.wait(poll)
+                continue
+            logger.info("[%s] job %s (%s), attempt %s", name, job.id, job.name, job.attempts)
+            status = run_queued_job(queue, supervisor, job)
+            logger.info("[%s] job %s %s", name, job.id, status)
+            with totals_lock:
+                totals[status] = totals.get(status, 0) + 1
+                if max_jobs is not None and sum(totals.values()) >= max_jobs:
+                    stop.set()
+
+    threads = [threading.Thread(target=loop, name=f"job-worker-{index}", daemon=True) for index in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        logger.info("Stopping after the jobs in progress...")
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return totals
+
+
+# ---------------------------------------------------------------------------
+# CLI entry point
+# ---------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    from run_supervisor import add_cache_arguments
+
+    parser = argparse.ArgumentParser(description="Durable transcript job queue and its workers.")
+    parser.add_argument("--queue", type=Path, default=None, help="Queue file (defaults to JOB_QUEUE).")
+    parser.add_argument(
+        "--log-level",
+        default=os.getenv("LOG_LEVEL", "INFO"),
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Queue transcripts, one job per file.")
+    source = enqueue.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="Directory of transcripts or a glob such as 'archive/**/*.txt'.")
+    source.add_argument("--manifest", type=Path, help="File listing transcript paths (JSON list or one per line).")
+    enqueue.add_argument("--pattern", default="*.txt", help="File pattern used when --input is a directory.")
+    enqueue.add_argument("--outdir", required=True, type=Path, help="Root directory; one subfolder per transcript.")
+
+    worker = commands.add_parser("work", help="Run jobs from the queue.")
+    worker.add_argument("--workers", type=int, default=int(os.getenv("JOB_WORKERS", "1")), help="Jobs run concurrently by this process.")
+    worker.add_argument("--poll", type=float, default=float(os.getenv("JOB_POLL", "2")), help="Seconds between checks of an empty queue.")
+    worker.add_argument("--drain", action="store_true", help="Exit once no job is queued or running.")
+    worker.add_argument("--max-jobs", type=int, default=None, help="Exit after this many jobs.")
+    worker.add_argument("--force", action="store_true", help="Rebuild every artifact even when its inputs are unchanged.")
+    worker.add_argument("--dry-run", action="store_true", help="Force dry-run mode even if an API key is configured.")
+    worker.add_argument(
+        "--project",
+        default=os.getenv("PROJECT_NAME") or None,
+        help="Project every job belongs to; enables the cross-meeting project store.",
+    )
+    worker.add_argument("--store", type=Path, default=None, help="Project store file (defaults to PROJECT_STORE).")
+    worker.add_argument(
+        "--index",
+        type=Path,
+        default=os.getenv("RETRIEVAL_INDEX") or None,
+        help="Retrieval index directory; grounds the notes in earlier meetings and adds each job's meeting.",
+    )
+    add_cache_arguments(worker)
+
+    status = commands.add_parser("status", help="Show queue depth, running leases and throughput.")
+    status.add_argument("--window", type=float, default=3600.0, help="Throughput window in seconds.")
+    status.add_argument("--failed", action="store_true", help="Also list failed jobs with their errors.")
+    status.add_argument("--json", action="store_true", help="Print JSON instead of text.")
+
+    commands.add_parser("retry", help="Queue failed jobs again.")
+    return parser.parse_args()
+
+
+def format_status(report: Dict[str, Any], failed: List[QueuedJob]) -> str:
+    counts = report["counts"]
+    lines = [
+        f"Queue {report['queue']}",
+        f"  queued {counts['queued']} ({report['ready']} ready), running {counts['running']}, "
+        f"done {counts['done']}, failed {counts['failed']}",
+        f"  last {report['window_seconds'] / 60:.0f} min: {report['done_in_window']} done "
+        f"({report['jobs_per_minute']}/min, avg {report['avg_job_seconds'] or 0:.1f}s), {report['failed_in_window']} failed",
+    ]
+    for job in report["running"]:
+        lease = "EXPIRED" if job["expired"] else f"lease {job['lease_left']:.0f}s"
+        lines.append(f"  #{job['id']:<5} {job['name']} on {job['worker']} (attempt {job['attempt']}, {job['seconds']:.0f}s, {lease})")
+    for job in failed:
+        lines.append(f"  #{job.id:<5} failed {job.name}: {job.error}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    from providers import LLMProvider, load_env
+    from run_batch import discover_transcripts, plan_jobs, read_manifest
+    from run_supervisor import Supervisor, build_cache, setup_logging
+    from store import ProjectStore
+
+    load_env()
+    args = parse_args()
+    setup_logging(args.log_level)
+    queue = JobQueue.from_env(args.queue)
+    try:
+        if args.command == "enqueue":
+            transcripts = read_manifest(args.manifest) if args.manifest else discover_transcripts(args.input, args.pattern)
+            if not transcripts:
+                logger.error("No transcripts found for the given input.")
+                return 2
+            planned = plan_jobs([path.resolve() for path in transcripts], args.outdir.resolve())
+            added = sum(queue.enqueue(job.name, job.transcript, job.outdir) is not None for job in planned)
+            print(f"Queued {added} job(s); {len(planned) - added} already queued or running.")
+        elif args.command == "work":
+            cache = build_cache(args)
+            provider = LLMProvider.from_env(dry_override=args.dry_run, cache=cache)
+            store = ProjectStore.from_env(args.store) if args.project else None
+            index = None
+            if args.index:
+                from retrieval import RetrievalIndex
+
+                index = RetrievalIndex(args.index)
+            supervisor = Supervisor(provider, incremental=not args.force, store=store, project=args.project, index=index)
+            try:
+                totals = work(queue, supervisor, workers=args.workers, poll=args.poll, drain=args.drain, max_jobs=args.max_jobs)
+            finally:
+                if store is not None:
+                    store.close()
+                if index is not None:
+                    index.close()
+            print(", ".join(f"{count} {status}" for status, count in sorted(totals.items())) or "No jobs run.")
+            return 1 if totals.get("failed") else 0
+        elif args.command == "status":
+            report = queue.status(args.window)
+            failed = queue.jobs("failed") if args.failed else []
+            if args.json:
+                report["failed_jobs"] = [asdict(job) for job in failed]
+                print(json.dumps(report, indent=2))
+            else:
+                print(format_status(report, failed))
+        else:
+            print(f"Queued {queue.retry_failed()} failed job(s) again.")
+        return 0
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
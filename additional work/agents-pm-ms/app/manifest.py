@@ -0,0 +1,139 @@
+"""Content-hash build manifest for incremental re-runs.
+
+`.build_manifest.json` in each output folder records, per stage, a digest of
+everything the stage read: upstream values, transcript bytes, prompt and
+template files, provider settings and the pipeline source itself. It also
+records the hashes of the files the stage wrote. A stage whose digest is
+unchanged and whose outputs are still on disk is skipped and its stored
+result is reused.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from ingest import TranscriptSource
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".build_manifest.json"
+MANIFEST_VERSION = 1
+
+# Pipeline modules whose source is part of every stage digest, so a code
+# change invalidates previously built outputs. The provider package (prompt
+# splitting, completion budgets, response post-processing) is included whole.
+_SOURCE_FILES = (
+    "run_supervisor.py",
+    "artifacts.py",
+    "classifier.py",
+    "compaction.py",
+    "ingest.py",
+    "models.py",
+    "notes_parser.py",
+    "pipeline.py",
+    "retrieval.py",
+    "store.py",
+    "templating.py",
+    "providers/*.py",
+)
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        for block in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _canonical(value: Any) -> Any:
+    """Reduce `value` to JSON-serialisable data; files are replaced by their digest."""
+
+    if isinstance(value, Path):
+        return {"file": file_digest(value)} if value.is_file() else str(value)
+    if isinstance(value, TranscriptSource):
+        return {"file": file_digest(value.path)}
+    if is_dataclass(value) and not isinstance(value, type):
+        return _canonical(asdict(value))
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def fingerprint(*parts: Any) -> str:
+    encoded = json.dumps(_canonical(list(parts)), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+_SOURCE_DIGEST: Optional[str] = None
+
+
+def source_fingerprint() -> str:
+    global _SOURCE_DIGEST
+    if _SOURCE_DIGEST is None:
+        base = Path(__file__).parent
+        files = [path for name in _SOURCE_FILES for path in sorted(base.glob(name))]
+        _SOURCE_DIGEST = fingerprint(MANIFEST_VERSION, files)
+    return _SOURCE_DIGEST
+
+
+class BuildManifest:
+    """Per-output-folder record of stage input digests, output hashes and results."""
+
+    def __init__(self, outdir: Path) -> None:
+        self.outdir = outdir
+        self.path = outdir / MANIFEST_NAME
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as exc:
+                logger.warning("Ignoring unreadable build manifest %s: %s", self.path, exc)
+            else:
+                if data.get("version") == MANIFEST_VERSION:
+                    self.stages = data.get("stages", {})
+
+    def reusable(self, stage: str, digest: str) -> Optional[Dict[str, Any]]:
+        """Return the stored entry if `stage` saw the same inputs and its outputs are intact."""
+
+        with self._lock:
+            entry = self.stages.get(stage)
+        if entry is None or entry.get("inputs") != digest:
+            return None
+        for name, expected in entry.get("outputs", {}).items():
+            path = self.outdir / name
+            if not path.is_file() or file_digest(path) != expected:
+                return None
+        return entry
+
+    def record(self, stage: str, digest: str, outputs: Iterable[str], result: Any = None, *, sink: Any = None) -> None:
+        """Store `stage`'s input digest, result and output hashes (as staged in `sink`, if given)."""
+
+        if sink is not None:
+            hashes = {name: sink.digest(name) for name in outputs}
+            hashes = {name: value for name, value in hashes.items() if value is not None}
+        else:
+            hashes = {name: file_digest(self.outdir / name) for name in outputs if (self.outdir / name).is_file()}
+        with self._lock:
+            self.stages[stage] = {"inputs": digest, "outputs": hashes, "result": result}
+
+    def forget(self, stage: str) -> None:
+        with self._lock:
+            self.stages.pop(stage, None)
+
+    def save(self) -> None:
+        with self._lock:
+            payload = json.dumps({"version": MANIFEST_VERSION, "stages": self.stages}, indent=2, sort_keys=True)
+        staging = self.path.with_name(self.path.name + ".tmp")
+        staging.write_text(payload + "\n", encoding="utf-8")
+        os.replace(staging, self.path)
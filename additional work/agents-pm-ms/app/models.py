@@ -0,0 +1,34 @@
+"""Data structures shared by the agents, the classifier and the orchestrator."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class MeetingSummary:
+    bullets: List[str]
+    decisions: List[str]
+    questions: List[str]
+    risks: List[str]
+    transcript_excerpt: str
+    status: str = "Green"
+
+
+@dataclass
+class ActionItem:
+    title: str
+    owner: str = "Unassigned"
+    due_date: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    dependency: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "title": self.title,
+            "owner": self.owner or "Unassigned",
+            "due_date": self.due_date,
+            "tags": self.tags,
+            "dependency": self.dependency,
+        }
@@ -0,0 +1,323 @@
+"""Tolerant, incremental parsing of NotesAgent LLM responses.
+
+Two response shapes are accepted:
+
+- a JSON object matching `NOTES_SCHEMA` (JSON mode / tool calls), and
+- the Markdown layout requested by `agents/notes_agent.md`: highlight
+  bullets, Decisions / Open Questions / Risks sections, then an
+  `ACTION_ITEMS` JSON array.
+
+`NotesResponseParser.feed` accepts text deltas as they stream in and reports
+which sections have completed, so callers can act on the ACTION_ITEMS block
+before the response ends. `validate_notes` turns the raw data into model
+objects and collects every problem it finds for a corrective round-trip.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from models import ActionItem
+
+NOTES_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "bullets": {"type": "array", "items": {"type": "string"}},
+        "decisions": {"type": "array", "items": {"type": "string"}},
+        "questions": {"type": "array", "items": {"type": "string"}},
+        "risks": {"type": "array", "items": {"type": "string"}},
+        "action_items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "owner": {"type": "string"},
+                    "due_date": {"type": ["string", "null"]},
+                    "tags": {"type": "array", "items": {"type": "string"}},
+                    "dependency": {"type": ["string", "null"]},
+                },
+                "required": ["title"],
+            },
+        },
+    },
+    "required": ["bullets", "decisions", "questions", "risks", "action_items"],
+}
+
+SECTIONS = ("bullets", "decisions", "questions", "risks")
+
+_HEADINGS = {
+    "highlights": "bullets",
+    "summary": "bullets",
+    "key points": "bullets",
+    "decisions": "decisions",
+    "open questions": "questions",
+    "questions": "questions",
+    "risks": "risks",
+    "action items": "action_items",
+    "action_items": "action_items",
+}
+_HEADING_LINE = re.compile(r"^\s*(?:#{1,6}\s*|\*\*)?\s*([A-Za-z_ ]+?)\s*(?:\*\*)?\s*:?\s*(?:\*\*)?\s*$")
+_INLINE_ACTIONS = re.compile(r"^\s*(?:#{1,6}\s*|\*\*)?\s*ACTION[_ ]ITEMS\b", re.IGNORECASE)
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*\S)\s*$")
+_TRAILING_COMMA = re.compile(r",\s*([\]}])")
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class NotesParseError(ValueError):
+    """Raised when a response cannot be parsed or fails validation."""
+
+    def __init__(self, errors: List[str]) -> None:
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+@dataclass
+class ParsedNotes:
+    bullets: List[str] = field(default_factory=list)
+    decisions: List[str] = field(default_factory=list)
+    questions: List[str] = field(default_factory=list)
+    risks: List[str] = field(default_factory=list)
+    actions: List[ActionItem] = field(default_factory=list)
+
+
+class _BalancedScanner:
+    """Tracks bracket depth across chunks, ignoring brackets inside strings."""
+
+    def __init__(self) -> None:
+        self.text: List[str] = []
+        self.depth = 0
+        self.started = False
+        self.complete = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> str:
+        """Consume `chunk`; return whatever trails the closing bracket."""
+
+        for index, char in enumerate(chunk):
+            if not self.started:
+                if char in "[{":
+                    self.started = True
+                else:
+                    continue
+            self.text.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self.depth += 1
+            elif char in "]}":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.complete = True
+                    return chunk[index + 1 :]
+        return ""
+
+    def value(self) -> Any:
+        return loads_lenient("".join(self.text))
+
+
+def loads_lenient(text: str) -> Any:
+    """`json.loads` that tolerates code fences, smart quotes and trailing commas."""
+
+    cleaned = text.strip().strip("`")
+    if cleaned.lower().startswith("json"):
+        cleaned = cleaned[4:]
+    cleaned = cleaned.replace("“", '"').replace("”", '"')
+    cleaned = _TRAILING_COMMA.sub(r"\1", cleaned)
+    return json.loads(cleaned)
+
+
+class NotesResponseParser:
+    """Incremental parser for NotesAgent responses."""
+
+    def __init__(self) -> None:
+        self.data: Dict[str, Any] = {name: [] for name in SECTIONS}
+        self.completed: List[str] = []
+        self.errors: List[str] = []
+        self._pending = ""
+        self._mode: Optional[str] = None  # "json" or "markdown"
+        self._section = "bullets"
+        self._seen_sections: set = set()
+        self._scanner: Optional[_BalancedScanner] = None
+
+    @property
+    def actions_ready(self) -> bool:
+        return "action_items" in self.completed
+
+    def feed(self, delta: str) -> List[str]:
+        """Consume a text delta and return the sections completed by it."""
+
+        before = len(self.completed)
+        if self._mode is None:
+            self._pending += delta
+            stripped = self._pending.lstrip().lstrip("`").lstrip()
+            if stripped.lower().startswith("json"):
+                stripped = stripped[4:].lstrip()
+            if not stripped:
+                return []
+            self._mode = "json" if stripped.startswith("{") else "markdown"
+            delta, self._pending = self._pending, ""
+
+        if self._mode == "json":
+            self._feed_json(delta)
+        else:
+            self._pending += delta
+            *lines, self._pending = self._pending.split("\n")
+            for line in lines:
+                self._consume_line(line)
+        return self.completed[before:]
+
+    def close(self) -> ParsedNotes:
+        """Flush buffered text and return validated notes or raise `NotesParseError`."""
+
+        if self._mode == "markdown" and self._pending:
+            self._consume_line(self._pending)
+            self._pending = ""
+        if self._mode == "markdown":
+            self._finish_section()
+        if "action_items" not in self.data:
+            self.errors.append("ACTION_ITEMS JSON block is missing or incomplete.")
+        if self.errors:
+            raise NotesParseError(list(self.errors))
+        return validate_notes(self.data)
+
+    # ------------------------------------------------------------------
+    # JSON-object responses
+    # ------------------------------------------------------------------
+    def _feed_json(self, delta: str) -> None:
+        if self._scanner is None:
+            self._scanner = _BalancedScanner()
+        if self._scanner.complete:
+            return
+        self._scanner.feed(delta)
+        if not self._scanner.complete:
+            return
+        try:
+            payload = self._scanner.value()
+        except json.JSONDecodeError as exc:
+            self.errors.append(f"Response JSON is malformed: {exc}")
+            return
+        if not isinstance(payload, dict):
+            self.errors.append("Response JSON must be an object.")
+            return
+        for name in SECTIONS:
+            self.data[name] = payload.get(name, [])
+        self.data["action_items"] = payload.get("action_items", payload.get("ACTION_ITEMS"))
+        self.completed.extend([*SECTIONS, "action_items"])
+
+    # ------------------------------------------------------------------
+    # Markdown responses
+    # ------------------------------------------------------------------
+    def _consume_line(self, line: str) -> None:
+        if self._scanner is not None and not self._scanner.complete:
+            self._feed_actions(line + "\n")
+            return
+
+        if _INLINE_ACTIONS.match(line):
+            self._finish_section()
+            self._section = "action_items"
+            self._scanner = _BalancedScanner()
+            self._feed_actions(line.split(":", 1)[1] if ":" in line else "")
+            return
+
+        heading = _HEADING_LINE.match(line)
+        if heading and not _LIST_ITEM.match(line):
+            name = _HEADINGS.get(heading.group(1).strip().lower())
+            if name is not None:
+                if name != self._section:
+                    self._finish_section()
+                    self._section = name
+                return
+
+        item = _LIST_ITEM.match(line)
+        if item and self._section in SECTIONS:
+            self.data[self._section].append(item.group(1).strip())
+
+    def _feed_actions(self, text: str) -> None:
+        assert self._scanner is not None
+        self._scanner.feed(text)
+        if not self._scanner.complete:
+            return
+        try:
+            self.data["action_items"] = self._scanner.value()
+        except json.JSONDecodeError as exc:
+            self.errors.append(f"ACTION_ITEMS JSON is malformed: {exc}")
+            return
+        self.completed.append("action_items")
+        self._section = "after_actions"
+
+    def _finish_section(self) -> None:
+        if self._section in SECTIONS and self._section not in self._seen_sections:
+            self._seen_sections.add(self._section)
+            self.completed.append(self._section)
+
+
+def validate_notes(data: Dict[str, Any]) -> ParsedNotes:
+    """Validate raw parsed data into `ParsedNotes`, collecting every problem."""
+
+    errors: List[str] = []
+    notes = ParsedNotes()
+
+    for name in SECTIONS:
+        values = data.get(name)
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            errors.append(f"'{name}' must be a list of strings.")
+            continue
+        setattr(notes, name, [v.strip() for v in values if v and v.strip()])
+    if not errors and not notes.bullets:
+        errors.append("At least one highlight bullet is required.")
+
+    raw_actions = data.get("action_items")
+    if not isinstance(raw_actions, list):
+        errors.append("ACTION_ITEMS must be a JSON array.")
+        raw_actions = []
+    for index, raw in enumerate(raw_actions):
+        where = f"ACTION_ITEMS[{index}]"
+        if not isinstance(raw, dict):
+            errors.append(f"{where} must be an object.")
+            continue
+        title = raw.get("title")
+        if not isinstance(title, str) or not title.strip():
+            errors.append(f"{where}.title must be a non-empty string.")
+            continue
+        due_date = raw.get("due_date") or None
+        if due_date is not None and (not isinstance(due_date, str) or not _ISO_DATE.match(due_date)):
+            errors.append(f"{where}.due_date must be YYYY-MM-DD or null, got {due_date!r}.")
+            continue
+        tags = raw.get("tags") or []
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            errors.append(f"{where}.tags must be a list of strings.")
+            continue
+        owner = raw.get("owner")
+        dependency = raw.get("dependency") or None
+        notes.actions.append(
+            ActionItem(
+                title=title.strip(),
+                owner=owner.strip() if isinstance(owner, str) and owner.strip() else "Unassigned",
+                due_date=due_date,
+                tags=tags,
+                dependency=dependency if isinstance(dependency, str) else None,
+            )
+        )
+
+    if errors:
+        raise NotesParseError(errors)
+    return notes
+
+
+def parse_notes_response(text: str) -> ParsedNotes:
+    parser = NotesResponseParser()
+    parser.feed(text)
+    return parser.close()
@@ -0,0 +1,330 @@
+"""Output sinks that stage a run's artifacts and publish them together.
+
+Agents keep calling `write_text(outdir / name, ...)`. While a sink is active
+for the current context (`with use_sink(sink):`, inherited by pipeline stage
+threads), those writes are staged in memory instead of touching the output
+folder:
+
+- `DirectorySink.commit()` writes the staged files to its own
+  `<outdir>/.staging-<id>/`, fsyncs them, drops a commit marker and renames
+  each file into place. Each file is replaced atomically, so no reader sees a
+  half-written file. A crash before the marker leaves the previous artifact
+  set untouched; a crash after it is rolled forward the next time a sink
+  opens the folder. While the renames run, a reader may see some new files
+  next to some old ones.
+- Each sink holds a lock file while it stages, so a sink opening the same
+  folder discards only staging left by a writer that is gone.
+- `MemorySink` never touches the disk; service mode and tests read the
+  artifacts straight from it.
+
+Progress files such as `meeting.md.partial` bypass staging on purpose: they
+exist to be seen while the run is still going.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import IO, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+STAGING_DIR = ".staging"
+COMMIT_MARKER = ".commit"
+# Without file locks (Windows), unmarked staging this old counts as abandoned.
+STALE_STAGING_SECONDS = 3600.0
+
+
+class OutputSink:
+    """Stages artifacts by file name for one output folder."""
+
+    persistent = False
+
+    def __init__(self, outdir: Path) -> None:
+        self.outdir = Path(outdir)
+        self._lock = threading.Lock()
+        # File name -> new bytes, or None for a staged removal.
+        self._staged: Dict[str, Optional[bytes]] = {}
+
+    def owns(self, path: Path) -> bool:
+        return Path(path).parent == self.outdir
+
+    def committed(self, name: str) -> Optional[bytes]:
+        """Content already published under `name`, if any."""
+
+        return None
+
+    def read(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            if name in self._staged:
+                return self._staged[name]
+        return self.committed(name)
+
+    def write(self, name: str, data: bytes) -> bool:
+        """Stage `data`; returns False when it matches what is already published."""
+
+        unchanged = self.committed(name) == data
+        with self._lock:
+            if unchanged:
+                self._staged.pop(name, None)
+            else:
+                self._staged[name] = data
+        return not unchanged
+
+    def remove(self, name: str) -> None:
+        absent = self.committed(name) is None
+        with self._lock:
+            if absent:
+                self._staged.pop(name, None)
+            else:
+                self._staged[name] = None
+
+    def digest(self, name: str) -> Optional[str]:
+        data = self.read(name)
+        return hashlib.sha256(data).hexdigest() if data is not None else None
+
+    def artifacts(self) -> Dict[str, bytes]:
+        """Every artifact as it will look after `commit`."""
+
+        with self._lock:
+            return {name: data for name, data in self._staged.items() if data is not None}
+
+    def write_progress(self, name: str, text: str) -> None:
+        """Publish an in-progress view immediately; not part of the committed set."""
+
+    def commit(self) -> List[str]:
+        """Publish staged artifacts; returns the names written or removed."""
+
+        with self._lock:
+            names = sorted(self._staged)
+            self._staged.clear()
+        return names
+
+
+class MemorySink(OutputSink):
+    """Keeps every artifact in memory; `files` holds the committed set."""
+
+    def __init__(self, outdir: Path = Path("memory")) -> None:
+        super().__init__(outdir)
+        self.files: Dict[str, bytes] = {}
+        self.progress: Dict[str, str] = {}
+
+    def committed(self, name: str) -> Optional[bytes]:
+        return self.files.get(name)
+
+    def artifacts(self) -> Dict[str, bytes]:
+        with self._lock:
+            merged = {**self.files, **self._staged}
+        return {name: data for name, data in merged.items() if data is not None}
+
+    def write_progress(self, name: str, text: str) -> None:
+        self.progress[name] = text
+
+    def commit(self) -> List[str]:
+        with self._lock:
+            staged, self._staged = self._staged, {}
+            for name, data in staged.items():
+                if data is None:
+                    self.files.pop(name, None)
+                    self.progress.pop(name, None)
+                else:
+                    self.files[name] = data
+        return sorted(staged)
+
+
+class DirectorySink(OutputSink):
+    """Publishes staged artifacts into `outdir` all-or-nothing."""
+
+    persistent = True
+
+    def __init__(self, outdir: Path) -> None:
+        super().__init__(outdir)
+        recover(self.outdir)
+        # Private to this sink, so concurrent writers to the folder never share staging.
+        self.staging = self.outdir / f"{STAGING_DIR}-{uuid.uuid4().hex[:12]}"
+
+    def committed(self, name: str) -> Optional[bytes]:
+        try:
+            return (self.outdir / name).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def artifacts(self) -> Dict[str, bytes]:
+        merged: Dict[str, Optional[bytes]] = {}
+        if self.outdir.is_dir():
+            for path in sorted(self.outdir.iterdir()):
+                if path.is_file() and not path.name.startswith(".") and path.suffix != ".partial":
+                    merged[path.name] = path.read_bytes()
+        with self._lock:
+            merged.update(self._staged)
+        return {name: data for name, data in merged.items() if data is not None}
+
+    def write_progress(self, name: str, text: str) -> None:
+        (self.outdir / name).write_text(text, encoding="utf-8")
+
+    def commit(self) -> List[str]:
+        with self._lock:
+            staged, self._staged = self._staged, {}
+        if not staged:
+            return []
+
+        staging = self.staging
+        lock = _lock_path(staging)
+        # The lock is taken before the staging folder exists, so `recover` never sees it unlocked.
+        with _hold(lock):
+            shutil.rmtree(staging, ignore_errors=True)
+            staging.mkdir(parents=True)
+            for name, data in staged.items():
+                if data is not None:
+                    _write_synced(staging / name, data)
+            marker = {"write": sorted(n for n, d in staged.items() if d is not None),
+                      "remove": sorted(n for n, d in staged.items() if d is None)}
+            _write_synced(staging / (COMMIT_MARKER + ".tmp"), json.dumps(marker).encode("utf-8"))
+            os.replace(staging / (COMMIT_MARKER + ".tmp"), staging / COMMIT_MARKER)
+            _sync_dir(staging)
+
+            _apply(self.outdir, staging, marker)
+            lock.unlink(missing_ok=True)
+        logger.info("Committed %s artifact(s) to %s", len(marker["write"]), self.outdir)
+        return sorted(staged)
+
+
+class _hold:
+    """Hold an exclusive lock on `path` (created if needed) for the duration of a `with` block."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._handle: Optional[IO[bytes]] = None
+
+    def __enter__(self) -> "_hold":
+        if fcntl is not None:
+            self._handle = self.path.open("ab")
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if self._handle is not None:
+            self._handle.close()
+
+
+def _lock_path(staging: Path) -> Path:
+    return staging.with_name(staging.name + ".lock")
+
+
+def _abandoned(staging: Path) -> bool:
+    """True when no live writer holds `staging`'s lock (a pre-lock `.staging` folder always is)."""
+
+    if staging.name == STAGING_DIR:
+        return True
+    if fcntl is None:
+        return time.time() - staging.stat().st_mtime > STALE_STAGING_SECONDS
+    try:
+        handle = _lock_path(staging).open("rb")
+    except FileNotFoundError:
+        return True
+    with handle:
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+
+def _write_synced(path: Path, data: bytes) -> None:
+    with path.open("wb") as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def _sync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # pragma: no cover - directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _apply(outdir: Path, staging: Path, marker: Dict[str, List[str]]) -> None:
+    for name in marker["write"]:
+        try:
+            os.replace(staging / name, outdir / name)
+        except FileNotFoundError:  # already moved by an interrupted earlier attempt
+            continue
+        logger.info("Wrote %s", outdir / name)
+    for name in marker["remove"]:
+        (outdir / name).unlink(missing_ok=True)
+    _sync_dir(outdir)
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def recover(outdir: Path) -> None:
+    """Finish or discard commits interrupted by a crash.
+
+    Marked commits are rolled forward; applying one twice is harmless.
+    Unmarked staging is discarded only once its writer is gone.
+    """
+
+    outdir = Path(outdir)
+    if not outdir.is_dir():
+        return
+    for staging in sorted(outdir.glob(STAGING_DIR + "*")):
+        if not staging.is_dir():
+            continue
+        marker_path = staging / COMMIT_MARKER
+        try:
+            if marker_path.is_file():
+                marker = json.loads(marker_path.read_text(encoding="utf-8"))
+                logger.warning("Completing interrupted artifact commit in %s", outdir)
+                _apply(outdir, staging, marker)
+            elif _abandoned(staging):
+                logger.warning("Discarding uncommitted artifacts in %s", staging)
+                shutil.rmtree(staging, ignore_errors=True)
+            else:
+                continue
+        except FileNotFoundError:  # finished by its writer (or another sink) meanwhile
+            pass
+        if not staging.exists():
+            _lock_path(staging).unlink(missing_ok=True)
+
+
+# ---------------------------------------------------------------------------
+# Active sink
+# ---------------------------------------------------------------------------
+
+_sink: ContextVar[Optional[OutputSink]] = ContextVar("output_sink", default=None)
+
+
+def active_sink() -> Optional[OutputSink]:
+    return _sink.get()
+
+
+class use_sink:
+    """Route `write_text` calls for the sink's folder into `sink` within this context."""
+
+    def __init__(self, sink: Optional[OutputSink]) -> None:
+        self.sink = sink
+        self._token = None
+
+    def __enter__(self) -> Optional[OutputSink]:
+        self._token = _sink.set(self.sink)
+        return self.sink
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        _sink.reset(self._token)
@@ -0,0 +1,154 @@
+"""Minimal dependency-graph scheduler for the agent pipeline.
+
+Each stage names the context values it consumes and produces. Stages whose
+inputs are available run concurrently on a thread pool; a failing stage only
+skips the stages downstream of it, so independent outputs are still produced.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from providers.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {"status": self.status, "seconds": round(self.seconds, 4), "error": self.error}
+
+
+class PipelineError(RuntimeError):
+    """Raised after a run in which at least one stage failed."""
+
+    def __init__(self, results: Dict[str, StageResult]) -> None:
+        self.results = results
+        failed = [f"{r.name} ({r.error})" for r in results.values() if r.status == "failed"]
+        super().__init__("Pipeline stage(s) failed: " + "; ".join(failed))
+
+
+def _dependencies(stages: Sequence[Stage], initial: Set[str]) -> Dict[str, Set[str]]:
+    producers: Dict[str, str] = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers or output in initial:
+                raise ValueError(f"Value '{output}' is produced more than once.")
+            producers[output] = stage.name
+
+    deps: Dict[str, Set[str]] = {}
+    for stage in stages:
+        missing = [name for name in stage.inputs if name not in producers and name not in initial]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' needs unknown input(s): {', '.join(missing)}")
+        deps[stage.name] = {producers[name] for name in stage.inputs if name in producers}
+    return deps
+
+
+def _check_acyclic(deps: Dict[str, Set[str]]) -> None:
+    remaining = {name: set(parents) for name, parents in deps.items()}
+    while remaining:
+        ready = [name for name, parents in remaining.items() if not parents]
+        if not ready:
+            raise ValueError(f"Pipeline has a dependency cycle among: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+        for parents in remaining.values():
+            parents.difference_update(ready)
+
+
+def run_dag(
+    stages: Sequence[Stage],
+    context: Dict[str, Any],
+    *,
+    max_workers: Optional[int] = None,
+    on_result: Optional[Callable[[StageResult], None]] = None,
+) -> Dict[str, StageResult]:
+    """Execute `stages` against `context`, filling in each stage's outputs.
+
+    Returns a result per stage in declaration order. Stages downstream of a
+    failure are reported as `skipped`; the caller decides whether to raise.
+    `on_result`, if given, is called with each result as soon as it is known.
+    """
+
+    deps = _dependencies(stages, set(context))
+    _check_acyclic(deps)
+    by_name = {stage.name: stage for stage in stages}
+    results: Dict[str, StageResult] = {}
+    pending = {stage.name for stage in stages}
+
+    def _record(result: StageResult) -> None:
+        results[result.name] = result
+        if on_result is not None:
+            on_result(result)
+
+    def _execute(stage: Stage) -> Tuple[Any, float, Optional[BaseException]]:
+        started = time.perf_counter()
+        try:
+            with span("agent", stage.name):
+                value = stage.func(**{name: context[name] for name in stage.inputs})
+        except Exception as exc:  # noqa: BLE001 - isolate the failing stage
+            return None, time.perf_counter() - started, exc
+        return value, time.perf_counter() - started, None
+
+    def _skip_downstream(failed: str) -> None:
+        frontier = [failed]
+        while frontier:
+            parent = frontier.pop()
+            for name in list(pending):
+                if parent in deps[name]:
+                    pending.discard(name)
+                    _record(StageResult(name, "skipped", error=f"upstream '{failed}' failed"))
+                    frontier.append(name)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1, thread_name_prefix="stage") as pool:
+        running: Dict[Future, str] = {}
+        while pending or running:
+            completed = {name for name, result in results.items() if result.status == "ok"}
+            for name in sorted(pending, key=list(by_name).index):
+                if deps[name] <= completed:
+                    pending.discard(name)
+                    # Each stage runs in a copy of the caller's context so spans nest under the run.
+                    running[pool.submit(contextvars.copy_context().run, _execute, by_name[name])] = name
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                stage = by_name[name]
+                value, seconds, exc = future.result()
+                if exc is not None:
+                    logger.error("Stage '%s' failed", name, exc_info=exc)
+                    _record(StageResult(name, "failed", seconds, f"{type(exc).__name__}: {exc}"))
+                    _skip_downstream(name)
+                    continue
+
+                if len(stage.outputs) == 1:
+                    context[stage.outputs[0]] = value
+                elif stage.outputs:
+                    context.update(zip(stage.outputs, value))
+                _record(StageResult(name, "ok", seconds=seconds))
+                logger.debug("Stage '%s' finished in %.3fs", name, seconds)
+
+    ordered: List[StageResult] = [results[stage.name] for stage in stages]
+    return {result.name: result for result in ordered}
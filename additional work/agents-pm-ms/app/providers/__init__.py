@@ -1,3 +1,10 @@
 """Provider factories and utilities for LLM integrations."""
 
+from .cache import ResponseCache  # noqa: F401
+from .env import load_env  # noqa: F401
 from .llm import LLMProvider, ProviderConfig  # noqa: F401
+from .prompts import Prompt  # noqa: F401
+from .resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, TokenBucket  # noqa: F401
+from .router import ProviderRouter  # noqa: F401
+from .telemetry import MetricsRegistry, RunMetrics  # noqa: F401
+from .tokens import estimate_tokens  # noqa: F401
@@ -0,0 +1,257 @@
+"""Deferred requests and the provider batch APIs used by bulk mode.
+
+Bulk mode (`run_batch.py --bulk`) runs the agents with a `BatchCollector`
+attached to the provider. A request that misses the response cache is then
+recorded and `DeferredRequest` is raised instead of calling the API. The
+collected requests are submitted through the OpenAI Batch API or the
+Anthropic Message Batches API, and each result is written to the response
+cache under the request's own cache key. When the agents run again, every
+call is a cache hit.
+
+Request bodies and cache keys are the ones `LLMProvider` would use for the
+same call, so batch and interactive runs share cache entries. The Anthropic
+SDK pinned in the image predates its batches client, so that API is called
+directly over the shared HTTP pool.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .resilience import call_with_retries, guard_for
+from .transport import shared_client, transport_config
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .llm import GenerationRequest, LLMProvider
+
+logger = logging.getLogger(__name__)
+
+
+class DeferredRequest(RuntimeError):
+    """Raised in bulk mode when a request was queued for the batch API instead of being sent."""
+
+
+# ---------------------------------------------------------------------------
+# Collecting requests
+# ---------------------------------------------------------------------------
+
+
+class BatchCollector:
+    """Records cache-missing requests by cache key while the agents run in bulk mode."""
+
+    def __init__(self, live_keys: Optional[Set[str]] = None) -> None:
+        self.pending: Dict[str, "GenerationRequest"] = {}
+        # Requests that failed in too many batches are sent interactively instead.
+        self.live_keys: Set[str] = set(live_keys or ())
+        self._lock = threading.Lock()
+
+    def defer(self, key: str, request: "GenerationRequest") -> None:
+        """Queue `request` and raise `DeferredRequest`, unless it must go out live."""
+
+        if key in self.live_keys:
+            return
+        with self._lock:
+            self.pending[key] = request
+        raise DeferredRequest("Request deferred to the batch API.")
+
+    def drain(self) -> Dict[str, "GenerationRequest"]:
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        return pending
+
+
+# ---------------------------------------------------------------------------
+# Batch API backends
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class BatchStatus:
+    done: bool
+    state: str
+    succeeded: int = 0
+    failed: int = 0
+
+
+@dataclass
+class BatchItem:
+    key: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class BatchBackend:
+    """Submits collected requests to one provider's batch API and reads the results back."""
+
+    # Largest number of requests the API accepts in one batch.
+    max_requests = 50_000
+
+    def __init__(self, provider: "LLMProvider") -> None:
+        self.provider = provider
+        self.guard = guard_for(provider.config.provider)
+
+    def submit(self, requests: Dict[str, "GenerationRequest"]) -> str:
+        raise NotImplementedError
+
+    def status(self, batch_id: str) -> BatchStatus:
+        raise NotImplementedError
+
+    def results(self, batch_id: str) -> Iterator[BatchItem]:
+        raise NotImplementedError
+
+    def _call(self, fn: Any) -> Any:
+        return call_with_retries(fn, guard=self.guard, policy=self.provider.retry_policy, tokens=0)
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API: a JSONL file of chat completion requests, results as an output file."""
+
+    endpoint = "/v1/chat/completions"
+
+    def submit(self, requests: Dict[str, "GenerationRequest"]) -> str:
+        lines = []
+        for key, request in requests.items():
+            body = self.provider._openai_kwargs(request)
+            # The SDK merges `extra_body` into the request; a batch line has to carry it inline.
+            body.update(body.pop("extra_body", {}))
+            lines.append(json.dumps({"custom_id": key, "method": "POST", "url": self.endpoint, "body": body}))
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+        client = self.provider._get_client()
+        uploaded = self._call(lambda: client.files.create(file=("requests.jsonl", io.BytesIO(payload)), purpose="batch"))
+        batch = self._call(
+            lambda: client.batches.create(input_file_id=uploaded.id, endpoint=self.endpoint, completion_window="24h")
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> BatchStatus:
+        batch = self._call(lambda: self.provider._get_client().batches.retrieve(batch_id))
+        counts = getattr(batch, "request_counts", None)
+        return BatchStatus(
+            done=batch.status in ("completed", "failed", "expired", "cancelled"),
+            state=batch.status,
+            succeeded=getattr(counts, "completed", 0) or 0,
+            failed=getattr(counts, "failed", 0) or 0,
+        )
+
+    def results(self, batch_id: str) -> Iterator[BatchItem]:
+        client = self.provider._get_client()
+        batch = self._call(lambda: client.batches.retrieve(batch_id))
+        # Expired batches still deliver the requests that finished; the rest are retried next round.
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = self._call(lambda: client.files.content(file_id))
+            for line in content.text.splitlines():
+                if line.strip():
+                    yield self._item(json.loads(line))
+
+    @staticmethod
+    def _item(record: Dict[str, Any]) -> BatchItem:
+        key = record.get("custom_id", "")
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or body.get("error") or {"status_code": response.get("status_code")}
+            return BatchItem(key, error=json.dumps(error))
+        usage = body.get("usage") or {}
+        return BatchItem(
+            key,
+            text=(body["choices"][0]["message"].get("content") or "").strip(),
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+        )
+
+
+class AnthropicBatchBackend(BatchBackend):
+    """Anthropic Message Batches API over plain HTTP (see the module docstring)."""
+
+    max_requests = 100_000
+    api_version = "2023-06-01"
+
+    def submit(self, requests: Dict[str, "GenerationRequest"]) -> str:
+        body = {
+            "requests": [
+                {"custom_id": key, "params": self.provider._anthropic_kwargs(request)} for key, request in requests.items()
+            ]
+        }
+        return self._request("POST", "/v1/messages/batches", json=body).json()["id"]
+
+    def status(self, batch_id: str) -> BatchStatus:
+        batch = self._request("GET", f"/v1/messages/batches/{batch_id}").json()
+        counts = batch.get("request_counts") or {}
+        return BatchStatus(
+            done=batch.get("processing_status") == "ended",
+            state=batch.get("processing_status", "unknown"),
+            succeeded=counts.get("succeeded", 0),
+            failed=sum(counts.get(name, 0) for name in ("errored", "canceled", "expired")),
+        )
+
+    def results(self, batch_id: str) -> Iterator[BatchItem]:
+        batch = self._request("GET", f"/v1/messages/batches/{batch_id}").json()
+        url = batch.get("results_url") or f"/v1/messages/batches/{batch_id}/results"
+        for line in self._request("GET", url).text.splitlines():
+            if line.strip():
+                yield self._item(json.loads(line))
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+        base = (self.provider.config.base_url or "https://api.anthropic.com").rstrip("/")
+        url = path if path.startswith("http") else base + path
+        headers = {"x-api-key": os.getenv("ANTHROPIC_API_KEY", ""), "anthropic-version": self.api_version}
+
+        def send() -> Any:
+            response = shared_client().request(
+                method, url, headers=headers, timeout=transport_config().timeouts(), **kwargs
+            )
+            response.raise_for_status()
+            return response
+
+        return self._call(send)
+
+    @staticmethod
+    def _item(record: Dict[str, Any]) -> BatchItem:
+        key = record.get("custom_id", "")
+        result = record.get("result") or {}
+        if result.get("type") != "succeeded":
+            return BatchItem(key, error=json.dumps(result.get("error") or {"type": result.get("type")}))
+        message = result.get("message") or {}
+        content = message.get("content") or []
+        tool_inputs = [block.get("input") for block in content if block.get("type") == "tool_use"]
+        if tool_inputs:
+            text = json.dumps(tool_inputs[0])
+        else:
+            text = "\n".join(block.get("text", "") for block in content if "text" in block).strip()
+        usage = message.get("usage") or {}
+        prompt_tokens = sum(
+            usage.get(name) or 0 for name in ("input_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+        )
+        return BatchItem(key, text=text, prompt_tokens=prompt_tokens, completion_tokens=usage.get("output_tokens", 0))
+
+
+_BACKENDS = {"openai": OpenAIBatchBackend, "anthropic": AnthropicBatchBackend}
+
+
+def batch_backend_for(provider: "LLMProvider") -> BatchBackend:
+    """The batch API client for `provider`; Gemini has no batch API supported here."""
+
+    name = provider.config.provider.lower()
+    backend = _BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Bulk mode needs a batch API; provider '{name}' is not supported (use openai or anthropic).")
+    return backend(provider)
+
+
+def split_requests(
+    requests: Dict[str, "GenerationRequest"], limit: int
+) -> List[Dict[str, "GenerationRequest"]]:
+    """Split `requests` into batches of at most `limit`."""
+
+    items: List[Tuple[str, "GenerationRequest"]] = list(requests.items())
+    return [dict(items[start : start + limit]) for start in range(0, len(items), limit)]
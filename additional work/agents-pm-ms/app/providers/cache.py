@@ -0,0 +1,182 @@
+"""Persistent, content-addressed cache for LLM responses.
+
+Entries live in a single SQLite file so that separate runs, batch workers and
+processes sharing a volume all see the same cache. Keys are derived from every
+input that influences a completion, so an unchanged transcript re-run costs a
+local lookup instead of an API round-trip.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "agents-pm-ms"
+
+
+def cache_key(
+    *,
+    provider: str,
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str],
+    temperature: float,
+    max_tokens: int,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Return a stable SHA-256 key for one generation request."""
+
+    material: Dict[str, Any] = {
+        "provider": provider,
+        "model": model,
+        "system_prompt": system_prompt or "",
+        "temperature": round(float(temperature), 4),
+        "max_tokens": int(max_tokens),
+        "prompt_sha256": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+    }
+    if json_schema is not None:
+        material["json_schema"] = json.dumps(json_schema, sort_keys=True)
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response store with TTL expiry and size-based LRU eviction."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls, directory: Optional[Path] = None) -> "ResponseCache":
+        """Build a cache using `LLM_CACHE_DIR`, `LLM_CACHE_TTL` and `LLM_CACHE_MAX_MB`."""
+
+        directory = directory or Path(os.getenv("LLM_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        ttl = os.getenv("LLM_CACHE_TTL")
+        max_mb = os.getenv("LLM_CACHE_MAX_MB", "256")
+        return cls(
+            Path(directory) / "responses.sqlite3",
+            ttl_seconds=float(ttl) if ttl else None,
+            max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else None,
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str, *, provider: str, model: str) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (key, provider, model, response, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, provider, model, response, size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def clear(self) -> int:
+        """Remove every entry and return how many were deleted."""
+
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM responses").rowcount
+            self._conn.commit()
+        self._conn.execute("VACUUM")
+        logger.info("Cleared %s cached response(s) from %s", deleted, self.path)
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+    def _evict(self) -> None:
+        """Drop expired entries, then least-recently-used ones until under `max_bytes`."""
+
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+        if self.max_bytes is None:
+            return
+
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        logger.debug("Evicted %s cached response(s) to stay under %s bytes", len(doomed), self.max_bytes)
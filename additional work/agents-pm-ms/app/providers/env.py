@@ -0,0 +1,25 @@
+"""One-time `.env` loading shared by every entry point."""
+
+from __future__ import annotations
+
+import threading
+
+_LOCK = threading.Lock()
+_LOADED = False
+
+
+def load_env() -> None:
+    """Load `.env` into the environment once per process; later calls are no-ops.
+
+    Existing environment variables win over values in the file.
+    """
+
+    global _LOADED
+    if _LOADED:
+        return
+    with _LOCK:
+        if not _LOADED:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _LOADED = True
@@ -6,15 +6,35 @@ attendees to plug in whichever foundation model they already have access to.
 
 from __future__ import annotations
 
+import contextvars
+import hashlib
+import json
 import logging
 import os
+import re
+import threading
+import weakref
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
-
-from dotenv import load_dotenv
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import telemetry
+from .batch import BatchCollector, DeferredRequest
+from .cache import ResponseCache, cache_key
+from .env import load_env
+from .prompts import split_prompt
+from .resilience import RetryPolicy, acall_with_retries, call_with_retries, guard_for, should_failover
+from .router import ProviderRouter
+from .tokens import COMPLETION_FLOOR, completion_budget, estimate_tokens
+from .transport import run_sync, shared_async_client, shared_client, transport_config
 
 logger = logging.getLogger(__name__)
 
+STRUCTURED_OUTPUT_NAME = "structured_output"
+
+# Serializes first-use SDK imports: the OpenAI and Anthropic SDKs importing
+# pydantic from two threads at once (e.g. routed backends) can fail half-initialized.
+_SDK_IMPORT_LOCK = threading.Lock()
+
 
 @dataclass
 class ProviderConfig:
@@ -23,6 +43,26 @@ class ProviderConfig:
     provider: str
     model: str
     dry_run: bool = False
+    # Point the SDK client at another endpoint, e.g. a proxy or the local fake server.
+    base_url: Optional[str] = None
+    # Mark stable prompt prefixes for the provider's prompt cache.
+    prompt_cache: bool = True
+    # Treat `max_tokens` as a ceiling and size each request from its prompt (`completion_budget`).
+    adaptive_max_tokens: bool = True
+
+
+@dataclass(frozen=True)
+class GenerationRequest:
+    """One completion request as passed between the provider internals."""
+
+    prompt: str
+    system_prompt: Optional[str] = None
+    temperature: float = 0.3
+    max_tokens: int = 1_024
+    json_schema: Optional[Dict[str, Any]] = None
+
+    def estimated_tokens(self) -> int:
+        return estimate_tokens((self.system_prompt or "") + self.prompt) + self.max_tokens
 
 
 class LLMProvider:
@@ -32,39 +72,61 @@ class LLMProvider:
     workshop can run end-to-end without external API calls.
     """
 
+    # Fallbacks only; `<PROVIDER>_MODEL` is read in `from_env`, after `.env` is loaded.
     _DEFAULT_MODELS: Dict[str, str] = {
-        "openai": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-        "anthropic": os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-latest"),
-        "gemini": os.getenv("GEMINI_MODEL", "gemini-1.5-flash"),
+        "openai": "gpt-4o-mini",
+        "anthropic": "claude-3-5-sonnet-latest",
+        "gemini": "gemini-1.5-flash",
     }
 
-    def __init__(self, config: ProviderConfig) -> None:
+    def __init__(
+        self,
+        config: ProviderConfig,
+        cache: Optional[ResponseCache] = None,
+        *,
+        fallbacks: Optional[List[ProviderConfig]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        router: Optional[ProviderRouter] = None,
+    ) -> None:
         self.config = config
+        self.cache = cache
+        self.fallbacks = list(fallbacks or [])
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        # When set, live calls go to whichever of the router's backends it picks (see `router.py`).
+        self.router = router
+        # Bulk mode: cache misses are queued for the batch API instead of being sent (see `batch.py`).
+        self.collector: Optional[BatchCollector] = None
         self._client: Any = None
+        # Async SDK clients are bound to the event loop they were created on.
+        self._async_clients: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+        self._gemini_models: Dict[Tuple[Any, ...], Any] = {}
+        self._client_lock = threading.Lock()
+        self._fallback: Optional["LLMProvider"] = None
 
         if self.config.dry_run:
             logger.info("LLM provider running in DRY_RUN mode; no API calls will be made.")
             return
 
-        provider = config.provider.lower()
-        if provider == "openai":
-            self._client = self._init_openai()
-        elif provider == "anthropic":
-            self._client = self._init_anthropic()
-        elif provider == "gemini":
-            self._client = self._init_gemini()
-        else:
+        # The SDK itself is imported on the first request (see `_get_client`).
+        if config.provider.lower() not in self._DEFAULT_MODELS:
             raise ValueError(f"Unsupported provider '{config.provider}'.")
 
     @classmethod
-    def from_env(cls, dry_override: Optional[bool] = None) -> "LLMProvider":
+    def from_env(
+        cls,
+        dry_override: Optional[bool] = None,
+        cache: Optional[ResponseCache] = None,
+    ) -> "LLMProvider":
         """Create an instance from environment variables.
 
         The selection logic prefers the provider specified in `LLM_PROVIDER` and
-        falls back to whichever API key is available.
+        falls back to whichever API key is available. The remaining keyed
+        providers, in chain order, become failover targets unless
+        `LLM_FAILOVER=0`. With `LLM_ROUTER=1` every keyed provider becomes a
+        routed backend instead. `<PROVIDER>_BASE_URL` overrides an SDK's endpoint.
         """
 
-        load_dotenv()
+        load_env()
 
         dry_run = dry_override if dry_override is not None else bool(int(os.getenv("DRY_RUN", "0")))
 
@@ -89,8 +151,39 @@ class LLMProvider:
 
         model = os.getenv(f"{provider.upper()}_MODEL", cls._DEFAULT_MODELS.get(provider, ""))
 
-        config = ProviderConfig(provider=provider, model=model or "gpt-4o-mini", dry_run=dry_run)
-        return cls(config)
+        prompt_cache = os.getenv("LLM_PROMPT_CACHE", "1") != "0"
+        adaptive = os.getenv("LLM_ADAPTIVE_MAX_TOKENS", "1") != "0"
+        config = ProviderConfig(
+            provider=provider,
+            model=model or "gpt-4o-mini",
+            dry_run=dry_run,
+            base_url=os.getenv(f"{provider.upper()}_BASE_URL") or None,
+            prompt_cache=prompt_cache,
+            adaptive_max_tokens=adaptive,
+        )
+        others = [
+            ProviderConfig(
+                provider=name,
+                model=os.getenv(f"{name.upper()}_MODEL", cls._DEFAULT_MODELS.get(name, "")),
+                dry_run=dry_run,
+                base_url=os.getenv(f"{name.upper()}_BASE_URL") or None,
+                prompt_cache=prompt_cache,
+                adaptive_max_tokens=adaptive,
+            )
+            for name, key in provider_chain
+            if key and name != provider
+        ]
+
+        retry_policy = RetryPolicy.from_env()
+        if os.getenv("LLM_ROUTER", "0") != "0" and not dry_run:
+            # Backends are bare providers: the router owns failover and the cache stays on the front instance.
+            backends = [cls(backend, retry_policy=retry_policy) for backend in [config, *others]]
+            router = ProviderRouter.from_env(backends)
+            logger.info("Routing LLM calls across %s", ", ".join(router.describe()))
+            return cls(config, cache=cache, retry_policy=retry_policy, router=router)
+
+        fallbacks = others if os.getenv("LLM_FAILOVER", "1") != "0" else []
+        return cls(config, cache=cache, fallbacks=fallbacks, retry_policy=retry_policy)
 
     # ------------------------------------------------------------------
     # Public API
@@ -102,22 +195,388 @@ class LLMProvider:
         system_prompt: Optional[str] = None,
         temperature: float = 0.3,
         max_tokens: int = 1_024,
+        json_schema: Optional[Dict[str, Any]] = None,
+        output_ratio: float = 1.0,
+        min_tokens: Optional[int] = None,
     ) -> str:
-        """Generate text from the configured provider or synthetic stub."""
+        """Generate text from the configured provider or synthetic stub.
+
+        When `json_schema` is given the provider is asked for structured output
+        (OpenAI JSON schema mode, a forced Anthropic tool call, Gemini JSON
+        MIME type) and the returned text is the JSON document. `output_ratio`
+        is the expected completion size per token of the prompt's variable
+        part, used when `max_tokens` is sized to the prompt; `min_tokens`
+        overrides the smallest size it may pick, for outputs whose length
+        does not shrink with the input.
+        """
+
+        request = self._request(prompt, system_prompt, temperature, max_tokens, json_schema, output_ratio, min_tokens)
+        with telemetry.span("llm", "generate", provider=self._label, model=self.config.model):
+            key = self._cache_key(request)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
+            if self.config.dry_run:
+                return self._cache_put(key, self._mock_response(prompt, system_prompt=system_prompt))
+            if self.collector is not None and key is not None:
+                self.collector.defer(key, request)
+
+            try:
+                text = self.router.generate(request) if self.router else self._call(request)
+            except Exception as exc:
+                fallback = self._fallback_for(exc)
+                if fallback is None:
+                    raise
+                return fallback.generate(
+                    prompt,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    json_schema=json_schema,
+                    output_ratio=output_ratio,
+                    min_tokens=min_tokens,
+                )
+            return self._cache_put(key, text)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        *,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 1_024,
+        json_schema: Optional[Dict[str, Any]] = None,
+        output_ratio: float = 1.0,
+        min_tokens: Optional[int] = None,
+    ) -> str:
+        """Coroutine counterpart of `generate` backed by the async SDK clients."""
+
+        request = self._request(prompt, system_prompt, temperature, max_tokens, json_schema, output_ratio, min_tokens)
+        with telemetry.span("llm", "agenerate", provider=self._label, model=self.config.model):
+            key = self._cache_key(request)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
+            if self.config.dry_run:
+                return self._cache_put(key, self._mock_response(prompt, system_prompt=system_prompt))
+            if self.collector is not None and key is not None:
+                self.collector.defer(key, request)
+
+            try:
+                text = await (self.router.agenerate(request) if self.router else self._acall(request))
+            except Exception as exc:
+                fallback = self._fallback_for(exc)
+                if fallback is None:
+                    raise
+                return await fallback.agenerate(
+                    prompt,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    json_schema=json_schema,
+                    output_ratio=output_ratio,
+                    min_tokens=min_tokens,
+                )
+            return self._cache_put(key, text)
+
+    def stream(
+        self,
+        prompt: str,
+        *,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 1_024,
+        json_schema: Optional[Dict[str, Any]] = None,
+        output_ratio: float = 1.0,
+        min_tokens: Optional[int] = None,
+    ) -> Iterator[str]:
+        """Yield the completion as text deltas while it is generated.
+
+        Cache hits arrive as a single delta. Retries and failover apply only
+        to opening the stream. The full text is cached when the stream ends;
+        if the consumer stops early, the remainder is drained on a background
+        thread so the response is still cached.
+        """
+
+        request = self._request(prompt, system_prompt, temperature, max_tokens, json_schema, output_ratio, min_tokens)
+        # A fallback sizes its own request, so it gets the caller's budget rather than this provider's.
+        budget = {"max_tokens": max_tokens, "output_ratio": output_ratio, "min_tokens": min_tokens}
+        return telemetry.timed("llm", "stream", self._stream(request, budget), provider=self._label, model=self.config.model)
+
+    def _stream(self, request: GenerationRequest, budget: Dict[str, Any]) -> Iterator[str]:
+        prompt, system_prompt = request.prompt, request.system_prompt
+        key = self._cache_key(request)
+        cached = self._cache_get(key)
+        if cached is not None:
+            yield cached
+            return
 
         if self.config.dry_run:
-            return self._mock_response(prompt, system_prompt=system_prompt)
+            deltas = self._mock_deltas(self._mock_response(prompt, system_prompt=system_prompt))
+        else:
+            if self.collector is not None and key is not None:
+                self.collector.defer(key, request)
+            try:
+                deltas = self.router.open_stream(request) if self.router else self._open_stream_with_retries(request)
+            except Exception as exc:
+                fallback = self._fallback_for(exc)
+                if fallback is None:
+                    raise
+                yield from fallback.stream(
+                    prompt,
+                    system_prompt=system_prompt,
+                    temperature=request.temperature,
+                    json_schema=request.json_schema,
+                    **budget,
+                )
+                return
+
+        pieces: List[str] = []
+        try:
+            for delta in deltas:
+                pieces.append(delta)
+                yield delta
+        except GeneratorExit:
+            # Run in a copy of this context so usage reported by the tail still reaches the run's metrics.
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self._finish_stream, deltas, pieces, key),
+                name="stream-drain",
+                daemon=True,
+            ).start()
+            raise
+        self._cache_put(key, "".join(pieces))
+
+    async def agenerate_many(
+        self,
+        prompts: Iterable[str],
+        *,
+        concurrency: int = 8,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 1_024,
+        min_tokens: Optional[int] = None,
+    ) -> List[str]:
+        """Generate completions for many prompts with at most `concurrency` in flight.
+
+        `prompts` is consumed lazily, so a generator only materialises the
+        prompts currently in flight. Results are returned in input order. In
+        bulk mode every prompt is still queued before `DeferredRequest` is raised.
+        """
+
+        import asyncio
+
+        limit = max(1, concurrency)
+        results: Dict[int, str] = {}
+        in_flight: set = set()
+        deferred = 0
+
+        async def _one(index: int, prompt: str) -> None:
+            nonlocal deferred
+            try:
+                results[index] = await self.agenerate(
+                    prompt,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    min_tokens=min_tokens,
+                )
+            except DeferredRequest:
+                deferred += 1
+
+        async def _drain(return_when: str) -> None:
+            nonlocal in_flight
+            done, in_flight = await asyncio.wait(in_flight, return_when=return_when)
+            for task in done:
+                task.result()
+
+        try:
+            for index, prompt in enumerate(prompts):
+                if len(in_flight) >= limit:
+                    await _drain(asyncio.FIRST_COMPLETED)
+                in_flight.add(asyncio.create_task(_one(index, prompt)))
+            if in_flight:
+                await _drain(asyncio.ALL_COMPLETED)
+        finally:
+            for task in in_flight:
+                task.cancel()
+        if deferred:
+            raise DeferredRequest(f"{deferred} request(s) deferred to the batch API.")
+        return [results[index] for index in range(len(results))]
+
+    def generate_many(
+        self,
+        prompts: Iterable[str],
+        *,
+        concurrency: int = 8,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 1_024,
+        min_tokens: Optional[int] = None,
+    ) -> List[str]:
+        """Blocking wrapper around `agenerate_many` for synchronous callers.
+
+        Runs on the shared background loop so async connection pools survive
+        between calls.
+        """
+
+        return run_sync(
+            self.agenerate_many(
+                prompts,
+                concurrency=concurrency,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                min_tokens=min_tokens,
+            )
+        )
+
+    # ------------------------------------------------------------------
+    # Dispatch and failover
+    # ------------------------------------------------------------------
+    def _request(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]],
+        output_ratio: float = 1.0,
+        min_tokens: Optional[int] = None,
+    ) -> GenerationRequest:
+        if self.config.adaptive_max_tokens:
+            # A tighter budget reserves less TPM quota and bounds a runaway completion.
+            floor = COMPLETION_FLOOR if min_tokens is None else min_tokens
+            max_tokens = completion_budget(prompt, max_tokens, ratio=output_ratio, floor=floor)
+        return GenerationRequest(prompt, system_prompt, temperature, max_tokens, json_schema)
+
+    def _call(self, request: GenerationRequest) -> str:
+        """One request to this provider under its throttle, breaker and retries (no cache or failover)."""
+
+        return call_with_retries(
+            lambda: self._dispatch(request),
+            guard=guard_for(self.config.provider),
+            policy=self.retry_policy,
+            tokens=request.estimated_tokens(),
+        )
+
+    async def _acall(self, request: GenerationRequest) -> str:
+        return await acall_with_retries(
+            lambda: self._adispatch(request),
+            guard=guard_for(self.config.provider),
+            policy=self.retry_policy,
+            tokens=request.estimated_tokens(),
+        )
 
+    def _open_stream_with_retries(self, request: GenerationRequest) -> Iterator[str]:
+        return call_with_retries(
+            lambda: self._open_stream(request),
+            guard=guard_for(self.config.provider),
+            policy=self.retry_policy,
+            tokens=request.estimated_tokens(),
+        )
+
+    def _dispatch(self, request: GenerationRequest) -> str:
         provider = self.config.provider.lower()
+        client = self._get_client()
         if provider == "openai":
-            return self._generate_openai(prompt, system_prompt, temperature, max_tokens)
+            return self._openai_text(client.chat.completions.create(**self._openai_kwargs(request)))
         if provider == "anthropic":
-            return self._generate_anthropic(prompt, system_prompt, temperature, max_tokens)
+            return self._anthropic_text(client.messages.create(**self._anthropic_kwargs(request)))
         if provider == "gemini":
-            return self._generate_gemini(prompt, system_prompt, temperature, max_tokens)
+            model, content = self._gemini_call(client, request)
+            return self._gemini_text(model.generate_content(content))
+        raise RuntimeError(f"Provider '{self.config.provider}' is not supported at runtime.")
 
+    async def _adispatch(self, request: GenerationRequest) -> str:
+        provider = self.config.provider.lower()
+        client = self._get_async_client()
+        if provider == "openai":
+            return self._openai_text(await client.chat.completions.create(**self._openai_kwargs(request)))
+        if provider == "anthropic":
+            return self._anthropic_text(await client.messages.create(**self._anthropic_kwargs(request)))
+        if provider == "gemini":
+            model, content = self._gemini_call(client, request)
+            return self._gemini_text(await model.generate_content_async(content))
         raise RuntimeError(f"Provider '{self.config.provider}' is not supported at runtime.")
 
+    def _open_stream(self, request: GenerationRequest) -> Iterator[str]:
+        """Start a streaming request and return an iterator over its text deltas."""
+
+        provider = self.config.provider.lower()
+        client = self._get_client()
+        if provider == "openai":
+            return self._openai_deltas(
+                client.chat.completions.create(
+                    **self._openai_kwargs(request), stream=True, stream_options={"include_usage": True}
+                )
+            )
+        if provider == "anthropic":
+            return self._anthropic_deltas(client.messages.create(**self._anthropic_kwargs(request), stream=True))
+        if provider == "gemini":
+            model, content = self._gemini_call(client, request)
+            return self._gemini_deltas(model.generate_content(content, stream=True))
+        raise RuntimeError(f"Provider '{self.config.provider}' is not supported at runtime.")
+
+    def _finish_stream(self, deltas: Iterator[str], pieces: List[str], key: Optional[str]) -> None:
+        try:
+            pieces.extend(deltas)
+            self._cache_put(key, "".join(pieces))
+        except Exception as exc:  # noqa: BLE001 - best effort; the caller already has its answer
+            logger.debug("Could not finish abandoned stream: %s", exc)
+
+    def _fallback_for(self, exc: BaseException) -> Optional["LLMProvider"]:
+        """Return the next provider in the chain if `exc` warrants a failover."""
+
+        if not self.fallbacks or not should_failover(exc):
+            return None
+        if self._fallback is None:
+            head, *rest = self.fallbacks
+            self._fallback = LLMProvider(head, cache=self.cache, fallbacks=rest, retry_policy=self.retry_policy)
+        logger.warning(
+            "Provider '%s' unavailable (%s); failing over to '%s'.",
+            self.config.provider,
+            exc,
+            self._fallback.config.provider,
+        )
+        return self._fallback
+
+    # ------------------------------------------------------------------
+    # Response cache
+    # ------------------------------------------------------------------
+    @property
+    def _label(self) -> str:
+        # Dry-run output lives in its own namespace so it never masks live responses.
+        return "dry_run" if self.config.dry_run else self.config.provider.lower()
+
+    def _cache_key(self, request: GenerationRequest) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return cache_key(
+            provider=self._label,
+            model=self.config.model,
+            prompt=request.prompt,
+            system_prompt=request.system_prompt,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            json_schema=request.json_schema,
+        )
+
+    def _cache_get(self, key: Optional[str]) -> Optional[str]:
+        if key is None or self.cache is None:
+            return None
+        text = self.cache.get(key)
+        if text is not None:
+            telemetry.record_usage(self._label, self.config.model, 0, 0, cached=True)
+        return text
+
+    def _cache_put(self, key: Optional[str], text: str) -> str:
+        if key is not None and self.cache is not None:
+            self.cache.put(key, text, provider=self._label, model=self.config.model)
+        return text
+
     # ------------------------------------------------------------------
     # Provider initialisers
     # ------------------------------------------------------------------
@@ -131,7 +590,14 @@ class LLMProvider:
         if not key:
             raise RuntimeError("OPENAI_API_KEY is required for OpenAI provider.")
 
-        return OpenAI(api_key=key)
+        # Retries are owned by the resilience layer, not the SDK.
+        return OpenAI(
+            api_key=key,
+            base_url=self.config.base_url,
+            max_retries=0,
+            http_client=shared_client(),
+            timeout=transport_config().timeouts(),
+        )
 
     def _init_anthropic(self):
         try:
@@ -143,7 +609,13 @@ class LLMProvider:
         if not key:
             raise RuntimeError("ANTHROPIC_API_KEY is required for Anthropic provider.")
 
-        return anthropic.Anthropic(api_key=key)
+        return anthropic.Anthropic(
+            api_key=key,
+            base_url=self.config.base_url,
+            max_retries=0,
+            http_client=shared_client(),
+            timeout=transport_config().timeouts(),
+        )
 
     def _init_gemini(self):
         try:
@@ -158,68 +630,217 @@ class LLMProvider:
         genai.configure(api_key=key)
         return genai
 
+    def _init_async_client(self):
+        """Build the async SDK client for the running loop; Gemini reuses the module handle."""
+
+        provider = self.config.provider.lower()
+        shared = {
+            "base_url": self.config.base_url,
+            "max_retries": 0,
+            "http_client": shared_async_client(),
+            "timeout": transport_config().timeouts(),
+        }
+        if provider == "openai":
+            from openai import AsyncOpenAI
+
+            return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), **shared)
+        if provider == "anthropic":
+            import anthropic
+
+            return anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), **shared)
+        return self._get_client()
+
+    def _get_client(self):
+        """Import the selected SDK and build its client on first use."""
+
+        if self._client is None:
+            with self._client_lock, _SDK_IMPORT_LOCK:
+                if self._client is None:
+                    provider = self.config.provider.lower()
+                    if provider == "openai":
+                        self._client = self._init_openai()
+                    elif provider == "anthropic":
+                        self._client = self._init_anthropic()
+                    else:
+                        self._client = self._init_gemini()
+        return self._client
+
+    def _get_async_client(self):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            self._get_client()  # validates the key and imports the SDK once
+            with self._client_lock:
+                client = self._async_clients.get(loop)
+                if client is None:
+                    client = self._async_clients[loop] = self._init_async_client()
+        return client
+
     # ------------------------------------------------------------------
-    # Per-provider generation
+    # Per-provider request building and response reading
     # ------------------------------------------------------------------
-    def _generate_openai(
-        self,
-        prompt: str,
-        system_prompt: Optional[str],
-        temperature: float,
-        max_tokens: int,
-    ) -> str:
+    def _openai_kwargs(self, request: GenerationRequest) -> Dict[str, Any]:
+        # OpenAI caches prompt prefixes automatically; the system prompt and the
+        # template instructions already lead, so only a routing hint is added.
         messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
+        if request.system_prompt:
+            messages.append({"role": "system", "content": request.system_prompt})
+        messages.append({"role": "user", "content": request.prompt})
+        stable, _ = split_prompt(request.prompt)
 
-        response = self._client.chat.completions.create(
-            model=self.config.model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
+        kwargs: Dict[str, Any] = {
+            "model": self.config.model,
+            "messages": messages,
+            "temperature": request.temperature,
+            "max_tokens": request.max_tokens,
+        }
+        if request.json_schema is not None:
+            kwargs["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": STRUCTURED_OUTPUT_NAME, "schema": request.json_schema},
+            }
+        if self.config.prompt_cache and stable:
+            # Requests sharing a key are routed to the same cache shard.
+            prefix = (request.system_prompt or "") + stable
+            kwargs["extra_body"] = {"prompt_cache_key": hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:32]}
+        return kwargs
+
+    def _openai_text(self, response: Any) -> str:
+        self._record_openai_usage(getattr(response, "usage", None))
         return response.choices[0].message.content.strip()
 
-    def _generate_anthropic(
-        self,
-        prompt: str,
-        system_prompt: Optional[str],
-        temperature: float,
-        max_tokens: int,
-    ) -> str:
+    def _openai_deltas(self, response: Iterable[Any]) -> Iterator[str]:
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            # With `include_usage` the final chunk carries the totals and no choices.
+            self._record_openai_usage(getattr(chunk, "usage", None))
+
+    def _record_openai_usage(self, usage: Any) -> None:
+        if usage is not None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            # SDKs that predate the field keep it as a plain dict.
+            cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", 0)
+            self._record_usage(usage.prompt_tokens, usage.completion_tokens, cached or 0)
+
+    def _anthropic_kwargs(self, request: GenerationRequest) -> Dict[str, Any]:
+        # Anthropic caches up to an explicit `cache_control` breakpoint. The
+        # cached prefix is tools (the schema), then system, then messages, so
+        # one breakpoint after the stable instructions covers all three.
+        cache = {"cache_control": {"type": "ephemeral"}} if self.config.prompt_cache else {}
+        stable, variable = split_prompt(request.prompt)
+        if stable and cache:
+            content: Any = [{"type": "text", "text": stable, **cache}]
+            if variable:
+                content.append({"type": "text", "text": variable})
+        else:
+            content = request.prompt
         kwargs: Dict[str, Any] = {
             "model": self.config.model,
-            "max_tokens": max_tokens,
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": temperature,
+            "max_tokens": request.max_tokens,
+            "messages": [{"role": "user", "content": content}],
+            "temperature": request.temperature,
         }
-        if system_prompt:
-            kwargs["system"] = system_prompt
-
-        response = self._client.messages.create(**kwargs)
+        if request.system_prompt:
+            if cache and not stable:
+                kwargs["system"] = [{"type": "text", "text": request.system_prompt, **cache}]
+            else:
+                kwargs["system"] = request.system_prompt
+        if request.json_schema is not None:
+            kwargs["tools"] = [
+                {
+                    "name": STRUCTURED_OUTPUT_NAME,
+                    "description": "Record the structured result.",
+                    "input_schema": request.json_schema,
+                }
+            ]
+            kwargs["tool_choice"] = {"type": "tool", "name": STRUCTURED_OUTPUT_NAME}
+        return kwargs
+
+    def _anthropic_text(self, response: Any) -> str:
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            prompt_tokens, cached = self._anthropic_prompt_tokens(usage)
+            self._record_usage(prompt_tokens, usage.output_tokens, cached)
+        tool_inputs = [block.input for block in response.content if getattr(block, "type", None) == "tool_use"]
+        if tool_inputs:
+            return json.dumps(tool_inputs[0])
         text_blocks = [block.text for block in response.content if hasattr(block, "text")]
         return "\n".join(text_blocks).strip()
 
-    def _generate_gemini(
-        self,
-        prompt: str,
-        system_prompt: Optional[str],
-        temperature: float,
-        max_tokens: int,
-    ) -> str:
-        genai = self._client
-        generation_config = genai.types.GenerationConfig(
-            temperature=temperature,
-            max_output_tokens=max_tokens,
-        )
-        model = genai.GenerativeModel(self.config.model, generation_config=generation_config)
-        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
-        response = model.generate_content(full_prompt)
+    def _anthropic_deltas(self, events: Iterable[Any]) -> Iterator[str]:
+        # Tool-use input streams as partial JSON; plain replies as text deltas.
+        prompt_tokens = cached = 0
+        for event in events:
+            if event.type == "message_start":
+                prompt_tokens, cached = self._anthropic_prompt_tokens(event.message.usage)
+            elif event.type == "message_delta":
+                self._record_usage(prompt_tokens, getattr(event.usage, "output_tokens", 0), cached)
+            if event.type != "content_block_delta":
+                continue
+            delta = event.delta
+            if delta.type == "text_delta":
+                yield delta.text
+            elif delta.type == "input_json_delta":
+                yield delta.partial_json
+
+    @staticmethod
+    def _anthropic_prompt_tokens(usage: Any) -> Tuple[int, int]:
+        """`(prompt tokens, cache reads)`; Anthropic reports cache reads and writes apart from `input_tokens`."""
+
+        cached = getattr(usage, "cache_read_input_tokens", 0) or 0
+        written = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        return (getattr(usage, "input_tokens", 0) or 0) + cached + written, cached
+
+    def _gemini_call(self, genai: Any, request: GenerationRequest) -> Tuple[Any, str]:
+        json_mode = request.json_schema is not None
+        key = (self.config.model, request.temperature, request.max_tokens, json_mode)
+        model = self._gemini_models.get(key)
+        if model is None:
+            config: Dict[str, Any] = {"temperature": request.temperature, "max_output_tokens": request.max_tokens}
+            if json_mode:
+                config["response_mime_type"] = "application/json"
+            generation_config = genai.types.GenerationConfig(**config)
+            model = genai.GenerativeModel(self.config.model, generation_config=generation_config)
+            # Handles are immutable once built, so sharing them across threads is safe.
+            self._gemini_models[key] = model
+        prompt = request.prompt
+        return model, f"{request.system_prompt}\n\n{prompt}" if request.system_prompt else prompt
+
+    def _gemini_text(self, response: Any) -> str:
+        self._record_gemini_usage(getattr(response, "usage_metadata", None))
         if not response.text:
             raise RuntimeError("Gemini response was empty.")
         return response.text.strip()
 
+    def _gemini_deltas(self, response: Iterable[Any]) -> Iterator[str]:
+        usage = None
+        for chunk in response:
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if chunk.text:
+                yield chunk.text
+        # Every chunk repeats the running totals; the last one is final.
+        self._record_gemini_usage(usage)
+
+    def _record_gemini_usage(self, usage: Any) -> None:
+        if usage is not None:
+            self._record_usage(
+                getattr(usage, "prompt_token_count", 0),
+                getattr(usage, "candidates_token_count", 0),
+                getattr(usage, "cached_content_token_count", 0),
+            )
+
+    def _record_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int], cached: Optional[int] = 0) -> None:
+        telemetry.record_usage(
+            self.config.provider.lower(),
+            self.config.model,
+            prompt_tokens or 0,
+            completion_tokens or 0,
+            cached_prompt_tokens=cached or 0,
+        )
+
     # ------------------------------------------------------------------
     # Dry-run helper
     # ------------------------------------------------------------------
@@ -240,4 +861,12 @@ class LLMProvider:
             "This is a demonstration response generated in DRY_RUN mode. "
             "Replace it with live LLM output by providing an API key."
         )
-        return f"{body}\n\n{bulleted}"
+        text = f"{body}\n\n{bulleted}"
+        telemetry.record_usage("dry_run", self.config.model, estimate_tokens(seed), estimate_tokens(text))
+        return text
+
+    @staticmethod
+    def _mock_deltas(text: str) -> Iterator[str]:
+        """Split mock output into word-sized deltas, like a live stream."""
+
+        yield from re.findall(r"\S+\s*|\s+", text)
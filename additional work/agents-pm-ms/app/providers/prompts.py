@@ -0,0 +1,36 @@
+"""Prompts that carry a cacheable stable prefix.
+
+Providers bill (and, with prompt caching, skip) the part of a prompt they have
+seen before. A `Prompt` is an ordinary string that also remembers how many of
+its leading characters are the same on every call: the template instructions
+and output schema, before any transcript text. Request builders use that to
+mark the prefix for Anthropic prompt caching; since the prefix comes first,
+OpenAI's automatic prefix caching matches it as well. Everything else, such
+as the response cache key and dry-run output, just sees the string.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+
+class Prompt(str):
+    """A prompt string whose first `stable` characters never change between calls."""
+
+    stable: int
+
+    def __new__(cls, stable: str, variable: str = "") -> "Prompt":
+        prompt = super().__new__(cls, stable + variable)
+        prompt.stable = len(stable)
+        return prompt
+
+    def __reduce__(self):  # keep the split when pickled (e.g. to batch workers)
+        return Prompt, (self[: self.stable], self[self.stable :])
+
+
+def split_prompt(prompt: str) -> Tuple[str, str]:
+    """Return `(stable prefix, variable rest)`; plain strings have no stable prefix."""
+
+    if isinstance(prompt, Prompt) and prompt.stable:
+        return prompt[: prompt.stable], prompt[prompt.stable :]
+    return "", prompt
@@ -0,0 +1,387 @@
+"""Retry, throttling and circuit-breaking shared by every LLM provider.
+
+The helpers only look at the status code and headers carried by an exception
+(`exc.status_code` or `exc.response`), which is what the OpenAI and Anthropic
+SDKs raise and what `httpx.HTTPStatusError` exposes. That keeps the layer
+provider-agnostic and lets it be exercised against any local HTTP server.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "ConnectError",
+    "ReadTimeout",
+    "ConnectTimeout",
+    "RemoteProtocolError",
+    "ServiceUnavailable",
+    "ResourceExhausted",
+    "DeadlineExceeded",
+    "InternalServerError",
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a provider's circuit breaker is rejecting calls."""
+
+
+# ---------------------------------------------------------------------------
+# Error classification
+# ---------------------------------------------------------------------------
+
+
+def status_code_of(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return status
+    code = getattr(exc, "code", None)  # google.api_core errors
+    return int(code) if isinstance(code, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Return True for rate limits, server errors and transport failures."""
+
+    status = status_code_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(exc).__mro__)
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Read `retry-after-ms` / `retry-after` from the error's HTTP response."""
+
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Retry policy
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter, deferring to Retry-After when sent."""
+
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    max_retry_after: float = 120.0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=max(1, int(os.getenv("LLM_MAX_RETRIES", "3")) + 1),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "30")),
+        )
+
+    def delay_for(self, attempt: int, exc: BaseException) -> float:
+        hinted = retry_after_seconds(exc)
+        if hinted is not None:
+            return min(hinted, self.max_retry_after)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+# ---------------------------------------------------------------------------
+# Throttling
+# ---------------------------------------------------------------------------
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out waits instead of sleeping itself.
+
+    `reserve` always succeeds and may drive the balance negative; the returned
+    delay is how long the caller must wait before its reservation is covered.
+    That lets sync callers `time.sleep` and async callers `asyncio.sleep`.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float) -> None:
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, limit: float) -> "TokenBucket":
+        return cls(capacity=limit, refill_per_second=limit / 60.0)
+
+    def reserve(self, amount: float = 1.0) -> float:
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_per_second
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets for one provider."""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None) -> None:
+        self.requests = TokenBucket.per_minute(rpm) if rpm else None
+        self.tokens = TokenBucket.per_minute(tpm) if tpm else None
+
+    def reserve(self, tokens: int) -> float:
+        delays = [0.0]
+        if self.requests is not None:
+            delays.append(self.requests.reserve(1))
+        if self.tokens is not None:
+            delays.append(self.tokens.reserve(tokens))
+        return max(delays)
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+
+class CircuitBreaker:
+    """Classic closed → open → half-open breaker keyed on consecutive failures.
+
+    While half-open a single probe call is let through; everyone else is
+    turned away until it succeeds (closing the circuit) or fails (opening it
+    again). A probe that never reports back frees its slot after `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def _probe_free(self) -> bool:
+        return self._probe_at is None or time.monotonic() - self._probe_at >= self.reset_timeout
+
+    def allow(self) -> bool:
+        """Admit a call; while half-open this takes the single probe slot."""
+
+        with self._lock:
+            state = self._state()
+            if state != "half-open":
+                return state == "closed"
+            if not self._probe_free():
+                return False
+            self._probe_at = time.monotonic()
+            return True
+
+    def available(self) -> bool:
+        """Whether `allow` would admit a call now, without taking the probe slot (for routing)."""
+
+        with self._lock:
+            state = self._state()
+            return state == "closed" or (state == "half-open" and self._probe_free())
+
+    def release(self) -> None:
+        """Free the probe slot after a call that says nothing about the provider's health."""
+
+        with self._lock:
+            self._probe_at = None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state() == "half-open" or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probe_at = None
+
+
+# ---------------------------------------------------------------------------
+# Per-provider guards
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class ProviderGuard:
+    name: str
+    limiter: RateLimiter
+    breaker: CircuitBreaker
+
+
+_GUARDS: Dict[str, ProviderGuard] = {}
+_GUARDS_LOCK = threading.Lock()
+
+
+def guard_for(name: str) -> ProviderGuard:
+    """Return the process-wide guard for a provider so every worker shares quotas."""
+
+    name = name.lower()
+    with _GUARDS_LOCK:
+        guard = _GUARDS.get(name)
+        if guard is None:
+            prefix = name.upper()
+            rpm = os.getenv(f"{prefix}_RPM")
+            tpm = os.getenv(f"{prefix}_TPM")
+            guard = ProviderGuard(
+                name=name,
+                limiter=RateLimiter(rpm=float(rpm) if rpm else None, tpm=float(tpm) if tpm else None),
+                breaker=CircuitBreaker(
+                    failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+                    reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30")),
+                ),
+            )
+            _GUARDS[name] = guard
+        return guard
+
+
+# ---------------------------------------------------------------------------
+# Call wrappers
+# ---------------------------------------------------------------------------
+
+
+def call_with_retries(
+    fn: Callable[[], T],
+    *,
+    guard: ProviderGuard,
+    policy: RetryPolicy,
+    tokens: int,
+) -> T:
+    """Run `fn` under the guard's throttle and breaker, retrying transient errors."""
+
+    for attempt in range(policy.max_attempts):
+        if not guard.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for provider '{guard.name}'.")
+        wait = guard.limiter.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        try:
+            result = fn()
+        except Exception as exc:
+            if not is_retryable(exc):
+                guard.breaker.release()
+                raise
+            guard.breaker.record_failure()
+            if attempt + 1 >= policy.max_attempts:
+                raise
+            delay = policy.delay_for(attempt, exc)
+            logger.warning(
+                "%s call failed (%s); retry %s/%s in %.2fs",
+                guard.name, _describe(exc), attempt + 1, policy.max_attempts - 1, delay,
+            )
+            time.sleep(delay)
+        except BaseException:
+            # Interrupted: no verdict on the provider.
+            guard.breaker.release()
+            raise
+        else:
+            guard.breaker.record_success()
+            return result
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+async def acall_with_retries(
+    fn: Callable[[], Awaitable[T]],
+    *,
+    guard: ProviderGuard,
+    policy: RetryPolicy,
+    tokens: int,
+) -> T:
+    """Async twin of `call_with_retries` that never blocks the event loop."""
+
+    import asyncio
+
+    for attempt in range(policy.max_attempts):
+        if not guard.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for provider '{guard.name}'.")
+        wait = guard.limiter.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        try:
+            result = await fn()
+        except Exception as exc:
+            if not is_retryable(exc):
+                guard.breaker.release()
+                raise
+            guard.breaker.record_failure()
+            if attempt + 1 >= policy.max_attempts:
+                raise
+            delay = policy.delay_for(attempt, exc)
+            logger.warning(
+                "%s call failed (%s); retry %s/%s in %.2fs",
+                guard.name, _describe(exc), attempt + 1, policy.max_attempts - 1, delay,
+            )
+            await asyncio.sleep(delay)
+        except BaseException:
+            # Cancelled (e.g. the losing side of a hedge): no verdict on the provider.
+            guard.breaker.release()
+            raise
+        else:
+            guard.breaker.record_success()
+            return result
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+def should_failover(exc: BaseException) -> bool:
+    return isinstance(exc, CircuitOpenError) or is_retryable(exc)
+
+
+def _describe(exc: Any) -> str:
+    status = status_code_of(exc)
+    return f"HTTP {status}" if status is not None else type(exc).__name__
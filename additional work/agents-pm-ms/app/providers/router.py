@@ -0,0 +1,338 @@
+"""Latency-aware routing across the configured LLM backends.
+
+With `LLM_ROUTER=1`, `LLMProvider.from_env` builds one backend per provider
+with an API key and hands requests to a `ProviderRouter` instead of the
+static primary-plus-failover chain. For every call the router:
+
+- ranks the backends by the rolling latency of comparable requests (same
+  `max_tokens` size class), penalized by their recent error rate. Backends
+  whose circuit is open, or whose estimated cost for the call exceeds
+  `LLM_ROUTER_MAX_COST`, are skipped. Unmeasured backends go first, and a
+  small share of calls explores the others so the ranking stays current;
+- with `LLM_HEDGE=1`, sends a duplicate request to the runner-up once the
+  first has been in flight for longer than its p95 latency. Whichever
+  answers first wins and the other request is cancelled. Plain requests run
+  on the shared event loop, so cancelling closes the loser's HTTP request.
+  Streams race to their first delta, and the losing stream is closed as
+  soon as it opens;
+- fails over down the ranking when a backend's retries are exhausted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from . import telemetry
+from .resilience import guard_for, should_failover
+from .tokens import estimate_tokens
+from .transport import run_sync
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .llm import GenerationRequest, LLMProvider
+
+logger = logging.getLogger(__name__)
+
+# Share of calls sent to a random backend other than the best one.
+EXPLORE_RATE = 0.05
+# Completed calls needed before a profile's p95 is trusted as a hedge delay.
+MIN_HEDGE_SAMPLES = 8
+
+
+class LatencyProfile:
+    """Rolling latency and error rate for one backend and request size class."""
+
+    def __init__(self, alpha: float = 0.2, window: int = 200) -> None:
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+        self.error_rate = 0.0
+        self.samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: Optional[float], ok: bool) -> None:
+        with self._lock:
+            self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+            if seconds is not None:
+                self.samples.append(seconds)
+                self.ewma = seconds if self.ewma is None else self.ewma + self.alpha * (seconds - self.ewma)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            ordered = sorted(self.samples)
+        if len(ordered) < MIN_HEDGE_SAMPLES:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def score(self) -> float:
+        """Expected seconds per call, with failures counted as costly; 0 until measured."""
+
+        if self.ewma is None:
+            return 0.0
+        return self.ewma * (1.0 + 4.0 * self.error_rate)
+
+
+class ProviderRouter:
+    """Picks, hedges and fails over between `LLMProvider` backends (see the module docstring)."""
+
+    def __init__(
+        self,
+        backends: List["LLMProvider"],
+        *,
+        max_cost: Optional[float] = None,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 0.5,
+    ) -> None:
+        if not backends:
+            raise ValueError("ProviderRouter needs at least one backend.")
+        self.backends = list(backends)
+        self.max_cost = max_cost
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self._profiles: Dict[Tuple[str, int, bool], LatencyProfile] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, backends: List["LLMProvider"]) -> "ProviderRouter":
+        max_cost = os.getenv("LLM_ROUTER_MAX_COST")
+        return cls(
+            backends,
+            max_cost=float(max_cost) if max_cost else None,
+            hedge=os.getenv("LLM_HEDGE", "0") != "0",
+            hedge_quantile=float(os.getenv("LLM_HEDGE_QUANTILE", "0.95")),
+            hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5")),
+        )
+
+    def describe(self) -> List[str]:
+        return [f"{backend.config.provider}:{backend.config.model}" for backend in self.backends]
+
+    # ------------------------------------------------------------------
+    # Ranking
+    # ------------------------------------------------------------------
+    def profile(self, backend: "LLMProvider", request: "GenerationRequest", *, stream: bool = False) -> LatencyProfile:
+        """The profile for calls like `request`; stream profiles hold time to first delta."""
+
+        # Latency mostly follows output length, so requests are compared within a max_tokens class.
+        key = (f"{backend.config.provider}:{backend.config.model}", request.max_tokens.bit_length(), stream)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = self._profiles[key] = LatencyProfile()
+            return profile
+
+    def rank(self, request: "GenerationRequest", *, stream: bool = False) -> List["LLMProvider"]:
+        """Backends to try for `request`, best first."""
+
+        healthy = [backend for backend in self.backends if guard_for(backend.config.provider).breaker.available()]
+        candidates = healthy or list(self.backends)
+        if self.max_cost is not None:
+            costs = {id(backend): self._estimated_cost(backend, request) for backend in candidates}
+            affordable = [backend for backend in candidates if costs[id(backend)] is None or costs[id(backend)] <= self.max_cost]
+            if affordable:
+                candidates = affordable
+            else:
+                cheapest = min(candidates, key=lambda backend: costs[id(backend)])
+                logger.warning(
+                    "No backend fits LLM_ROUTER_MAX_COST=%s for this call; using the cheapest (%s).",
+                    self.max_cost,
+                    cheapest.config.model,
+                )
+                candidates = [cheapest]
+        # `sorted` is stable, so ties (e.g. all unmeasured) keep the configured provider order.
+        ranked = sorted(candidates, key=lambda backend: self.profile(backend, request, stream=stream).score())
+        if len(ranked) > 1 and random.random() < EXPLORE_RATE:
+            ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+        return ranked
+
+    @staticmethod
+    def _estimated_cost(backend: "LLMProvider", request: "GenerationRequest") -> Optional[float]:
+        prompt_tokens = estimate_tokens((request.system_prompt or "") + request.prompt)
+        return telemetry.estimate_cost(
+            backend.config.model, prompt_tokens, request.max_tokens, provider=backend.config.provider
+        )
+
+    # ------------------------------------------------------------------
+    # Calls
+    # ------------------------------------------------------------------
+    def generate(self, request: "GenerationRequest") -> str:
+        """Blocking call; runs `agenerate` on the shared event loop so a hedge loser can be cancelled."""
+
+        return run_sync(self.agenerate(request))
+
+    async def agenerate(self, request: "GenerationRequest") -> str:
+        ranked = self.rank(request)
+        error: Optional[BaseException] = None
+        for index, backend in enumerate(ranked):
+            try:
+                return await self._hedged(backend, self._runner_up(ranked, index), request)
+            except Exception as exc:
+                error = self._failover(exc, ranked, index)
+        assert error is not None
+        raise error
+
+    def open_stream(self, request: "GenerationRequest") -> Iterator[str]:
+        """Open a stream on the best backend, hedging on the time to its first delta."""
+
+        ranked = self.rank(request, stream=True)
+        error: Optional[BaseException] = None
+        for index, backend in enumerate(ranked):
+            try:
+                return self._hedged_stream(backend, self._runner_up(ranked, index), request)
+            except Exception as exc:
+                error = self._failover(exc, ranked, index)
+        assert error is not None
+        raise error
+
+    @staticmethod
+    def _runner_up(ranked: List["LLMProvider"], index: int) -> "LLMProvider":
+        # With a single backend the hedge goes to the same provider, which usually lands on another replica.
+        return ranked[index + 1] if index + 1 < len(ranked) else ranked[index]
+
+    @staticmethod
+    def _failover(exc: Exception, ranked: List["LLMProvider"], index: int) -> Exception:
+        if not should_failover(exc):
+            raise exc
+        if index + 1 < len(ranked):
+            logger.warning(
+                "Backend '%s' failed (%s); routing to '%s'.",
+                ranked[index].config.provider,
+                exc,
+                ranked[index + 1].config.provider,
+            )
+        return exc
+
+    # ------------------------------------------------------------------
+    # Hedging
+    # ------------------------------------------------------------------
+    def _hedge_delay(self, profile: LatencyProfile) -> Optional[float]:
+        if not self.hedge:
+            return None
+        quantile = profile.quantile(self.hedge_quantile)
+        return None if quantile is None else max(self.hedge_min_delay, quantile)
+
+    def _log_hedge(self, primary: "LLMProvider", runner_up: "LLMProvider", delay: float) -> None:
+        logger.info(
+            "'%s' slower than its p%.0f (%.2fs); hedging with '%s'.",
+            primary.config.provider,
+            self.hedge_quantile * 100,
+            delay,
+            runner_up.config.provider,
+        )
+        telemetry.record_count("llm_hedged_requests", 1)
+
+    async def _hedged(self, primary: "LLMProvider", runner_up: "LLMProvider", request: "GenerationRequest") -> str:
+        loop = asyncio.get_running_loop()
+        delay = self._hedge_delay(self.profile(primary, request))
+        first = asyncio.ensure_future(self._timed(primary, request, loop))
+        if delay is None:
+            return await first
+
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        self._log_hedge(primary, runner_up, delay)
+        second = asyncio.ensure_future(self._timed(runner_up, request, loop, hedge=True))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            telemetry.record_count("llm_hedge_wins", 1)
+                        return task.result()
+            # Both failed: surface the original request's error.
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _timed(
+        self, backend: "LLMProvider", request: "GenerationRequest", loop: Any, *, hedge: bool = False
+    ) -> str:
+        profile = self.profile(backend, request)
+        started = loop.time()
+        attrs = {"provider": backend.config.provider, "model": backend.config.model, "hedge": hedge}
+        try:
+            with telemetry.span("router", "call", **attrs):
+                text = await backend._acall(request)
+        except asyncio.CancelledError:
+            # A cancelled loser took at least this long; that is still a useful (lower-bound) sample.
+            profile.observe(loop.time() - started, ok=True)
+            raise
+        except Exception:
+            profile.observe(None, ok=False)
+            raise
+        profile.observe(loop.time() - started, ok=True)
+        return text
+
+    def _hedged_stream(
+        self, primary: "LLMProvider", runner_up: "LLMProvider", request: "GenerationRequest"
+    ) -> Iterator[str]:
+        """Like `_hedged` for streams: the race is to the first delta, and the losing stream is closed."""
+
+        delay = self._hedge_delay(self.profile(primary, request, stream=True))
+        if delay is None:
+            deltas, first = self._first_delta(primary, request)
+            return chain([first], deltas)
+
+        pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+        try:
+            futures = [pool.submit(contextvars.copy_context().run, self._first_delta, primary, request)]
+            done, _ = wait(futures, timeout=delay)
+            if not done:
+                self._log_hedge(primary, runner_up, delay)
+                futures.append(pool.submit(contextvars.copy_context().run, self._first_delta, runner_up, request, True))
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                winner = next((future for future in futures if future in done and future.exception() is None), None)
+                if winner is not None:
+                    for future in pending:
+                        # Worker threads cannot be interrupted; close the losing stream once it opens.
+                        future.add_done_callback(_close_stream)
+                    if winner is not futures[0]:
+                        telemetry.record_count("llm_hedge_wins", 1)
+                    deltas, first = winner.result()
+                    return chain([first], deltas)
+            deltas, first = futures[0].result()  # both failed: raises the original request's error
+            return chain([first], deltas)
+        finally:
+            pool.shutdown(wait=False)
+
+    def _first_delta(
+        self, backend: "LLMProvider", request: "GenerationRequest", hedge: bool = False
+    ) -> Tuple[Iterator[str], str]:
+        """Open a stream on `backend` and read its first delta, recording the time to first token."""
+
+        profile = self.profile(backend, request, stream=True)
+        started = time.monotonic()
+        attrs = {"provider": backend.config.provider, "model": backend.config.model, "hedge": hedge}
+        try:
+            with telemetry.span("router", "first_delta", **attrs):
+                deltas = backend._open_stream_with_retries(request)
+                first = next(deltas, "")
+        except Exception:
+            profile.observe(None, ok=False)
+            raise
+        profile.observe(time.monotonic() - started, ok=True)
+        return deltas, first
+
+
+def _close_stream(future: Future) -> None:
+    if future.exception() is None:
+        deltas, _ = future.result()
+        close = getattr(deltas, "close", None)
+        if close is not None:
+            close()
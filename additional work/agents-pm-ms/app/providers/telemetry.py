@@ -0,0 +1,451 @@
+"""Opt-in spans, token usage and cost accounting for pipeline runs.
+
+Nothing is recorded unless a `RunMetrics` is active for the current context
+(`with collect(RunMetrics()):`). Without one, `span()` returns a shared no-op
+object and `record_usage()` returns immediately, so the instrumentation
+costs one context-variable lookup per call site.
+
+Spans are kept as a flat list with parent ids (a trace of one run) and are
+folded into latency histograms per `(kind, name)`. `MetricsRegistry` adds
+finished runs together for long-running processes and renders Prometheus
+text.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds, Prometheus style; the implicit last bucket is +Inf.
+BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# USD per million (prompt, completion) tokens; `LLM_PRICES` adds or overrides
+# entries as JSON, e.g. '{"gpt-4o-mini": [0.15, 0.6]}'. Model names match by
+# longest prefix, so dated snapshots inherit their family's price.
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "claude-3-5-haiku": (0.80, 4.00),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+
+# Share of the prompt price charged for prompt tokens served from the
+# provider's prefix cache (cache writes are billed as ordinary prompt tokens).
+CACHED_PROMPT_RATIO: Dict[str, float] = {"openai": 0.5, "anthropic": 0.1, "gemini": 0.25}
+
+# Share of the normal price charged for requests sent through a provider batch API.
+BATCH_PRICE_RATIO = 0.5
+
+_PRICES: Optional[Dict[str, Tuple[float, float]]] = None
+
+
+def prices() -> Dict[str, Tuple[float, float]]:
+    global _PRICES
+    if _PRICES is None:
+        table = dict(DEFAULT_PRICES)
+        for model, (prompt, completion) in json.loads(os.getenv("LLM_PRICES") or "{}").items():
+            table[model] = (float(prompt), float(completion))
+        _PRICES = table
+    return _PRICES
+
+
+def estimate_cost(
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    *,
+    cached_prompt_tokens: int = 0,
+    provider: str = "",
+    batch: bool = False,
+) -> Optional[float]:
+    """Return the USD cost of one call, or None for an unpriced model.
+
+    `cached_prompt_tokens` are the part of `prompt_tokens` read from the
+    provider's prompt cache; they are billed at `CACHED_PROMPT_RATIO`.
+    Batch API calls cost `BATCH_PRICE_RATIO` of the total.
+    """
+
+    matches = [name for name in prices() if model.startswith(name)]
+    if not matches:
+        return None
+    prompt_price, completion_price = prices()[max(matches, key=len)]
+    cached = min(cached_prompt_tokens, prompt_tokens)
+    prompt_cost = (prompt_tokens - cached) * prompt_price + cached * prompt_price * CACHED_PROMPT_RATIO.get(provider, 1.0)
+    cost = (prompt_cost + completion_tokens * completion_price) / 1_000_000
+    return cost * BATCH_PRICE_RATIO if batch else cost
+
+
+# ---------------------------------------------------------------------------
+# Aggregates
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Histogram:
+    counts: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+    total: float = 0.0
+    count: int = 0
+
+    def observe(self, seconds: float) -> None:
+        index = next((i for i, bound in enumerate(BUCKETS) if seconds <= bound), len(BUCKETS))
+        self.counts[index] += 1
+        self.total += seconds
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.count += other.count
+
+    def as_dict(self) -> Dict[str, Any]:
+        bounds = [str(bound) for bound in BUCKETS] + ["+Inf"]
+        return {"count": self.count, "sum": round(self.total, 6), "buckets": dict(zip(bounds, self.counts))}
+
+
+@dataclass
+class Usage:
+    calls: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    # Part of `prompt_tokens` served from the provider's prompt (prefix) cache.
+    cached_prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    # Calls made against models missing from the price table.
+    unpriced_calls: int = 0
+
+    def merge(self, other: "Usage") -> None:
+        self.calls += other.calls
+        self.cache_hits += other.cache_hits
+        self.prompt_tokens += other.prompt_tokens
+        self.cached_prompt_tokens += other.cached_prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cost_usd += other.cost_usd
+        self.unpriced_calls += other.unpriced_calls
+
+
+@dataclass
+class Span:
+    id: int
+    parent: Optional[int]
+    kind: str
+    name: str
+    start: float
+    seconds: float = 0.0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "parent": self.parent,
+            "kind": self.kind,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "seconds": round(self.seconds, 6),
+            **({"attrs": self.attrs} if self.attrs else {}),
+        }
+
+
+class RunMetrics:
+    """Spans, latency histograms and token usage collected during one run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._next_id = 0
+        self.started = time.time()
+        self.seconds = 0.0
+        self.spans: List[Span] = []
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.usage: Dict[Tuple[str, str], Usage] = {}
+        # Named totals such as `transcript_tokens_saved`.
+        self.counters: Dict[str, float] = {}
+
+    def _open(self, kind: str, name: str, attrs: Dict[str, Any]) -> Span:
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        return Span(span_id, _parent.get(), kind, name, time.perf_counter() - self._origin, attrs=attrs)
+
+    def _close(self, span: Span) -> None:
+        span.seconds = time.perf_counter() - self._origin - span.start
+        with self._lock:
+            self.spans.append(span)
+            self.histograms.setdefault((span.kind, span.name), Histogram()).observe(span.seconds)
+            self.seconds = max(self.seconds, span.start + span.seconds)
+
+    def add_usage(
+        self,
+        provider: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached: bool,
+        cached_prompt_tokens: int = 0,
+        batch: bool = False,
+    ) -> None:
+        cost = None
+        if not cached and provider != "dry_run":
+            cost = estimate_cost(
+                model,
+                prompt_tokens,
+                completion_tokens,
+                cached_prompt_tokens=cached_prompt_tokens,
+                provider=provider,
+                batch=batch,
+            )
+        with self._lock:
+            usage = self.usage.setdefault((provider, model), Usage())
+            usage.calls += 1
+            if cached:
+                usage.cache_hits += 1
+                return
+            usage.prompt_tokens += prompt_tokens
+            usage.cached_prompt_tokens += cached_prompt_tokens
+            usage.completion_tokens += completion_tokens
+            if cost is not None:
+                usage.cost_usd += cost
+            elif provider != "dry_run":
+                usage.unpriced_calls += 1
+
+    def add_count(self, name: str, value: float) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            usages = list(self.usage.values())
+            counters = dict(self.counters)
+        return {
+            "seconds": round(self.seconds, 4),
+            "llm_calls": sum(u.calls for u in usages),
+            "cache_hits": sum(u.cache_hits for u in usages),
+            "prompt_tokens": sum(u.prompt_tokens for u in usages),
+            "cached_prompt_tokens": sum(u.cached_prompt_tokens for u in usages),
+            "completion_tokens": sum(u.completion_tokens for u in usages),
+            "cost_usd": round(sum(u.cost_usd for u in usages), 6),
+            **counters,
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+            histograms = dict(self.histograms)
+            usage = dict(self.usage)
+        return {
+            "started": self.started,
+            "summary": self.summary(),
+            "usage": [
+                {"provider": provider, "model": model, **vars(value), "cost_usd": round(value.cost_usd, 6)}
+                for (provider, model), value in sorted(usage.items())
+            ],
+            "latency": [
+                {"kind": kind, "name": name, **histogram.as_dict()}
+                for (kind, name), histogram in sorted(histograms.items())
+            ],
+            "spans": [span.as_dict() for span in spans],
+        }
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.as_dict(), indent=2) + "\n", encoding="utf-8")
+
+
+class MetricsRegistry:
+    """Process-wide totals over finished runs, rendered as Prometheus text."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.usage: Dict[Tuple[str, str], Usage] = {}
+        self.counters: Dict[str, float] = {}
+
+    def add(self, run: RunMetrics) -> None:
+        with run._lock:
+            histograms = list(run.histograms.items())
+            usage = list(run.usage.items())
+            counters = list(run.counters.items())
+        with self._lock:
+            self.runs += 1
+            for name, value in counters:
+                self.counters[name] = self.counters.get(name, 0) + value
+            for key, histogram in histograms:
+                self.histograms.setdefault(key, Histogram()).merge(histogram)
+            for key, value in usage:
+                self.usage.setdefault(key, Usage()).merge(value)
+
+    def prometheus(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP pipeline_runs_total Pipeline runs finished.",
+                "# TYPE pipeline_runs_total counter",
+                f"pipeline_runs_total {self.runs}",
+                "# HELP pipeline_span_seconds Latency of agents, LLM calls, template renders and file writes.",
+                "# TYPE pipeline_span_seconds histogram",
+            ]
+            for (kind, name), histogram in sorted(self.histograms.items()):
+                labels = f'kind="{_escape(kind)}",name="{_escape(name)}"'
+                cumulative = 0
+                for bound, count in zip([str(b) for b in BUCKETS] + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'pipeline_span_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"pipeline_span_seconds_sum{{{labels}}} {histogram.total:.6f}")
+                lines.append(f"pipeline_span_seconds_count{{{labels}}} {histogram.count}")
+
+            counters = [
+                ("llm_calls_total", "LLM calls, including cache hits.", "calls"),
+                ("llm_cache_hits_total", "LLM calls answered by the response cache.", "cache_hits"),
+                ("llm_prompt_tokens_total", "Prompt tokens reported by the provider.", "prompt_tokens"),
+                ("llm_cached_prompt_tokens_total", "Prompt tokens served from the provider's prompt cache.", "cached_prompt_tokens"),
+                ("llm_completion_tokens_total", "Completion tokens reported by the provider.", "completion_tokens"),
+                ("llm_cost_usd_total", "Estimated spend from the price table.", "cost_usd"),
+            ]
+            for metric, help_text, attr in counters:
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                for (provider, model), usage in sorted(self.usage.items()):
+                    value = getattr(usage, attr)
+                    labels = f'provider="{_escape(provider)}",model="{_escape(model)}"'
+                    lines.append(f"{metric}{{{labels}}} {value:.6f}" if isinstance(value, float) else f"{metric}{{{labels}}} {value}")
+            for name, value in sorted(self.counters.items()):
+                metric = f"pipeline_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# ---------------------------------------------------------------------------
+# Recording API
+# ---------------------------------------------------------------------------
+
+_run: ContextVar[Optional[RunMetrics]] = ContextVar("run_metrics", default=None)
+_parent: ContextVar[Optional[int]] = ContextVar("span_parent", default=None)
+
+
+class _ActiveSpan:
+    __slots__ = ("_run", "_span", "_token")
+
+    def __init__(self, run: RunMetrics, kind: str, name: str, attrs: Dict[str, Any]) -> None:
+        self._run = run
+        self._span = run._open(kind, name, attrs)
+        self._token: Any = None
+
+    def set(self, **attrs: Any) -> None:
+        self._span.attrs.update(attrs)
+
+    def __enter__(self) -> "_ActiveSpan":
+        self._token = _parent.set(self._span.id)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        _parent.reset(self._token)
+        if exc_type is not None:
+            self._span.attrs["error"] = exc_type.__name__
+        self._run._close(self._span)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def current() -> Optional[RunMetrics]:
+    return _run.get()
+
+
+class collect:
+    """Make `run` the active collector for this context; `None` keeps telemetry off."""
+
+    def __init__(self, run: Optional[RunMetrics]) -> None:
+        self.run = run
+        self._tokens: Any = None
+
+    def __enter__(self) -> Optional[RunMetrics]:
+        if self.run is not None:
+            self._tokens = (_run.set(self.run), _parent.set(None))
+        return self.run
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if self._tokens is not None:
+            _run.reset(self._tokens[0])
+            _parent.reset(self._tokens[1])
+
+
+def span(kind: str, name: str, **attrs: Any) -> Any:
+    """Time a block as a child of the enclosing span; a no-op when not collecting."""
+
+    run = _run.get()
+    if run is None:
+        return _NULL_SPAN
+    return _ActiveSpan(run, kind, name, attrs)
+
+
+def timed(kind: str, name: str, iterator: Iterator[Any], **attrs: Any) -> Iterator[Any]:
+    """Yield from `iterator`, recording a span from first to last item.
+
+    The span is not made current, so work the consumer does between items is
+    not attributed to it.
+    """
+
+    run = _run.get()
+    if run is None:
+        yield from iterator
+        return
+    recorded = run._open(kind, name, attrs)
+    try:
+        yield from iterator
+    finally:
+        run._close(recorded)
+
+
+def record_usage(
+    provider: str,
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    *,
+    cached: bool = False,
+    cached_prompt_tokens: int = 0,
+    batch: bool = False,
+) -> None:
+    run = _run.get()
+    if run is not None:
+        run.add_usage(
+            provider,
+            model,
+            int(prompt_tokens or 0),
+            int(completion_tokens or 0),
+            cached,
+            int(cached_prompt_tokens or 0),
+            batch,
+        )
+
+
+def record_count(name: str, value: float) -> None:
+    """Add `value` to the run's named counter (reported in the summary and as `pipeline_<name>_total`)."""
+
+    run = _run.get()
+    if run is not None:
+        run.add_count(name, value)
@@ -0,0 +1,34 @@
+"""Token estimation helpers shared by the provider layer and the agents."""
+
+from __future__ import annotations
+
+from .prompts import split_prompt
+
+# Roughly four characters per token for English prose across the supported
+# model families; good enough for budgeting without shipping a tokenizer.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Return a cheap, conservative token estimate for `text`."""
+
+    if not text:
+        return 0
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+# Smallest completion budget `completion_budget` hands out by default; callers
+# whose output has a fixed shape (the structured notes) pass their own floor.
+COMPLETION_FLOOR = 512
+
+
+def completion_budget(prompt: str, ceiling: int, *, ratio: float = 1.0, floor: int = COMPLETION_FLOOR) -> int:
+    """A `max_tokens` for `prompt` that grows with its variable part, between `floor` and `ceiling`.
+
+    Summaries are shorter than what they summarize, so the transcript (or
+    partial notes) in the prompt bounds the useful output. The fixed
+    instructions of a `Prompt` are left out of the estimate.
+    """
+
+    _, variable = split_prompt(prompt)
+    return max(min(floor, ceiling), min(ceiling, int(estimate_tokens(variable) * ratio)))
@@ -0,0 +1,148 @@
+"""Process-wide pooled HTTP transport shared by the provider SDKs.
+
+The OpenAI and Anthropic SDKs accept an `http_client`. Handing them the same
+keep-alive pool (HTTP/2 when the `h2` package is installed) lets every
+provider instance, fallback chain and worker thread reuse TCP/TLS connections
+instead of each SDK client opening its own.
+
+Async clients are bound to the event loop they were created on, so they are
+kept per loop. `run_sync` executes coroutines on one long-lived background
+loop, so repeated `generate_many` calls keep reusing the same async pool; the
+caller's context variables (e.g. the active run metrics) travel with them. All
+state is re-created after a fork so process-pool workers never share sockets
+with their parent.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import importlib.util
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    max_connections: int = 100
+    max_keepalive: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = 60.0
+    connect_timeout: float = 10.0
+    http2: bool = True
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        return cls(
+            max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30")),
+            timeout=float(os.getenv("LLM_HTTP_TIMEOUT", "60")),
+            connect_timeout=float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "10")),
+            http2=os.getenv("LLM_HTTP2", "1") != "0",
+        )
+
+    @property
+    def use_http2(self) -> bool:
+        return self.http2 and importlib.util.find_spec("h2") is not None
+
+    def timeouts(self) -> Any:
+        import httpx
+
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        import httpx
+
+        return {
+            "http2": self.use_http2,
+            "timeout": self.timeouts(),
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        }
+
+
+_lock = threading.Lock()
+_pid: Optional[int] = None
+_config: Optional[TransportConfig] = None
+_client: Any = None
+_async_clients: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+_loop: Any = None
+
+
+def _reset_after_fork() -> None:
+    """Drop state inherited from a parent process; the caller holds `_lock`."""
+
+    global _pid, _client, _async_clients, _loop
+    if _pid != os.getpid():
+        _pid = os.getpid()
+        _client = None
+        _async_clients = weakref.WeakKeyDictionary()
+        _loop = None
+
+
+def transport_config() -> TransportConfig:
+    global _config
+    if _config is None:
+        _config = TransportConfig.from_env()
+    return _config
+
+
+def shared_client() -> Any:
+    """Return the process-wide `httpx.Client`."""
+
+    global _client
+    with _lock:
+        _reset_after_fork()
+        if _client is None:
+            import httpx
+
+            _client = httpx.Client(**transport_config().client_kwargs())
+        return _client
+
+
+def shared_async_client() -> Any:
+    """Return the `httpx.AsyncClient` for the running event loop."""
+
+    import asyncio
+
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    with _lock:
+        _reset_after_fork()
+        client = _async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(**transport_config().client_kwargs())
+            _async_clients[loop] = client
+        return client
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run `coro` on the shared background event loop and wait for its result."""
+
+    import asyncio
+
+    global _loop
+    with _lock:
+        _reset_after_fork()
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-loop", daemon=True).start()
+        loop = _loop
+    context = contextvars.copy_context()
+    return asyncio.run_coroutine_threadsafe(_in_context(context, coro), loop).result()
+
+
+async def _in_context(context: contextvars.Context, coro: Awaitable[T]) -> T:
+    # The loop thread has its own context; replay the caller's values into this task's copy.
+    for var, value in context.items():
+        var.set(value)
+    return await coro
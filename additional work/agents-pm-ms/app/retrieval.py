@@ -0,0 +1,757 @@
+"""On-disk BM25 index over earlier meetings, used to ground the notes prompt.
+
+Recurring meetings keep returning to earlier decisions, risks and owners.
+With `--index` (or `RETRIEVAL_INDEX`), each run adds its transcript to the
+index in passages of about `PASSAGE_TOKENS`, plus its decisions, open
+questions, risks and action items. Before the final notes call, the
+meeting's own signals are used as the query: the decisions, risks,
+questions and action lines found by the classifier. The best snippets from
+earlier meetings are appended to the prompt: at most `RETRIEVAL_TOP_K`,
+within `RETRIEVAL_TOKENS`, and from the same project when one is set.
+
+The index directory holds:
+
+- `index.sqlite3`: meetings, snippet texts, and the term dictionary. The
+  dictionary maps each term to a slice of a segment's postings.
+- `docs.bin`: one fixed-size record per snippet (meeting, generation,
+  length in terms), memory-mapped at query time.
+- `seg-<n>.post`: (snippet, term frequency) int32 pairs grouped by term,
+  also memory-mapped at query time.
+
+Adding a meeting appends one segment. Re-adding a changed meeting bumps its
+generation, which retires its earlier snippets in the same transaction.
+Segments are merged log-structured: once `MERGE_FACTOR` segments of one
+size tier pile up at the tail, they become one segment and retired postings
+are dropped. A query therefore reads a few dozen slices whatever the number
+of meetings. NumPy is imported on first use, so only runs with an index
+need it.
+
+Usage:
+    python app/retrieval.py add --project apollo archive/*.txt
+    python app/retrieval.py search --project apollo "vendor contract sign-off risk"
+    python app/retrieval.py stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ingest import TranscriptDigest, iter_chunks
+from models import ActionItem, MeetingSummary
+from providers import Prompt, estimate_tokens
+from providers import telemetry
+from providers.prompts import split_prompt
+from providers.tokens import CHARS_PER_TOKEN
+from store import normalize_tokens
+from templating import default_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = Path.home() / ".local" / "share" / "agents-pm-ms" / "index"
+
+# Transcript passages are packed from whole turns up to this many tokens.
+PASSAGE_TOKENS = 120
+# Tail segments of one size tier merged together.
+MERGE_FACTOR = 8
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    held_on TEXT NOT NULL,
+    generation INTEGER NOT NULL DEFAULT 0,
+    docs INTEGER NOT NULL DEFAULT 0,
+    length INTEGER NOT NULL DEFAULT 0,
+    added_at REAL NOT NULL,
+    UNIQUE (project, name)
+);
+CREATE INDEX IF NOT EXISTS meetings_held_on ON meetings (project, held_on);
+
+CREATE TABLE IF NOT EXISTS snippets (
+    id INTEGER PRIMARY KEY,  -- record number in docs.bin
+    meeting INTEGER NOT NULL REFERENCES meetings(id),
+    kind TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snippets_meeting ON snippets (meeting);
+
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- never reused, so a merge cannot overwrite a file it removes
+    postings INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term, segment)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS terms_segment ON terms (segment);
+
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats (name, value) VALUES ('docs', 0), ('live_docs', 0), ('live_length', 0);
+"""
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError("The retrieval index needs numpy (pip install numpy).") from exc
+    return numpy
+
+
+def _doc_dtype(np: Any) -> Any:
+    return np.dtype([("meeting", "<i4"), ("generation", "<i4"), ("length", "<i4")])
+
+
+def tokenize(text: str) -> List[str]:
+    """Index terms of `text`: the project store's normalised words, minus single characters."""
+
+    return [token for token in normalize_tokens(text) if len(token) > 1]
+
+
+def meeting_date(meeting: str) -> str:
+    """The ISO date in a meeting name, else today (as in the project store)."""
+
+    dated = _ISO_DATE.search(meeting)
+    return dated.group(0) if dated else date.today().isoformat()
+
+
+@dataclass
+class Hit:
+    meeting: str
+    held_on: str
+    kind: str
+    text: str
+    score: float
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+
+class RetrievalIndex:
+    """Segmented, memory-mapped BM25 index of meeting snippets (see the module docstring)."""
+
+    def __init__(self, path: Path, *, merge_factor: int = MERGE_FACTOR) -> None:
+        self.path = Path(path)
+        self.merge_factor = max(2, merge_factor)
+        self._lock = threading.Lock()
+        self._maps: Dict[int, Any] = {}
+        self._docs: Any = None
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._docs_path = self.path / "docs.bin"
+        self._conn = sqlite3.connect(str(self.path / "index.sqlite3"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls, path: Optional[Path] = None) -> "RetrievalIndex":
+        """Open the index at `path`, `RETRIEVAL_INDEX` or the default location."""
+
+        return cls(Path(path or os.getenv("RETRIEVAL_INDEX") or DEFAULT_INDEX_PATH))
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """One write transaction; `BEGIN IMMEDIATE` serialises writers across processes."""
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    def add(
+        self,
+        project: str,
+        meeting: str,
+        source: str,
+        snippets: Sequence[Tuple[str, str]],
+        *,
+        held_on: Optional[str] = None,
+    ) -> bool:
+        """Index a meeting's `(kind, text)` snippets; returns False if `source` is already indexed.
+
+        A meeting indexed before with another source (an edited transcript)
+        is replaced.
+        """
+
+        np = _numpy()
+        held_on = held_on or meeting_date(meeting)
+        tokenized = [(kind, text, tokenize(text)) for kind, text in snippets]
+        tokenized = [entry for entry in tokenized if entry[2]]
+        with self._writing():
+            row = self._conn.execute(
+                "SELECT id, source, docs, length FROM meetings WHERE project = ? AND name = ?", (project, meeting)
+            ).fetchone()
+            if row is not None and row[1] == source:
+                logger.info("Meeting %s is already indexed.", meeting)
+                return False
+            length = sum(len(tokens) for _, _, tokens in tokenized)
+            if row is None:
+                meeting_id = self._conn.execute(
+                    """
+                    INSERT INTO meetings (project, name, source, held_on, docs, length, added_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (project, meeting, source, held_on, len(tokenized), length, time.time()),
+                ).lastrowid
+                generation = 0
+                self._bump_stats(len(tokenized), length)
+            else:
+                # A new generation retires every snippet of the old one; merges drop their postings.
+                meeting_id = row[0]
+                self._conn.execute(
+                    """
+                    UPDATE meetings SET source = ?, held_on = ?, generation = generation + 1, docs = ?, length = ?,
+                        added_at = ? WHERE id = ?
+                    """,
+                    (source, held_on, len(tokenized), length, time.time(), meeting_id),
+                )
+                self._conn.execute("DELETE FROM snippets WHERE meeting = ?", (meeting_id,))
+                generation = self._conn.execute("SELECT generation FROM meetings WHERE id = ?", (meeting_id,)).fetchone()[0]
+                self._bump_stats(len(tokenized) - row[2], length - row[3])
+
+            first = self._stat("docs")
+            records = np.zeros(len(tokenized), dtype=_doc_dtype(np))
+            records["meeting"] = meeting_id
+            records["generation"] = generation
+            records["length"] = [len(tokens) for _, _, tokens in tokenized]
+            with self._docs_path.open("ab") as handle:
+                # Drop records a crashed writer appended but never committed.
+                handle.truncate(first * records.itemsize)
+                handle.write(records.tobytes())
+            self._conn.executemany(
+                "INSERT INTO snippets (id, meeting, kind, text) VALUES (?, ?, ?, ?)",
+                [(first + offset, meeting_id, kind, text) for offset, (kind, text, _) in enumerate(tokenized)],
+            )
+            self._conn.execute("UPDATE stats SET value = ? WHERE name = 'docs'", (first + len(tokenized),))
+
+            postings: Dict[str, List[Tuple[int, int]]] = {}
+            for offset, (_, _, tokens) in enumerate(tokenized):
+                for term, count in Counter(tokens).items():
+                    postings.setdefault(term, []).append((first + offset, count))
+            if postings:
+                terms = sorted(postings)
+                pairs = np.array([pair for term in terms for pair in postings[term]], dtype="<i4")
+                self._write_segment(terms, [len(postings[term]) for term in terms], pairs)
+        logger.info("Indexed meeting %s (%s snippet(s))", meeting, len(tokenized))
+        self._merge_tail()
+        return True
+
+    def _stat(self, name: str) -> int:
+        return self._conn.execute("SELECT value FROM stats WHERE name = ?", (name,)).fetchone()[0]
+
+    def _bump_stats(self, docs: int, length: int) -> None:
+        self._conn.execute("UPDATE stats SET value = value + ? WHERE name = 'live_docs'", (docs,))
+        self._conn.execute("UPDATE stats SET value = value + ? WHERE name = 'live_length'", (length,))
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.path / f"seg-{segment:06d}.post"
+
+    def _write_segment(self, terms: List[str], counts: List[int], pairs: Any) -> int:
+        """Write `pairs` (grouped by `terms`) as a new segment inside the current transaction."""
+
+        segment = self._conn.execute("INSERT INTO segments (postings) VALUES (?)", (len(pairs),)).lastrowid
+        path = self._segment_path(segment)
+        tmp = path.with_name(path.name + ".tmp")
+        pairs.astype("<i4").tofile(tmp)
+        os.replace(tmp, path)
+        starts = [0] * len(counts)
+        for index in range(1, len(counts)):
+            starts[index] = starts[index - 1] + counts[index - 1]
+        self._conn.executemany(
+            "INSERT INTO terms (term, segment, start, count) VALUES (?, ?, ?, ?)",
+            [(term, segment, int(start), int(count)) for term, start, count in zip(terms, starts, counts)],
+        )
+        return segment
+
+    def _merge_tail(self) -> None:
+        """Merge the newest segments while `merge_factor` of them share a size tier."""
+
+        while True:
+            with self._lock:
+                rows = self._conn.execute("SELECT id, postings FROM segments ORDER BY id").fetchall()
+            tail = []
+            for segment, postings in reversed(rows):
+                if tail and self._tier(postings) != self._tier(rows[-1][1]):
+                    break
+                tail.append(segment)
+            if len(tail) < self.merge_factor:
+                return
+            self.merge(tail)
+
+    def _tier(self, postings: int) -> int:
+        return int(math.log(max(postings, 1), self.merge_factor))
+
+    def merge(self, segments: Optional[Sequence[int]] = None) -> None:
+        """Merge `segments` (default: all) into one, dropping postings of retired snippets."""
+
+        np = _numpy()
+        with self._writing():
+            if segments is None:
+                segments = [row[0] for row in self._conn.execute("SELECT id FROM segments ORDER BY id")]
+            segments = sorted(segments)
+            if not segments or (len(segments) < 2 and not self._has_retired()):
+                return
+            placeholders = ",".join("?" * len(segments))
+            rows = self._conn.execute(
+                f"SELECT term, segment, count FROM terms WHERE segment IN ({placeholders}) ORDER BY segment, start",
+                segments,
+            ).fetchall()
+            # Global term order across the segments being merged.
+            vocabulary = sorted({row[0] for row in rows})
+            term_ids = {term: index for index, term in enumerate(vocabulary)}
+            by_segment: Dict[int, List[Tuple[int, int]]] = {segment: [] for segment in segments}
+            for term, segment, count in rows:
+                by_segment[segment].append((term_ids[term], count))
+            pairs, owners = [], []
+            for segment in segments:
+                ids, counts = zip(*by_segment[segment]) if by_segment[segment] else ((), ())
+                pairs.append(np.fromfile(self._segment_path(segment), dtype="<i4").reshape(-1, 2))
+                owners.append(np.repeat(np.array(ids, dtype=np.int64), np.array(counts, dtype=np.int64)))
+            merged = np.concatenate(pairs)
+            term_of = np.concatenate(owners)
+
+            keep = self._live_mask(merged[:, 0])
+            merged, term_of = merged[keep], term_of[keep]
+            order = np.argsort(term_of, kind="stable")
+            merged, term_of = merged[order], term_of[order]
+            counts = np.bincount(term_of, minlength=len(vocabulary))
+            present = np.nonzero(counts)[0]
+
+            self._conn.execute(f"DELETE FROM terms WHERE segment IN ({placeholders})", segments)
+            self._conn.execute(f"DELETE FROM segments WHERE id IN ({placeholders})", segments)
+            if len(merged):
+                self._write_segment([vocabulary[i] for i in present], [int(counts[i]) for i in present], merged)
+        for segment in segments:
+            self._maps.pop(segment, None)
+            self._segment_path(segment).unlink(missing_ok=True)
+        logger.info("Merged %s segment(s) into one (%s postings kept)", len(segments), len(merged))
+
+    def _has_retired(self) -> bool:
+        live = self._stat("live_docs")
+        return live != self._stat("docs")
+
+    def _live_mask(self, doc_ids: Any) -> Any:
+        """True for snippets whose meeting is still on the generation they were written with."""
+
+        np = _numpy()
+        docs = self._doc_records()
+        generations = dict(self._conn.execute("SELECT id, generation FROM meetings"))
+        current = np.full(max(generations, default=0) + 1, -1, dtype=np.int64)
+        current[list(generations)] = list(generations.values())
+        records = docs[doc_ids]
+        return current[records["meeting"]] == records["generation"]
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def _doc_records(self) -> Any:
+        """`docs.bin` as a memory-mapped record array, re-mapped once it has grown."""
+
+        np = _numpy()
+        count = self._stat("docs")
+        if self._docs is None or len(self._docs) < count:
+            if count:
+                # A plain ndarray view of the mapping; memmap slicing adds per-call overhead.
+                self._docs = np.memmap(self._docs_path, dtype=_doc_dtype(np), mode="r", shape=(count,)).view(np.ndarray)
+            else:
+                self._docs = np.zeros(0, dtype=_doc_dtype(np))
+        return self._docs[:count]
+
+    def _segment(self, segment: int) -> Any:
+        data = self._maps.get(segment)
+        if data is None:
+            np = _numpy()
+            mapped = np.memmap(self._segment_path(segment), dtype="<i4", mode="r")
+            data = self._maps[segment] = mapped.view(np.ndarray).reshape(-1, 2)
+        return data
+
+    def search(
+        self,
+        text: str,
+        *,
+        project: Optional[str] = None,
+        exclude: Optional[str] = None,
+        before: Optional[str] = None,
+        k: int = 6,
+        per_meeting: int = 2,
+        max_terms: int = 48,
+    ) -> List[Hit]:
+        """The `k` best BM25 matches for `text`, at most `per_meeting` from any one meeting.
+
+        Only meetings of `project` (all when None), held on or before
+        `before`, and not named `exclude` are searched. The query keeps its
+        `max_terms` most distinctive terms.
+        """
+
+        query = Counter(tokenize(text))
+        if not query or k <= 0:
+            return []
+        with self._lock:
+            try:
+                return self._search(query, project, exclude, before, k, per_meeting, max_terms)
+            except FileNotFoundError:
+                # A concurrent merge removed a segment this query had looked up; read the new layout.
+                self._maps.clear()
+                return self._search(query, project, exclude, before, k, per_meeting, max_terms)
+
+    def _search(
+        self,
+        query: Counter,
+        project: Optional[str],
+        exclude: Optional[str],
+        before: Optional[str],
+        k: int,
+        per_meeting: int,
+        max_terms: int,
+    ) -> List[Hit]:
+        np = _numpy()
+        conn = self._conn
+        conn.execute("BEGIN")  # one snapshot for the dictionary, stats and snippets
+        try:
+            live_docs, live_length = self._stat("live_docs"), self._stat("live_length")
+            if live_docs <= 0:
+                return []
+            terms = list(query)
+            rows: List[Tuple[str, int, int, int]] = []
+            for start in range(0, len(terms), 500):
+                part = terms[start : start + 500]
+                rows += conn.execute(
+                    f"SELECT term, segment, start, count FROM terms WHERE term IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+            if not rows:
+                return []
+
+            # Document frequency counts retired postings until their segment is merged; close enough for idf.
+            frequency: Counter = Counter()
+            for term, _, _, count in rows:
+                frequency[term] += count
+            idf = {term: math.log(1 + (live_docs - df + 0.5) / (df + 0.5)) for term, df in frequency.items()}
+            weight = {term: idf[term] * (1 + math.log(query[term])) for term in idf}
+            chosen = set(sorted(weight, key=weight.get, reverse=True)[:max_terms])
+
+            clauses, params = ["held_on <= ?"], [before or "9999-12-31"]
+            if project is not None:
+                clauses.append("project = ?")
+                params.append(project)
+            if exclude is not None:
+                clauses.append("name != ?")
+                params.append(exclude)
+            allowed = conn.execute(f"SELECT id, generation FROM meetings WHERE {' AND '.join(clauses)}", params).fetchall()
+            if not allowed:
+                return []
+
+            # Per-snippet arrays are dense (a few bytes per snippet), so postings are scored by plain gathers.
+            docs = self._doc_records()
+            newest = conn.execute("SELECT MAX(id) FROM meetings").fetchone()[0]
+            current = np.full(newest + 1, -1, dtype=np.int32)
+            current[[row[0] for row in allowed]] = [row[1] for row in allowed]
+            searchable = current[docs["meeting"]] == docs["generation"]
+            norm = (K1 * (1 - B + B * docs["length"] * (live_docs / live_length))).astype(np.float32)
+
+            selected = [row for row in rows if row[0] in chosen]
+            postings = np.concatenate([self._segment(segment)[start : start + count] for _, segment, start, count in selected])
+            term_weight = np.repeat(
+                np.array([weight[row[0]] for row in selected], dtype=np.float32), [row[3] for row in selected]
+            )
+            doc_ids = postings[:, 0]
+            tf = postings[:, 1].astype(np.float32)
+            contributions = term_weight * tf * (K1 + 1) / (tf + norm[doc_ids])
+            totals = np.bincount(doc_ids, weights=contributions, minlength=len(docs))
+            totals[~searchable] = 0.0
+            matched = np.count_nonzero(totals)
+            if not matched:
+                return []
+            # Enough candidates to still fill `k` after the per-meeting cap.
+            wanted = min(matched, k * max(per_meeting, 1) * 4)
+            top = np.argpartition(-totals, wanted - 1)[:wanted]
+            top = top[np.argsort(-totals[top], kind="stable")]
+            candidates = [(int(doc), float(totals[doc])) for doc in top]
+
+            found = {
+                row[0]: row[1:]
+                for row in conn.execute(
+                    f"""
+                    SELECT s.id, s.kind, s.text, m.name, m.held_on FROM snippets s JOIN meetings m ON m.id = s.meeting
+                    WHERE s.id IN ({','.join('?' * len(candidates))})
+                    """,
+                    [doc for doc, _ in candidates],
+                )
+            }
+        finally:
+            conn.commit()
+
+        hits: List[Hit] = []
+        per: Counter = Counter()
+        for doc, score in candidates:
+            if doc not in found:
+                continue
+            kind, text, meeting, held_on = found[doc]
+            if per[meeting] >= per_meeting:
+                continue
+            per[meeting] += 1
+            hits.append(Hit(meeting, held_on, kind, text, round(score, 4)))
+            if len(hits) == k:
+                break
+        return hits
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            meetings = self._conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+            segments = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(postings), 0) FROM segments").fetchone()
+            terms = self._conn.execute("SELECT COUNT(DISTINCT term) FROM terms").fetchone()[0]
+            stats = dict(self._conn.execute("SELECT name, value FROM stats"))
+        size = sum(path.stat().st_size for path in self.path.iterdir() if path.is_file())
+        return {
+            "meetings": meetings,
+            "snippets": stats["live_docs"],
+            "retired_snippets": stats["docs"] - stats["live_docs"],
+            "terms": terms,
+            "segments": segments[0],
+            "postings": segments[1],
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._maps.clear()
+            self._docs = None
+            self._conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Notes stage integration
+# ---------------------------------------------------------------------------
+
+
+def meeting_snippets(
+    lines: Iterable[str],
+    summary: Optional[MeetingSummary] = None,
+    actions: Iterable[ActionItem] = (),
+) -> List[Tuple[str, str]]:
+    """`(kind, text)` snippets for a meeting: transcript passages, then its notes."""
+
+    snippets = [("transcript", passage) for passage in iter_chunks(lines, PASSAGE_TOKENS) if passage.strip()]
+    if summary is not None:
+        snippets += [("decision", text) for text in summary.decisions]
+        snippets += [("question", text) for text in summary.questions]
+        snippets += [("risk", text) for text in summary.risks]
+    for item in actions:
+        due = f", due {item.due_date}" if item.due_date else ""
+        snippets.append(("action", f"{item.title} (owner {item.owner or 'Unassigned'}{due})"))
+    return snippets
+
+
+def query_text(digest: TranscriptDigest) -> str:
+    """The current meeting's signals, as a retrieval query."""
+
+    found = digest.found
+    parts = [*found.decisions, *found.risks, *found.questions, *found.bullets]
+    parts += [f"{item.title} {item.owner}" for item in digest.actions]
+    if len(tokenize(" ".join(parts))) < 8:
+        parts += digest.excerpt
+    return "\n".join(parts)
+
+
+def format_snippets(hits: Sequence[Hit], budget: int) -> str:
+    """Bullet lines for `hits`, best first, trimmed to about `budget` tokens in total."""
+
+    lines: List[str] = []
+    used = 0
+    for hit in hits:
+        label = f"[{hit.held_on} {hit.meeting}, {hit.kind}]"
+        text = " ".join(hit.text.split())
+        room = budget - used - estimate_tokens(label) - 2
+        if room < 16:
+            continue
+        if estimate_tokens(text) > room:
+            text = text[: room * CHARS_PER_TOKEN].rsplit(" ", 1)[0] + " …"
+        line = f"- {label} {text}"
+        lines.append(line)
+        used += estimate_tokens(line) + 1
+    return "\n".join(lines)
+
+
+class MeetingHistory:
+    """Retrieval step of the notes stage: grounds the prompt in earlier meetings, then indexes this one."""
+
+    def __init__(
+        self,
+        index: RetrievalIndex,
+        project: Optional[str] = None,
+        *,
+        top_k: int = 6,
+        token_budget: int = 600,
+    ) -> None:
+        self.index = index
+        self.project = project
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.template_path = Path(__file__).parent / "agents" / "notes_context.md"
+
+    @classmethod
+    def from_env(cls, index: RetrievalIndex, project: Optional[str] = None) -> "MeetingHistory":
+        return cls(
+            index,
+            project,
+            top_k=int(os.getenv("RETRIEVAL_TOP_K", "6")),
+            token_budget=int(os.getenv("RETRIEVAL_TOKENS", "600")),
+        )
+
+    def fingerprint_inputs(self) -> Dict[str, Any]:
+        """Settings that shape the grounded prompt.
+
+        The index contents are left out on purpose: every run grows the
+        index, and notes built with the context of their day stay valid
+        (`--force` rebuilds them against the current index).
+        """
+
+        return {
+            "index": str(self.index.path),
+            "project": self.project,
+            "top_k": self.top_k,
+            "tokens": self.token_budget,
+            "template": self.template_path,
+        }
+
+    def ground(self, prompt: str, meeting: str, digest: TranscriptDigest) -> str:
+        """`prompt` with the most relevant earlier snippets appended after its variable part."""
+
+        with telemetry.span("retrieval", "search"):
+            hits = self.index.search(
+                query_text(digest),
+                project=self.project,
+                exclude=meeting,
+                before=meeting_date(meeting),
+                k=self.top_k,
+            )
+        snippets = format_snippets(hits, self.token_budget)
+        if not snippets:
+            logger.info("No earlier meetings relevant to %s in the index", meeting)
+            return prompt
+        telemetry.record_count("retrieved_snippets", snippets.count("\n") + 1)
+        logger.info("Grounding notes in %s snippet(s) from earlier meetings", snippets.count("\n") + 1)
+        context = default_registry().render(self.template_path, snippets=snippets)
+        stable, variable = split_prompt(prompt)
+        return Prompt(stable, f"{variable.rstrip()}\n\n{context.rstrip()}\n")
+
+    def remember(
+        self,
+        meeting: str,
+        source: str,
+        lines: Iterable[str],
+        summary: MeetingSummary,
+        actions: List[ActionItem],
+    ) -> bool:
+        with telemetry.span("retrieval", "add"):
+            return self.index.add(self.project or "", meeting, source, meeting_snippets(lines, summary, actions))
+
+
+# ---------------------------------------------------------------------------
+# CLI entry point
+# ---------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build and query the retrieval index over past meetings.")
+    parser.add_argument("--index", type=Path, default=None, help="Index directory (defaults to RETRIEVAL_INDEX).")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Index transcripts (with the decisions, risks and actions the classifier finds).")
+    add.add_argument("--project", default=os.getenv("PROJECT_NAME") or "")
+    add.add_argument("paths", nargs="+", type=Path, help="Transcript files or folders of *.txt transcripts.")
+
+    search = commands.add_parser("search", help="Show the snippets a query retrieves.")
+    search.add_argument("query")
+    search.add_argument("--project", default=os.getenv("PROJECT_NAME") or None)
+    search.add_argument("-k", type=int, default=6)
+
+    commands.add_parser("stats", help="Meetings, snippets, segments and size on disk.")
+    commands.add_parser("compact", help="Merge every segment into one and drop retired snippets.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    from classifier import TranscriptClassifier, Vocabulary
+    from ingest import TranscriptSource
+    from manifest import file_digest
+    from providers import load_env
+
+    load_env()
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    index = RetrievalIndex.from_env(args.index)
+    try:
+        if args.command == "add":
+            classifier = TranscriptClassifier(Vocabulary.from_env())
+            files = [p for path in args.paths for p in (sorted(path.glob("*.txt")) if path.is_dir() else [path])]
+            added = 0
+            for path in files:
+                source = TranscriptSource(path)
+                digest = TranscriptDigest(classifier).consume(source.lines())
+                found = digest.found
+                summary = MeetingSummary(found.bullets, found.decisions, found.questions, found.risks, "")
+                snippets = meeting_snippets(source.lines(), summary, digest.actions)
+                added += index.add(args.project, path.stem, file_digest(path), snippets)
+            print(f"Indexed {added} of {len(files)} transcript(s).")
+            return 0
+        if args.command == "search":
+            started = time.perf_counter()
+            hits = index.search(args.query, project=args.project, k=args.k)
+            elapsed = (time.perf_counter() - started) * 1000
+            if args.json:
+                print(json.dumps([asdict(hit) for hit in hits], indent=2))
+            else:
+                for hit in hits:
+                    print(f"{hit.score:7.3f}  {hit.held_on}  {hit.meeting}  [{hit.kind}] {' '.join(hit.text.split())[:160]}")
+                print(f"{len(hits)} hit(s) in {elapsed:.1f} ms")
+            return 0
+        if args.command == "compact":
+            index.merge()
+        stats = index.stats()
+        print(json.dumps(stats, indent=2) if args.json or args.command == "stats" else "Compacted.")
+        return 0
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
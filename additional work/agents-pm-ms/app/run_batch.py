@@ -0,0 +1,354 @@
+"""Batch entry point that runs the Supervisor over many transcripts at once.
+
+Interpreter startup, dotenv loading and SDK client construction are paid once
+per worker instead of once per meeting. Each transcript gets its own output
+subfolder and a summary report is written when the batch finishes.
+
+With `--bulk` the LLM requests are first answered through the provider batch
+APIs at batch prices (see `bulk.py`); the run then renders from the cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from pipeline import PipelineError
+from providers import LLMProvider, ResponseCache, load_env
+from run_supervisor import Supervisor, add_cache_arguments, build_cache, ensure_outdir, setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Job model
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class BatchJob:
+    name: str
+    transcript: Path
+    outdir: Path
+
+
+@dataclass
+class BatchResult:
+    name: str
+    transcript: str
+    outdir: str
+    status: str
+    seconds: float
+    error: Optional[str] = None
+    stages: Dict[str, dict] = field(default_factory=dict)
+
+
+# ---------------------------------------------------------------------------
+# Transcript discovery
+# ---------------------------------------------------------------------------
+
+
+def discover_transcripts(source: str, pattern: str = "*.txt") -> List[Path]:
+    """Expand a directory or glob expression into a sorted list of transcripts."""
+
+    path = Path(source)
+    if path.is_dir():
+        return sorted(p for p in path.glob(pattern) if p.is_file())
+    return sorted(Path(p) for p in glob.glob(source, recursive=True) if Path(p).is_file())
+
+
+def read_manifest(manifest: Path) -> List[Path]:
+    """Read transcript paths from a manifest file.
+
+    JSON manifests hold a list of paths; any other file is read as one path per
+    line with blank lines and `#` comments ignored. Relative paths resolve
+    against the manifest's own directory.
+    """
+
+    text = manifest.read_text(encoding="utf-8")
+    if manifest.suffix.lower() == ".json":
+        entries = [str(entry) for entry in json.loads(text)]
+    else:
+        entries = [line.strip() for line in text.splitlines()]
+        entries = [line for line in entries if line and not line.startswith("#")]
+
+    base = manifest.parent
+    return [path if path.is_absolute() else base / path for path in map(Path, entries)]
+
+
+def plan_jobs(transcripts: List[Path], outroot: Path) -> List[BatchJob]:
+    """Assign each transcript a unique output subfolder named after its stem.
+
+    The first transcript with a given stem gets the stem itself; later ones
+    get the next free `<stem>-N` that is neither taken nor another
+    transcript's own stem.
+    """
+
+    stems = [transcript.stem or "transcript" for transcript in transcripts]
+    reserved = set(stems)
+    used: set = set()
+    jobs: List[BatchJob] = []
+    for transcript, stem in zip(transcripts, stems):
+        name, count = stem, 1
+        while name in used or (count > 1 and name in reserved):
+            count += 1
+            name = f"{stem}-{count}"
+        used.add(name)
+        jobs.append(BatchJob(name=name, transcript=transcript, outdir=outroot / name))
+    return jobs
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+
+_WORKER_PROVIDER: Optional[LLMProvider] = None
+
+
+def _init_process_worker(dry_run: bool, log_level: str, cache_dir: Optional[Path]) -> None:
+    """Build one provider per worker process and reuse it for every job."""
+
+    global _WORKER_PROVIDER
+    setup_logging(log_level)
+    cache = ResponseCache.from_env(cache_dir) if cache_dir is not None else None
+    _WORKER_PROVIDER = LLMProvider.from_env(dry_override=dry_run, cache=cache)
+
+
+def _run_in_process(job: BatchJob, incremental: bool = True) -> BatchResult:
+    assert _WORKER_PROVIDER is not None, "worker process was not initialised"
+    return run_job(_WORKER_PROVIDER, job, incremental=incremental)
+
+
+def run_job(provider: LLMProvider, job: BatchJob, *, incremental: bool = True) -> BatchResult:
+    """Run the Supervisor for one transcript, capturing failures as results."""
+
+    started = time.perf_counter()
+    stages: Dict[str, dict] = {}
+    try:
+        ensure_outdir(job.outdir)
+        supervisor = Supervisor(provider, transcript_path=job.transcript, outdir=job.outdir, incremental=incremental)
+        results = supervisor.run()
+    except PipelineError as exc:
+        stages = {name: result.as_dict() for name, result in exc.results.items()}
+        status, error = "failed", str(exc)
+    except Exception as exc:  # noqa: BLE001 - one bad transcript must not sink the batch
+        logger.exception("Batch job %s failed", job.name)
+        status, error = "failed", f"{type(exc).__name__}: {exc}"
+    else:
+        stages = {name: result.as_dict() for name, result in results.items()}
+        status, error = "ok", None
+    return BatchResult(
+        name=job.name,
+        transcript=str(job.transcript),
+        outdir=str(job.outdir),
+        status=status,
+        seconds=round(time.perf_counter() - started, 4),
+        error=error,
+        stages=stages,
+    )
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    *,
+    workers: int,
+    executor: str,
+    dry_run: bool,
+    log_level: str,
+    cache: Optional[ResponseCache] = None,
+    incremental: bool = True,
+) -> List[BatchResult]:
+    """Fan jobs out over a thread or process pool capped at `workers`.
+
+    Process workers open their own connection to the same cache file.
+    """
+
+    pool: Executor
+    task: Callable[[BatchJob], BatchResult]
+    if executor == "process":
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_process_worker,
+            initargs=(dry_run, log_level, cache.path.parent if cache is not None else None),
+        )
+        task = partial(_run_in_process, incremental=incremental)
+    else:
+        provider = LLMProvider.from_env(dry_override=dry_run, cache=cache)
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+        task = partial(run_job, provider, incremental=incremental)
+
+    results: List[BatchResult] = []
+    with pool:
+        futures = {pool.submit(task, job): job for job in jobs}
+        for future in as_completed(futures):
+            result = future.result()
+            logger.info("[%s] %s in %.2fs", result.status, result.name, result.seconds)
+            results.append(result)
+
+    order = {job.name: index for index, job in enumerate(jobs)}
+    return sorted(results, key=lambda result: order[result.name])
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+
+def format_report(results: List[BatchResult], wall_seconds: float) -> str:
+    width = max([len(result.name) for result in results] + [len("Transcript")])
+    lines = [f"{'Transcript':<{width}} | Status | Seconds", f"{'-' * width}-|--------|--------"]
+    for result in results:
+        lines.append(f"{result.name:<{width}} | {result.status:<6} | {result.seconds:7.2f}")
+        if result.error:
+            lines.append(f"{'':<{width}}   ↳ {result.error}")
+    failed = sum(1 for result in results if result.status != "ok")
+    lines.append("")
+    lines.append(
+        f"{len(results)} transcript(s), {failed} failed, wall time {wall_seconds:.2f}s"
+    )
+    return "\n".join(lines)
+
+
+def write_report(
+    path: Path, results: List[BatchResult], wall_seconds: float, bulk: Optional[Dict[str, Any]] = None
+) -> None:
+    payload = {
+        "total": len(results),
+        "failed": sum(1 for result in results if result.status != "ok"),
+        "wall_seconds": round(wall_seconds, 4),
+        "results": [asdict(result) for result in results],
+    }
+    if bulk is not None:
+        payload["bulk"] = bulk
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    logger.info("Wrote %s", path)
+
+
+# ---------------------------------------------------------------------------
+# CLI entry point
+# ---------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate artifacts for a batch of transcripts.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="Directory of transcripts or a glob such as 'archive/**/*.txt'.")
+    source.add_argument("--manifest", type=Path, help="File listing transcript paths (JSON list or one per line).")
+    parser.add_argument("--pattern", default="*.txt", help="File pattern used when --input is a directory.")
+    parser.add_argument("--outdir", required=True, type=Path, help="Root directory; one subfolder per transcript.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("BATCH_WORKERS", "4")),
+        help="Maximum number of transcripts processed concurrently.",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=["thread", "process"],
+        default=os.getenv("BATCH_EXECUTOR", "thread"),
+        help="Worker pool type: threads share one provider, processes build one each.",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        default=None,
+        help="Where to write the JSON summary (defaults to <outdir>/batch_report.json).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild every artifact even when its inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Force dry-run mode even if an API key is configured.",
+    )
+    parser.add_argument(
+        "--log-level",
+        default=os.getenv("LOG_LEVEL", "INFO"),
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Logging verbosity.",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Send the LLM requests through the provider batch API (cheaper, hours not seconds), then render.",
+    )
+    parser.add_argument(
+        "--job-file",
+        type=Path,
+        default=None,
+        help="Bulk job state used to resume polling (defaults to <outdir>/.bulk_job.json).",
+    )
+    parser.add_argument(
+        "--bulk-poll",
+        type=float,
+        default=None,
+        help="Seconds between batch status checks in bulk mode (defaults to BULK_POLL or 30).",
+    )
+    add_cache_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> int:
+    load_env()
+    args = parse_args()
+    setup_logging(args.log_level)
+
+    transcripts = read_manifest(args.manifest) if args.manifest else discover_transcripts(args.input, args.pattern)
+    if not transcripts:
+        logger.error("No transcripts found for the given input.")
+        return 2
+
+    ensure_outdir(args.outdir)
+    jobs = plan_jobs(transcripts, args.outdir)
+    workers = max(1, min(args.workers, len(jobs)))
+    logger.info("Processing %s transcript(s) with %s %s worker(s)", len(jobs), workers, args.executor)
+
+    cache = build_cache(args)
+    started = time.perf_counter()
+    bulk = None
+    if args.bulk:
+        from bulk import run_bulk
+
+        try:
+            bulk = run_bulk(
+                jobs,
+                cache=cache,
+                job_file=args.job_file or args.outdir / ".bulk_job.json",
+                dry_run=args.dry_run,
+                poll=args.bulk_poll,
+            )
+        except ValueError as exc:
+            logger.error("%s", exc)
+            return 2
+    results = run_batch(
+        jobs,
+        workers=workers,
+        executor=args.executor,
+        dry_run=args.dry_run,
+        log_level=args.log_level,
+        cache=cache,
+        incremental=not args.force,
+    )
+    wall_seconds = time.perf_counter() - started
+    if cache is not None:
+        logger.info("LLM cache: %s", cache.stats())
+
+    print(format_report(results, wall_seconds))
+    write_report(args.report or args.outdir / "batch_report.json", results, wall_seconds, bulk)
+    return 1 if any(result.status != "ok" for result in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
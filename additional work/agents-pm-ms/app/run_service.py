@@ -0,0 +1,469 @@
+"""Long-running service mode for the Supervisor pipeline.
+
+One process keeps a warm `LLMProvider` (SDK imports, clients, dotenv and the
+response cache) and a single `Supervisor`, and serves transcripts over HTTP on
+a TCP port or a Unix socket. Requests are queued with a fixed number of
+concurrent runs; once the queue is full new requests get `503` with a
+`Retry-After` hint instead of piling up.
+
+Endpoints:
+
+- `POST /runs` – body is the transcript (text/plain) or
+  `{"transcript": "...", "name": "..."}`. Returns the stage results and
+  artifacts as JSON, or NDJSON events as they happen with `?stream=1`.
+- `GET /healthz` – liveness plus queue depth.
+- `GET /metrics` – Prometheus text: latency histograms per agent, LLM call,
+  template and file write, plus token and cost counters (with `--metrics`).
+
+Each run's artifacts are published to `<outroot>/<run id>/` in one atomic
+step once every stage finished; with `--in-memory` nothing is written and the
+artifacts only travel in the response.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import queue
+import signal
+import socketserver
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set
+from urllib.parse import parse_qs, urlparse
+
+from outputs import DirectorySink, MemorySink, OutputSink
+from pipeline import PipelineError, StageResult
+from providers import LLMProvider, MetricsRegistry, RunMetrics, load_env
+from providers.telemetry import collect
+from run_supervisor import Supervisor, add_cache_arguments, build_cache, ensure_outdir, setup_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTROOT = Path(tempfile.gettempdir()) / "agents-pm-ms"
+
+
+# ---------------------------------------------------------------------------
+# Run model
+# ---------------------------------------------------------------------------
+
+
+class ServiceBusy(RuntimeError):
+    """Raised when the run queue is full."""
+
+    def __init__(self, retry_after: int) -> None:
+        self.retry_after = retry_after
+        super().__init__(f"Run queue is full; retry in {retry_after}s.")
+
+
+@dataclass
+class RunResult:
+    id: str
+    name: str
+    outdir: str
+    status: str
+    seconds: float
+    error: Optional[str] = None
+    stages: Dict[str, dict] = field(default_factory=dict)
+    artifacts: Dict[str, str] = field(default_factory=dict)
+    metrics: Optional[Dict[str, Any]] = None
+
+
+def read_artifacts(sink: OutputSink, skip: Optional[Set[str]] = None) -> Dict[str, str]:
+    """Return the artifacts staged or published by `sink` by file name, minus `skip`."""
+
+    return {
+        name: data.decode("utf-8")
+        for name, data in sorted(sink.artifacts().items())
+        if not (skip and name in skip)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Warm pipeline with a bounded queue
+# ---------------------------------------------------------------------------
+
+
+class PipelineService:
+    """Runs transcripts through one warm Supervisor with bounded concurrency."""
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        outroot: Path,
+        *,
+        concurrency: int = 2,
+        max_queue: int = 8,
+        chunk_tokens: Optional[int] = None,
+        metrics: bool = False,
+        persist: bool = True,
+    ) -> None:
+        self.provider = provider
+        self.outroot = outroot
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.supervisor = Supervisor(provider, chunk_tokens=chunk_tokens)
+        # Totals across runs for `/metrics`; None leaves telemetry off.
+        self.metrics = MetricsRegistry() if metrics else None
+        # False keeps artifacts in memory only; nothing is written under `outroot`.
+        self.persist = persist
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="run")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._total_seconds = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "concurrency": self.concurrency,
+                "max_queue": self.max_queue,
+            }
+
+    def submit(
+        self,
+        transcript: str,
+        *,
+        name: Optional[str] = None,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Future:
+        """Queue one run; raises `ServiceBusy` when no slot is free."""
+
+        with self._lock:
+            if self._queued + self._running >= self.concurrency + self.max_queue:
+                raise ServiceBusy(self._retry_after())
+            self._queued += 1
+        run_id = uuid.uuid4().hex[:12]
+        if on_event is not None:
+            on_event({"event": "queued", "id": run_id})
+        return self._pool.submit(self._run, run_id, name or run_id, transcript, on_event)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    def _retry_after(self) -> int:
+        average = self._total_seconds / self._completed if self._completed else 1.0
+        waiting = self._queued + self._running - self.concurrency + 1
+        return max(1, math.ceil(average * max(1, waiting) / self.concurrency))
+
+    def _run(
+        self,
+        run_id: str,
+        name: str,
+        transcript: str,
+        on_event: Optional[Callable[[Dict[str, Any]], None]],
+    ) -> RunResult:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        emit = on_event or (lambda event: None)
+        emit({"event": "started", "id": run_id})
+
+        outdir = self.outroot / run_id
+        if self.persist:
+            ensure_outdir(outdir)
+        sink = DirectorySink(outdir) if self.persist else MemorySink(outdir)
+        sent: Set[str] = set()
+
+        def _on_stage(result: StageResult) -> None:
+            emit({"event": "stage", "stage": result.name, **result.as_dict()})
+            if on_event is None:
+                return
+            for artifact, content in read_artifacts(sink, skip=sent).items():
+                sent.add(artifact)
+                emit({"event": "artifact", "name": artifact, "content": content})
+
+        started = time.perf_counter()
+        run_metrics = RunMetrics() if self.metrics is not None else None
+        handle = tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt", delete=False)
+        try:
+            with handle:
+                handle.write(transcript)
+            with collect(run_metrics):
+                results = self.supervisor.run(Path(handle.name), outdir, on_stage=_on_stage, sink=sink)
+            status, error = "ok", None
+        except PipelineError as exc:
+            results, status, error = exc.results, "failed", str(exc)
+        except Exception as exc:  # noqa: BLE001 - report the failure to the client
+            logger.exception("Run %s failed", run_id)
+            results, status, error = {}, "failed", f"{type(exc).__name__}: {exc}"
+        finally:
+            Path(handle.name).unlink(missing_ok=True)
+            seconds = time.perf_counter() - started
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._total_seconds += seconds
+            if run_metrics is not None:
+                self.metrics.add(run_metrics)
+
+        result = RunResult(
+            id=run_id,
+            name=name,
+            outdir=str(outdir) if self.persist else "",
+            status=status,
+            seconds=round(seconds, 4),
+            error=error,
+            stages={stage: value.as_dict() for stage, value in results.items()},
+            artifacts=read_artifacts(sink),
+            metrics=run_metrics.summary() if run_metrics is not None else None,
+        )
+        logger.info("Run %s (%s) %s in %.3fs", run_id, name, status, seconds)
+        emit({"event": "done", **{key: value for key, value in asdict(result).items() if key != "artifacts"}})
+        return result
+
+
+# ---------------------------------------------------------------------------
+# HTTP front end
+# ---------------------------------------------------------------------------
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "agents-pm-ms"
+
+    @property
+    def service(self) -> PipelineService:
+        return self.server.service  # type: ignore[attr-defined]
+
+    def address_string(self) -> str:
+        # Unix-socket peers have no (host, port) pair.
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - stdlib signature
+        logger.debug("%s %s", self.address_string(), format % args)
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        if path == "/healthz":
+            self._send_json(HTTPStatus.OK, {"status": "ok", **self.service.stats()})
+            return
+        if path == "/metrics" and self.service.metrics is not None:
+            data = self.service.metrics.prometheus().encode("utf-8")
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        self._send_json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path != "/runs":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self._send_json(HTTPStatus.LENGTH_REQUIRED, {"error": "Content-Length is required"})
+            return
+        try:
+            size = int(length)
+        except ValueError:
+            size = -1
+        if size < 0:
+            # A negative length would make `rfile.read` wait for the client to hang up.
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Content-Length must be a non-negative integer"})
+            return
+        if size > self.server.max_body:  # type: ignore[attr-defined]
+            self._send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "transcript is too large"})
+            return
+        body = self.rfile.read(size).decode("utf-8", errors="replace")
+
+        name = None
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                payload = json.loads(body)
+                body, name = payload["transcript"], payload.get("name")
+            except (ValueError, KeyError, TypeError):
+                self._send_json(HTTPStatus.BAD_REQUEST, {"error": "expected {\"transcript\": \"...\"}"})
+                return
+        if not body.strip():
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": "transcript is empty"})
+            return
+
+        if parse_qs(url.query).get("stream", ["0"])[0] in ("1", "true"):
+            self._stream_run(body, name)
+            return
+
+        try:
+            future = self.service.submit(body, name=name)
+        except ServiceBusy as exc:
+            self._send_busy(exc)
+            return
+        result: RunResult = future.result()
+        status = HTTPStatus.OK if result.status == "ok" else HTTPStatus.INTERNAL_SERVER_ERROR
+        self._send_json(status, asdict(result))
+
+    def _stream_run(self, body: str, name: Optional[str]) -> None:
+        events: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        try:
+            future = self.service.submit(body, name=name, on_event=events.put)
+        except ServiceBusy as exc:
+            self._send_busy(exc)
+            return
+        future.add_done_callback(lambda _: events.put(None))
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            try:
+                self.wfile.write(json.dumps(event).encode("utf-8") + b"\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                logger.info("Client disconnected; run continues in the background.")
+                return
+
+    def _send_busy(self, exc: ServiceBusy) -> None:
+        self._send_json(
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            {"error": str(exc), **self.service.stats()},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    def _send_json(self, status: HTTPStatus, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload, indent=2).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def build_server(args: argparse.Namespace, service: PipelineService) -> socketserver.BaseServer:
+    if args.unix_socket:
+        Path(args.unix_socket).unlink(missing_ok=True)
+        server: socketserver.BaseServer = UnixHTTPServer(str(args.unix_socket), ServiceHandler)
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), ServiceHandler)
+    server.service = service  # type: ignore[attr-defined]
+    server.max_body = int(args.max_body_mb * 1024 * 1024)  # type: ignore[attr-defined]
+    return server
+
+
+# ---------------------------------------------------------------------------
+# CLI entry point
+# ---------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve the Supervisor pipeline over HTTP with warm provider clients.")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"), help="Interface to bind.")
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8080")), help="TCP port to bind.")
+    parser.add_argument(
+        "--unix-socket",
+        type=Path,
+        default=os.getenv("SERVICE_SOCKET") or None,
+        help="Serve on this Unix socket instead of TCP.",
+    )
+    parser.add_argument(
+        "--outroot",
+        type=Path,
+        default=Path(os.getenv("SERVICE_OUTROOT") or DEFAULT_OUTROOT),
+        help="Root folder; each run writes to <outroot>/<run id>/.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("SERVICE_CONCURRENCY", "2")),
+        help="Pipeline runs executed at the same time.",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=int(os.getenv("SERVICE_MAX_QUEUE", "8")),
+        help="Runs allowed to wait for a slot before requests get 503.",
+    )
+    parser.add_argument(
+        "--max-body-mb",
+        type=float,
+        default=float(os.getenv("SERVICE_MAX_BODY_MB", "50")),
+        help="Largest accepted transcript body.",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Force dry-run mode even if an API key is configured.")
+    parser.add_argument(
+        "--log-level",
+        default=os.getenv("LOG_LEVEL", "INFO"),
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Logging verbosity.",
+    )
+    parser.add_argument("--chunk-tokens", type=int, default=None, help="Override NOTES_CHUNK_TOKENS.")
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        default=os.getenv("SERVICE_METRICS", "0") == "1",
+        help="Collect per-run telemetry and serve Prometheus text on GET /metrics.",
+    )
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        default=os.getenv("SERVICE_PERSIST", "1") == "0",
+        help="Keep run artifacts in memory and return them only in the response.",
+    )
+    add_cache_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    load_env()
+    args = parse_args()
+    setup_logging(args.log_level)
+
+    if not args.in_memory:
+        ensure_outdir(args.outroot)
+    cache = build_cache(args)
+    provider = LLMProvider.from_env(dry_override=args.dry_run, cache=cache)
+    service = PipelineService(
+        provider,
+        args.outroot,
+        concurrency=args.concurrency,
+        max_queue=args.max_queue,
+        chunk_tokens=args.chunk_tokens,
+        metrics=args.metrics,
+        persist=not args.in_memory,
+    )
+    server = build_server(args, service)
+    where = args.unix_socket or f"http://{args.host}:{args.port}"
+    logger.info("Serving on %s (concurrency %s, queue %s)", where, service.concurrency, service.max_queue)
+    # `docker stop` sends SIGTERM; finish in-flight runs as for Ctrl+C.
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
+    finally:
+        server.server_close()
+        if args.unix_socket:
+            Path(args.unix_socket).unlink(missing_ok=True)
+        service.shutdown()
+        if cache is not None:
+            logger.info("LLM cache: %s", cache.stats())
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,93 +6,168 @@ import argparse
 import json
 import logging
 import os
-import re
-from dataclasses import dataclass, field
+import sys
+from dataclasses import asdict, replace
 from datetime import date
+from itertools import chain
 from pathlib import Path
-from string import Template
-from typing import Iterable, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from artifacts import ArtifactWriter
+from classifier import TranscriptClassifier, Vocabulary, detect_owner  # noqa: F401 - re-exported helper
+from compaction import TranscriptCompactor
+from ingest import TranscriptDigest, TranscriptSource, iter_chunks, iter_sentences, iter_turns
+from ingest import sanitize_sentence  # noqa: F401 - re-exported helper
+from manifest import BuildManifest, file_digest, fingerprint, source_fingerprint
+from models import ActionItem, MeetingSummary
+from outputs import DirectorySink, OutputSink, active_sink, use_sink
+from notes_parser import NOTES_SCHEMA, NotesParseError, NotesResponseParser, ParsedNotes, parse_notes_response
+from pipeline import PipelineError, Stage, StageResult, run_dag
+from providers import LLMProvider, Prompt, ResponseCache, RunMetrics, estimate_tokens, load_env
+from providers.telemetry import collect, span
+from store import ProjectBacklog, ProjectStore
+from templating import default_registry
+
+if TYPE_CHECKING:  # pragma: no cover
+    from retrieval import MeetingHistory, RetrievalIndex
 
-from dotenv import load_dotenv
+logger = logging.getLogger(__name__)
 
-from providers import LLMProvider
+# Completion budget for structured notes calls (bullets, three sections and the
+# ACTION_ITEMS array). Their length does not shrink with the transcript, so
+# adaptive sizing may not lower it: a cut-off ACTION_ITEMS block costs a repair call.
+NOTES_MAX_TOKENS = 2048
 
-logger = logging.getLogger(__name__)
+# What `build_summary` puts in a section that came back empty, so no artifact
+# shows a blank section. These are not meeting content: `extracted_only`
+# drops them before a meeting is recorded anywhere that outlives the run.
+PLACEHOLDERS = {
+    "bullets": "Kick-off meeting held; awaiting transcript content.",
+    "decisions": "Agreed to proceed with the proposed delivery milestones.",
+    "questions": "Clarify scope for data migration before next steering committee.",
+    "risks": "Timeline risk if sign-off slips beyond Friday.",
+}
 
 
 # ---------------------------------------------------------------------------
-# Utility data structures
+# Helper functions
 # ---------------------------------------------------------------------------
 
 
-@dataclass
-class MeetingSummary:
-    bullets: List[str]
-    decisions: List[str]
-    questions: List[str]
-    risks: List[str]
-    transcript_excerpt: str
-    status: str = "Green"
+def ensure_outdir(outdir: Path) -> None:
+    outdir.mkdir(parents=True, exist_ok=True)
 
 
-@dataclass
-class ActionItem:
-    title: str
-    owner: str = "Unassigned"
-    due_date: Optional[str] = None
-    tags: List[str] = field(default_factory=list)
-    dependency: Optional[str] = None
+def write_if_changed(path: Path, content: str) -> bool:
+    """Write `content` unless the file already holds exactly these bytes.
+
+    Skipping identical writes keeps mtimes stable, so folder watchers and
+    sync clients do not see unchanged artifacts as new. Inside a run the
+    write is staged in the active output sink and published on commit.
+    """
+
+    data = content.encode("utf-8")
+    with span("write", path.name, bytes=len(data)) as timing:
+        sink = active_sink()
+        if sink is not None and sink.owns(path):
+            changed = sink.write(path.name, data)
+            if not changed:
+                logger.info("Unchanged %s", path)
+            timing.set(changed=changed)
+            return changed
+        try:
+            if path.stat().st_size == len(data) and path.read_bytes() == data:
+                logger.info("Unchanged %s", path)
+                timing.set(changed=False)
+                return False
+        except FileNotFoundError:
+            pass
+        path.write_bytes(data)
+        logger.info("Wrote %s", path)
+        timing.set(changed=True)
+        return True
 
-    def as_dict(self) -> dict:
-        return {
-            "title": self.title,
-            "owner": self.owner or "Unassigned",
-            "due_date": self.due_date,
-            "tags": self.tags,
-            "dependency": self.dependency,
-        }
 
+def write_text(path: Path, content: str) -> None:
+    write_if_changed(path, content.strip() + "\n")
 
-# ---------------------------------------------------------------------------
-# Helper functions
-# ---------------------------------------------------------------------------
 
+def write_progress(path: Path, content: str) -> None:
+    """Publish an in-progress file right away, outside the staged artifact set."""
 
-def ensure_outdir(outdir: Path) -> None:
-    outdir.mkdir(parents=True, exist_ok=True)
+    sink = active_sink()
+    if sink is not None and sink.owns(path):
+        sink.write_progress(path.name, content)
+    else:
+        path.write_text(content, encoding="utf-8")
 
 
-def write_text(path: Path, content: str) -> None:
-    path.write_text(content.strip() + "\n", encoding="utf-8")
-    logger.info("Wrote %s", path)
+def remove_output(path: Path) -> None:
+    sink = active_sink()
+    if sink is not None and sink.owns(path):
+        sink.remove(path.name)
+    else:
+        path.unlink(missing_ok=True)
 
 
 def render_template(template_path: Path, **context) -> str:
-    template = Template(template_path.read_text(encoding="utf-8"))
-    return template.safe_substitute(**context)
+    """Fill `$name` placeholders (templates/) and `{{ name }}` ones (agent prompts)."""
+
+    with span("template", template_path.name):
+        return default_registry().render(template_path, **context)
+
+
+def render_prompt(template_path: Path, **context) -> Prompt:
+    """Like `render_template`, keeping the text before the first placeholder as a cacheable prefix."""
 
+    with span("template", template_path.name):
+        return default_registry().render_prompt(template_path, **context)
 
-def sanitize_sentence(sentence: str) -> str:
-    return sentence.strip().replace("\n", " ")
+
+def extracted_only(
+    summary: MeetingSummary, actions: List[ActionItem]
+) -> Tuple[MeetingSummary, List[ActionItem]]:
+    """`summary` and `actions` without the placeholders and fallback actions `build_summary` fills gaps with."""
+
+    def real(items: List[str], section: str) -> List[str]:
+        return [item for item in items if item != sanitize_sentence(PLACEHOLDERS[section])]
+
+    fallback = {item.title for item in NotesAgent._fallback_actions()}
+    return (
+        replace(
+            summary,
+            bullets=real(summary.bullets, "bullets"),
+            decisions=real(summary.decisions, "decisions"),
+            questions=real(summary.questions, "questions"),
+            risks=real(summary.risks, "risks"),
+        ),
+        [item for item in actions if item.title not in fallback],
+    )
+
+
+def meeting_identity(transcript: Union[str, TranscriptSource]) -> Tuple[str, str]:
+    """`(meeting name, source digest)` of a transcript, as recorded in the project store and index."""
+
+    if isinstance(transcript, TranscriptSource):
+        return transcript.path.stem, file_digest(transcript.path)
+    source = fingerprint(transcript)
+    return f"meeting-{source[:8]}", source
 
 
 def chunk_sentences(text: str) -> List[str]:
-    paragraphs = [block.strip() for block in text.split("\n") if block.strip()]
-    sentences: List[str] = []
-    for block in paragraphs:
-        parts = re.split(r"(?<=[.!?])\s+", block)
-        sentences.extend(filter(None, (sanitize_sentence(p) for p in parts)))
-    return sentences
+    return list(iter_sentences(text.split("\n")))
+
+
+def split_turns(text: str) -> List[str]:
+    """Group transcript lines into speaker turns ("Name:" / "Name (Role):" starts one)."""
 
+    return list(iter_turns(text.splitlines()))
 
-def detect_owner(line: str) -> str:
-    owner_match = re.search(r"(?:(?:owner|assigned|to)\s*(?:to)?\s*:?\s*)([A-Z][a-zA-Z]+)", line)
-    if owner_match:
-        return owner_match.group(1)
-    prefix_match = re.match(r"([A-Z][a-zA-Z]+)[:\-]", line)
-    if prefix_match:
-        return prefix_match.group(1)
-    return "Unassigned"
+
+def chunk_transcript(text: str, token_budget: int) -> List[str]:
+    """Pack speaker turns into chunks of at most `token_budget` estimated tokens."""
+
+    return list(iter_chunks(text.splitlines(), token_budget))
 
 
 # ---------------------------------------------------------------------------
@@ -101,49 +176,94 @@ def detect_owner(line: str) -> str:
 
 
 class NotesAgent:
-    def __init__(self, provider: LLMProvider) -> None:
+    name = "notes"
+    inputs = ("transcript", "outdir")
+    outputs = ("summary", "actions")
+    artifacts = ("meeting.md", "action_items.json")
+
+    system_prompt = "You are an expert project manager who creates concise, actionable meeting summaries."
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        *,
+        chunk_tokens: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        classifier: Optional[TranscriptClassifier] = None,
+        history: Optional["MeetingHistory"] = None,
+    ) -> None:
         self.provider = provider
-        self.template_path = Path(__file__).parent / "agents" / "notes_agent.md"
+        # With a retrieval index, the final prompt is grounded in earlier meetings.
+        self.history = history
+        self.classifier = classifier or TranscriptClassifier(Vocabulary.from_env())
+        base = Path(__file__).parent / "agents"
+        self.template_path = base / "notes_agent.md"
+        self.chunk_template_path = base / "notes_chunk_agent.md"
+        self.reduce_template_path = base / "notes_reduce_agent.md"
+        self.repair_template_path = base / "notes_repair_agent.md"
+        self.fold_template_path = base / "notes_fold_agent.md"
+        # Transcripts estimated above this many tokens are summarized map-reduce style.
+        self.chunk_tokens = chunk_tokens if chunk_tokens is not None else int(os.getenv("NOTES_CHUNK_TOKENS", "6000"))
+        self.concurrency = concurrency or int(os.getenv("NOTES_CONCURRENCY", "8"))
+        # Ask for schema-constrained JSON on the final call where the provider supports it.
+        self.json_schema = NOTES_SCHEMA if os.getenv("NOTES_STRUCTURED", "1") != "0" else None
+        # Shorten speaker labels and drop filler/duplicate lines in the text sent to the LLM.
+        self.compact = os.getenv("NOTES_COMPACT", "1") != "0"
+
+    def run(
+        self, transcript: Union[str, TranscriptSource], outdir: Path
+    ) -> tuple[MeetingSummary, List[ActionItem]]:
+        # One streaming pass feeds both the LLM chunker and the heuristics digest
+        lines = transcript.splitlines() if isinstance(transcript, str) else transcript.lines()
+        digest = TranscriptDigest(self.classifier)
+        compactor = self.compactor()
+        observed = digest.observe(lines)
+        prompt = self._final_prompt(compactor.compact(observed) if compactor else observed)
+        if compactor is not None:
+            compactor.report()
+        if self.history is not None:
+            meeting, source = meeting_identity(transcript)
+            try:
+                prompt = self.history.ground(prompt, meeting, digest)
+            except Exception:  # noqa: BLE001 - notes without earlier context beat no notes
+                logger.exception("Retrieval from the meeting index failed; continuing without it")
 
-    def run(self, transcript: str, outdir: Path) -> tuple[MeetingSummary, List[ActionItem]]:
-        # Use LLM to generate meeting summary and action items
-        prompt = render_template(self.template_path, transcript=transcript)
-        
         logger.info("Calling LLM provider to generate meeting notes...")
-        response = self.provider.generate(
-            prompt,
-            system_prompt="You are an expert project manager who creates concise, actionable meeting summaries.",
-            temperature=0.3,
-            max_tokens=2048
-        )
-        
+        parser = NotesResponseParser()
+        response = self._stream_notes(prompt, parser, outdir)
+
         logger.info("LLM response received, parsing content...")
-        
-        # Parse the LLM response to extract structured data
-        # For now, fall back to rule-based parsing but with LLM-generated content
-        lines = response.split('\n')
-        
-        # Extract bullets, decisions, questions, risks from LLM response
-        sentences = chunk_sentences(transcript)
-        bullets = sentences[:6] if sentences else ["Kick-off meeting held; awaiting transcript content."]
-
-        decisions = [s for s in sentences if re.search(r"decided|approved|confirmed", s, re.IGNORECASE)][:3]
-        if not decisions:
-            decisions = ["Agreed to proceed with the proposed delivery milestones."]
-
-        questions = [s for s in sentences if "?" in s][:3]
-        if not questions:
-            questions = ["Clarify scope for data migration before next steering committee."]
-
-        risk_candidates = [
-            s
-            for s in sentences
-            if re.search(r"risk|concern|blocked|slip", s, re.IGNORECASE)
-        ][:3]
-        if not risk_candidates:
-            risk_candidates = ["Timeline risk if sign-off slips beyond Friday."]
-
-        action_items = self._extract_action_items(transcript)
+        summary, action_items = self.build_summary(self._parse_response(response, parser), digest)
+        self.write_notes(summary, action_items, outdir)
+        if self.history is not None:
+            lines = transcript.splitlines() if isinstance(transcript, str) else transcript.lines()
+            try:
+                self.history.remember(meeting, source, lines, *extracted_only(summary, action_items))
+            except Exception:  # noqa: BLE001 - the notes are written; indexing can catch up next run
+                logger.exception("Adding %s to the meeting index failed", meeting)
+        return summary, action_items
+
+    def build_summary(
+        self, notes: Optional[ParsedNotes], digest: TranscriptDigest
+    ) -> Tuple[MeetingSummary, List[ActionItem]]:
+        """Turn parsed notes (or, without them, the digest's heuristics) into the summary and action items."""
+
+        if notes is None:
+            found = digest.found
+            notes = ParsedNotes(
+                bullets=found.bullets,
+                decisions=found.decisions,
+                questions=found.questions,
+                risks=found.risks,
+                actions=digest.actions,
+            )
+
+        bullets = notes.bullets or [PLACEHOLDERS["bullets"]]
+        decisions = notes.decisions or [PLACEHOLDERS["decisions"]]
+        questions = notes.questions or [PLACEHOLDERS["questions"]]
+        risk_candidates = notes.risks or [PLACEHOLDERS["risks"]]
+
+        action_items = notes.actions
         if not action_items:
             action_items = self._fallback_actions()
 
@@ -152,20 +272,228 @@ class NotesAgent:
             decisions=[sanitize_sentence(d) for d in decisions],
             questions=[sanitize_sentence(q) for q in questions],
             risks=[sanitize_sentence(r) for r in risk_candidates],
-            transcript_excerpt="\n".join(transcript.splitlines()[:5]),
+            transcript_excerpt="\n".join(digest.excerpt),
             status=self._infer_status(risk_candidates),
         )
+        return summary, action_items
+
+    def compactor(self) -> Optional[TranscriptCompactor]:
+        """A fresh compactor for one transcript, or None when compaction is off."""
 
+        return TranscriptCompactor() if self.compact else None
+
+    def fold(self, notes: Optional[str], segment: str) -> str:
+        """Fold a newly spoken transcript `segment` into the rolling `notes` response (follow mode).
+
+        Each call costs one prompt of roughly the notes plus the segment, so a
+        live meeting is summarized in linear rather than quadratic time.
+        """
+
+        if notes is None:
+            prompt = render_prompt(self.template_path, transcript=segment)
+        else:
+            prompt = render_prompt(self.fold_template_path, notes=notes, transcript=segment)
+        return self.provider.generate(
+            prompt,
+            system_prompt=self.system_prompt,
+            temperature=0.3,
+            max_tokens=NOTES_MAX_TOKENS,
+            min_tokens=NOTES_MAX_TOKENS,
+            json_schema=self.json_schema,
+        )
+
+    def live_inputs(self, summary: MeetingSummary, actions: List[ActionItem]) -> Any:
+        """The slice of the summary this agent renders; follow mode re-renders when it changes."""
+
+        return summary, actions
+
+    def write_notes(self, summary: MeetingSummary, action_items: List[ActionItem], outdir: Path) -> None:
         meeting_note = self._format_meeting_note(summary, action_items)
         write_text(outdir / "meeting.md", meeting_note)
+        remove_output(outdir / "meeting.md.partial")
 
         action_payload = [item.as_dict() for item in action_items]
-        (outdir / "action_items.json").write_text(
-            json.dumps(action_payload, indent=2), encoding="utf-8"
+        write_if_changed(outdir / "action_items.json", json.dumps(action_payload, indent=2))
+
+    def fingerprint_inputs(self) -> Dict[str, Any]:
+        """Everything besides the transcript that shapes this agent's outputs."""
+
+        config = self.provider.config
+        return {
+            "templates": [
+                self.template_path,
+                self.chunk_template_path,
+                self.reduce_template_path,
+                self.repair_template_path,
+                self.fold_template_path,
+                self.history.template_path if self.history else None,
+            ],
+            "provider": [config.provider, config.model, config.dry_run],
+            "router": self.provider.router.describe() if self.provider.router else None,
+            "chunk_tokens": self.chunk_tokens,
+            "structured": self.json_schema is not None,
+            "compact": self.compact,
+            "vocabulary": asdict(self.classifier.vocabulary),
+            "history": self.history.fingerprint_inputs() if self.history else None,
+        }
+
+    def dump_result(self, result: Tuple[MeetingSummary, List[ActionItem]]) -> Dict[str, Any]:
+        summary, actions = result
+        return {"summary": asdict(summary), "actions": [item.as_dict() for item in actions]}
+
+    def load_result(self, data: Dict[str, Any]) -> Tuple[MeetingSummary, List[ActionItem]]:
+        return MeetingSummary(**data["summary"]), [ActionItem(**item) for item in data["actions"]]
+
+    def _final_prompt(self, lines: Iterable[str]) -> str:
+        """Build the prompt for the final notes call.
+
+        Transcripts within the budget go straight into the notes prompt. Longer
+        ones are summarized chunk by chunk and merged until one reduce prompt
+        remains. Chunks are produced lazily from `lines`; only the chunks
+        currently in flight are held in memory.
+        """
+
+        if self.chunk_tokens <= 0:
+            return render_prompt(self.template_path, transcript="\n".join(lines))
+
+        chunks = iter_chunks(lines, self.chunk_tokens)
+        first = next(chunks, "")
+        second = next(chunks, None)
+        if second is None:
+            return render_prompt(self.template_path, transcript=first)
+
+        logger.info("Transcript exceeds %s tokens; summarizing chunks in parallel...", self.chunk_tokens)
+        prompts = (
+            render_prompt(self.chunk_template_path, transcript=chunk, part=index)
+            for index, chunk in enumerate(chain([first, second], chunks), start=1)
         )
-        logger.info("Wrote %s", outdir / "action_items.json")
+        partials = self.provider.generate_many(
+            prompts,
+            concurrency=self.concurrency,
+            system_prompt=self.system_prompt,
+            temperature=0.3,
+            max_tokens=1024,
+        )
+        logger.info("Summarized %s chunks", len(partials))
+        return self._reduce(partials)
+
+    def _reduce(self, partials: List[str]) -> str:
+        """Merge partial notes level by level; return the prompt for the last merge."""
+
+        level = 1
+        while True:
+            groups = self._pack_partials(partials)
+            logger.info("Reducing %s partial summaries in %s group(s) (level %s)...", len(partials), len(groups), level)
+            prompts = [
+                render_prompt(self.reduce_template_path, partials="\n\n---\n\n".join(group))
+                for group in groups
+            ]
+            if len(prompts) == 1:
+                return prompts[0]
+            partials = self.provider.generate_many(
+                prompts,
+                concurrency=self.concurrency,
+                system_prompt=self.system_prompt,
+                temperature=0.3,
+                max_tokens=NOTES_MAX_TOKENS,
+                min_tokens=NOTES_MAX_TOKENS,
+            )
+            level += 1
 
-        return summary, action_items
+    def _stream_notes(self, prompt: str, parser: NotesResponseParser, outdir: Path) -> str:
+        """Stream the final notes call through `parser`, flushing `meeting.md.partial` as sections complete.
+
+        Reading stops once the ACTION_ITEMS block is complete, so downstream
+        agents are not held up by any trailing text.
+        """
+
+        deltas = self.provider.stream(
+            prompt,
+            system_prompt=self.system_prompt,
+            temperature=0.3,
+            max_tokens=NOTES_MAX_TOKENS,
+            min_tokens=NOTES_MAX_TOKENS,
+            json_schema=self.json_schema,
+        )
+        received: List[str] = []
+        try:
+            for delta in deltas:
+                received.append(delta)
+                if parser.feed(delta):
+                    self._write_partial(parser, outdir)
+                if parser.actions_ready:
+                    break
+        finally:
+            deltas.close()
+        return "".join(received)
+
+    def _write_partial(self, parser: NotesResponseParser, outdir: Path) -> None:
+        data = parser.data
+        partial = MeetingSummary(
+            bullets=data["bullets"],
+            decisions=data["decisions"],
+            questions=data["questions"],
+            risks=data["risks"],
+            transcript_excerpt="",
+        )
+        path = outdir / "meeting.md.partial"
+        write_progress(path, self._format_meeting_note(partial, []))
+        logger.debug("Flushed %s (%s)", path, ", ".join(parser.completed))
+
+    def _pack_partials(self, partials: List[str]) -> List[List[str]]:
+        """Group partials within the token budget, at least two per group so each level shrinks."""
+
+        groups: List[List[str]] = []
+        current: List[str] = []
+        used = 0
+        for partial in partials:
+            cost = estimate_tokens(partial)
+            if len(current) >= 2 and used + cost > self.chunk_tokens:
+                groups.append(current)
+                current, used = [], 0
+            current.append(partial)
+            used += cost
+        if current:
+            if len(current) == 1 and groups:
+                groups[-1].append(current[0])
+            else:
+                groups.append(current)
+        return groups
+
+    def _parse_response(self, response: str, parser: NotesResponseParser) -> Optional[ParsedNotes]:
+        """Validate the streamed response; one corrective round-trip if that fails.
+
+        Returns None when the response is still unusable, in which case the
+        caller falls back to the transcript heuristics.
+        """
+
+        try:
+            return parser.close()
+        except NotesParseError as exc:
+            errors = exc.errors
+        if self.provider.config.dry_run:
+            logger.info("Dry-run response is not structured; using transcript heuristics.")
+            return None
+
+        logger.warning("Notes response failed validation (%s); requesting a correction...", "; ".join(errors))
+        prompt = render_prompt(
+            self.repair_template_path,
+            errors="\n".join(f"- {error}" for error in errors),
+            response=response,
+        )
+        corrected = self.provider.generate(
+            prompt,
+            system_prompt=self.system_prompt,
+            temperature=0.0,
+            max_tokens=NOTES_MAX_TOKENS,
+            min_tokens=NOTES_MAX_TOKENS,
+            json_schema=self.json_schema,
+        )
+        try:
+            return parse_notes_response(corrected)
+        except NotesParseError as exc:
+            logger.warning("Corrected response is still invalid (%s); using transcript heuristics.", exc)
+            return None
 
     def _infer_status(self, risks: Iterable[str]) -> str:
         risk_text = " ".join(risks).lower()
@@ -176,31 +504,10 @@ class NotesAgent:
         return "Green"
 
     def _extract_action_items(self, transcript: str) -> List[ActionItem]:
-        action_lines = []
-        for line in transcript.splitlines():
-            if re.search(r"^(?:action|todo|task|follow up)\b", line.strip(), re.IGNORECASE):
-                action_lines.append(line.strip())
-            elif "action" in line.lower() and ":" in line:
-                action_lines.append(line.strip())
-
-        items: List[ActionItem] = []
-        for line in action_lines:
-            owner = detect_owner(line)
-            title = re.sub(r"(?i)(action|todo|task|follow up)[^:]*:?", "", line).strip()
-            title = title or "Document action item"
-            due_date = None
-            date_match = re.search(r"(\d{4}-\d{2}-\d{2})", line)
-            if date_match:
-                due_date = date_match.group(1)
-            tags = []
-            if "risk" in line.lower():
-                tags.append("risk")
-            if "client" in line.lower():
-                tags.append("client")
-            items.append(ActionItem(title=title, owner=owner, due_date=due_date, tags=tags))
-        return items
-
-    def _fallback_actions(self) -> List[ActionItem]:
+        return self.classifier.extract_actions(transcript.splitlines())
+
+    @staticmethod
+    def _fallback_actions() -> List[ActionItem]:
         tomorrow = date.today().isoformat()
         return [
             ActionItem(
@@ -250,30 +557,91 @@ class NotesAgent:
 """
 
 
+class ProjectAgent:
+    """Ingests each meeting into the project store and hands the open backlog downstream.
+
+    Without a store (or project name) the stage is a no-op that yields None,
+    and the other agents only see the current meeting.
+    """
+
+    name = "project"
+    inputs = ("transcript", "summary", "actions")
+    outputs = ("backlog",)
+    artifacts = ()
+
+    def __init__(self, store: Optional[ProjectStore] = None, project: Optional[str] = None) -> None:
+        self.store = store if project else None
+        self.project = project
+
+    def fingerprint_inputs(self) -> Dict[str, Any]:
+        if self.store is None:
+            return {}
+        return {"store": str(self.store.path), "project": self.project, "revision": self.store.revision(self.project)}
+
+    def run(
+        self, transcript: Union[str, TranscriptSource], summary: MeetingSummary, actions: List[ActionItem]
+    ) -> Optional[ProjectBacklog]:
+        if self.store is None:
+            return None
+        meeting, source = meeting_identity(transcript)
+        # Only what the meeting actually produced becomes project history.
+        self.store.ingest(self.project, meeting, *extracted_only(summary, actions), source=source)
+        return self.store.backlog(self.project, meeting)
+
+    def dump_result(self, result: Optional[ProjectBacklog]) -> Optional[Dict[str, Any]]:
+        return asdict(result) if result is not None else None
+
+    def load_result(self, data: Optional[Dict[str, Any]]) -> Optional[ProjectBacklog]:
+        return ProjectBacklog.from_dict(data) if data is not None else None
+
+
 class DocsAgent:
-    def __init__(self) -> None:
+    name = "docs"
+    inputs = ("summary", "actions", "outdir", "backlog")
+    outputs = ()
+    artifacts = ("RAID.md", "RACI.md", "update_email.md")
+
+    def __init__(self, writer: Optional[ArtifactWriter] = None) -> None:
         base = Path(__file__).parent / "templates"
         self.raid_template = base / "raid_template.md"
         self.raci_template = base / "raci_template.md"
         self.email_template = base / "email_template.md"
-
-    def run(self, summary: MeetingSummary, actions: List[ActionItem], outdir: Path) -> None:
-        raid_content = render_template(
+        # With ARTIFACTS_LLM on, files the LLM drafted replace the template renderings.
+        self.writer = writer
+
+    def fingerprint_inputs(self) -> Dict[str, Any]:
+        writer = self.writer.fingerprint_inputs() if self.writer else {}
+        return {"templates": [self.raid_template, self.raci_template, self.email_template], **writer}
+
+    def live_inputs(self, summary: MeetingSummary, actions: List[ActionItem]) -> Any:
+        return summary.bullets[:4], summary.questions, summary.risks, summary.status, actions
+
+    def run(
+        self,
+        summary: MeetingSummary,
+        actions: List[ActionItem],
+        outdir: Path,
+        backlog: Optional[ProjectBacklog] = None,
+    ) -> None:
+        drafts = self.writer.draft(self.name, summary, actions, backlog) if self.writer else {}
+        if backlog is not None:
+            drafts = self._carry_over(drafts, backlog)
+        raid_content = drafts.get("RAID.md") or render_template(
             self.raid_template,
-            risks=self._format_risks(summary.risks),
+            risks=self._format_risks(summary.risks, backlog),
             assumptions=self._format_assumptions(summary),
             issues=self._format_issues(summary),
             dependencies=self._format_dependencies(actions),
         )
         write_text(outdir / "RAID.md", raid_content)
 
-        raci_content = render_template(
+        raci_content = drafts.get("RACI.md") or render_template(
             self.raci_template,
-            raci_table=self._build_raci_table(actions),
+            raci_table=self._build_raci_table(actions, backlog),
         )
         write_text(outdir / "RACI.md", raci_content)
 
-        email_content = render_template(
+        email_content = drafts.get("update_email.md") or render_template(
             self.email_template,
             summary_points="\n".join(f"• {point}" for point in summary.bullets[:4]),
             status_color=summary.status,
@@ -282,8 +650,32 @@ class DocsAgent:
         )
         write_text(outdir / "update_email.md", email_content)
 
-    def _format_risks(self, risks: Iterable[str]) -> str:
-        return "\n".join(f"- {risk}" for risk in risks) or "- No net-new risks recorded."
+    def _carry_over(self, drafts: Dict[str, str], backlog: ProjectBacklog) -> Dict[str, str]:
+        """Append carried risks and actions that an LLM draft left out, as the templates list them."""
+
+        drafts = dict(drafts)
+        if "RAID.md" in drafts:
+            lowered = drafts["RAID.md"].lower()
+            risks = [risk for risk in backlog.carried_risks() if risk.text.lower() not in lowered]
+            if risks:
+                listed = self._format_risks([], ProjectBacklog(backlog.project, backlog.meeting, risks=risks))
+                drafts["RAID.md"] += "\n\n## Carried risks\n" + listed
+        if "RACI.md" in drafts:
+            lowered = drafts["RACI.md"].lower()
+            actions = [item for item in backlog.carried_actions() if item.title.lower() not in lowered]
+            if actions:
+                table = self._build_raci_table([], ProjectBacklog(backlog.project, backlog.meeting, actions=actions))
+                drafts["RACI.md"] += "\n\n## Carried actions\n" + table
+        return drafts
+
+    def _format_risks(self, risks: Iterable[str], backlog: Optional[ProjectBacklog] = None) -> str:
+        lines = [f"- {risk}" for risk in risks]
+        if backlog is not None:
+            lines += [
+                f"- {risk.text} _(open since {risk.first_meeting}, raised {risk.occurrences}×)_"
+                for risk in backlog.carried_risks()
+            ]
+        return "\n".join(lines) or "- No net-new risks recorded."
 
     def _format_assumptions(self, summary: MeetingSummary) -> str:
         return "\n".join(
@@ -298,22 +690,49 @@ class DocsAgent:
         deps = [item.dependency for item in actions if item.dependency]
         return "\n".join(f"- {dep}" for dep in deps) if deps else "- No critical dependencies noted."
 
-    def _build_raci_table(self, actions: List[ActionItem]) -> str:
+    def _build_raci_table(self, actions: List[ActionItem], backlog: Optional[ProjectBacklog] = None) -> str:
         header = "| Deliverable | Responsible | Accountable | Consulted | Informed |\n| --- | --- | --- | --- | --- |"
         rows = []
         for item in actions:
             rows.append(
                 f"| {item.title} | {item.owner} | Project Sponsor | Tech Lead | PMO |"
             )
+        # Open items from earlier meetings of the project stay on the matrix until done.
+        for stored in backlog.carried_actions() if backlog is not None else []:
+            rows.append(
+                f"| {stored.title} (open since {stored.first_meeting}) | {stored.owner} | Project Sponsor | Tech Lead | PMO |"
+            )
         if not rows:
             rows.append("| Workshop Prep | PM | Project Sponsor | Tech Lead | PMO |")
         return "\n".join([header, *rows])
 
 
 class DeckAgent:
-    def run(self, summary: MeetingSummary, actions: List[ActionItem], outdir: Path) -> None:
-        slides = self._build_slides(summary, actions)
-        write_text(outdir / "status_deck.md", "\n\n".join(slides))
+    name = "deck"
+    # The backlog only feeds LLM drafting; in coalesced mode all three stages must share one context.
+    inputs = ("summary", "actions", "outdir", "backlog")
+    outputs = ()
+    artifacts = ("status_deck.md",)
+
+    def __init__(self, writer: Optional[ArtifactWriter] = None) -> None:
+        self.writer = writer
+
+    def fingerprint_inputs(self) -> Dict[str, Any]:
+        return self.writer.fingerprint_inputs() if self.writer else {}
+
+    def live_inputs(self, summary: MeetingSummary, actions: List[ActionItem]) -> Any:
+        return summary.bullets[:6], summary.decisions, summary.risks, summary.status, actions[:3]
+
+    def run(
+        self,
+        summary: MeetingSummary,
+        actions: List[ActionItem],
+        outdir: Path,
+        backlog: Optional[ProjectBacklog] = None,
+    ) -> None:
+        drafts = self.writer.draft(self.name, summary, actions, backlog) if self.writer else {}
+        deck = drafts.get("status_deck.md") or "\n\n".join(self._build_slides(summary, actions))
+        write_text(outdir / "status_deck.md", deck)
 
     def _build_slides(self, summary: MeetingSummary, actions: List[ActionItem]) -> List[str]:
         agenda = [
@@ -343,7 +762,34 @@ class DeckAgent:
 
 
 class OpsAgent:
-    def run(self, summary: MeetingSummary, actions: List[ActionItem], outdir: Path) -> None:
+    name = "ops"
+    inputs = ("summary", "actions", "outdir", "backlog")
+    outputs = ()
+    artifacts = ("ops_update.md",)
+
+    def __init__(self, writer: Optional[ArtifactWriter] = None) -> None:
+        self.writer = writer
+
+    def fingerprint_inputs(self) -> Dict[str, Any]:
+        return self.writer.fingerprint_inputs() if self.writer else {}
+
+    def live_inputs(self, summary: MeetingSummary, actions: List[ActionItem]) -> Any:
+        return summary.status, summary.bullets[:2], summary.risks[:2], actions[:3]
+
+    def run(
+        self,
+        summary: MeetingSummary,
+        actions: List[ActionItem],
+        outdir: Path,
+        backlog: Optional[ProjectBacklog] = None,
+    ) -> None:
+        drafts = self.writer.draft(self.name, summary, actions, backlog) if self.writer else {}
+        if "ops_update.md" in drafts:
+            update = [drafts["ops_update.md"]]
+            if backlog is not None:
+                update.append(self._format_backlog(backlog))
+            write_text(outdir / "ops_update.md", "\n\n".join(update))
+            return
         wins = summary.bullets[:2] or ["Kick-off completed"]
         risks = summary.risks[:2]
         next_actions = [f"{item.title} ({item.owner})" for item in actions[:3]]
@@ -353,8 +799,18 @@ class OpsAgent:
             "Risks: " + ("; ".join(risks) if risks else "n/a"),
             "Next Actions: " + ("; ".join(next_actions) if next_actions else "n/a"),
         ]
+        if backlog is not None:
+            update.append(self._format_backlog(backlog))
         write_text(outdir / "ops_update.md", "\n".join(update))
 
+    def _format_backlog(self, backlog: ProjectBacklog) -> str:
+        overdue = [item for item in backlog.actions if item.is_overdue()]
+        carried = backlog.carried_actions()
+        line = f"Project Backlog: {len(backlog.actions)} open action(s), {len(overdue)} overdue, {len(carried)} carried over"
+        if overdue:
+            line += "; Overdue: " + "; ".join(f"{item.title} ({item.owner}, {item.due_date})" for item in overdue[:3])
+        return line
+
 
 # ---------------------------------------------------------------------------
 # Orchestrator
@@ -362,29 +818,143 @@ class OpsAgent:
 
 
 class Supervisor:
-    def __init__(self, provider: LLMProvider, transcript_path: Path, outdir: Path) -> None:
+    def __init__(
+        self,
+        provider: LLMProvider,
+        transcript_path: Optional[Path] = None,
+        outdir: Optional[Path] = None,
+        *,
+        chunk_tokens: Optional[int] = None,
+        incremental: bool = True,
+        store: Optional[ProjectStore] = None,
+        project: Optional[str] = None,
+        index: Optional["RetrievalIndex"] = None,
+    ) -> None:
         self.provider = provider
         self.transcript_path = transcript_path
         self.outdir = outdir
+        # When set, stages whose inputs match the output folder's build manifest are skipped.
+        self.incremental = incremental
+
+        history = None
+        if index is not None:
+            from retrieval import MeetingHistory
+
+            # Scoped to the project when one is set, else the whole index.
+            history = MeetingHistory.from_env(index, project)
+        self.notes_agent = NotesAgent(provider, chunk_tokens=chunk_tokens, history=history)
+        # With a store and project name, each run is added to the project's cross-meeting backlog.
+        self.project_agent = ProjectAgent(store, project)
+        # Drafts the Docs/Deck/Ops files with the LLM when ARTIFACTS_LLM is set (see artifacts.py).
+        self.artifact_writer = ArtifactWriter.from_env(provider)
+        self.docs_agent = DocsAgent(self.artifact_writer)
+        self.deck_agent = DeckAgent(self.artifact_writer)
+        self.ops_agent = OpsAgent(self.artifact_writer)
+
+    @property
+    def agents(self) -> list:
+        return [self.notes_agent, self.project_agent, self.docs_agent, self.deck_agent, self.ops_agent]
+
+    def stages(self, manifest: Optional[BuildManifest] = None, checkpoint: Optional[Any] = None) -> List[Stage]:
+        """Expose each agent as a DAG node wired by its declared inputs/outputs.
+
+        With a `manifest`, every stage records its input digest and outputs,
+        and reuses them when nothing changed (unless incremental is off).
+        With a `checkpoint` (see `jobs.JobCheckpoint`), each finished stage's
+        result and artifacts are saved as soon as it completes, and a stage
+        already checkpointed with the same inputs is restored instead of run.
+        """
+
+        tracked = manifest is not None or checkpoint is not None
+        return [
+            Stage(agent.name, self._tracked(agent, manifest, checkpoint) if tracked else agent.run, agent.inputs, agent.outputs)
+            for agent in self.agents
+        ]
 
-        self.notes_agent = NotesAgent(provider)
-        self.docs_agent = DocsAgent()
-        self.deck_agent = DeckAgent()
-        self.ops_agent = OpsAgent()
-
-    def run(self) -> None:
-        transcript = self._load_transcript()
-        summary, actions = self.notes_agent.run(transcript, self.outdir)
-        self.docs_agent.run(summary, actions, self.outdir)
-        self.deck_agent.run(summary, actions, self.outdir)
-        self.ops_agent.run(summary, actions, self.outdir)
-
-    def _load_transcript(self) -> str:
-        if not self.transcript_path.exists():
-            raise FileNotFoundError(f"Transcript not found at {self.transcript_path}")
-        content = self.transcript_path.read_text(encoding="utf-8")
-        logger.info("Loaded transcript with %s characters", len(content))
-        return content
+    def _tracked(self, agent: Any, manifest: Optional[BuildManifest], checkpoint: Optional[Any] = None) -> Callable[..., Any]:
+        def run(**kwargs: Any) -> Any:
+            upstream = {name: value for name, value in kwargs.items() if name != "outdir"}
+            digest = fingerprint(source_fingerprint(), agent.name, agent.fingerprint_inputs(), upstream)
+            entry = manifest.reusable(agent.name, digest) if manifest is not None and self.incremental else None
+            if entry is not None:
+                logger.info("Stage %s inputs unchanged; reusing %s", agent.name, ", ".join(entry["outputs"]) or "its result")
+                return agent.load_result(entry["result"]) if agent.outputs else None
+
+            if manifest is not None:
+                manifest.forget(agent.name)
+            sink = active_sink()
+            saved = checkpoint.load(agent.name, digest) if checkpoint is not None else None
+            if saved is not None:
+                logger.info("Stage %s restored from its checkpoint", agent.name)
+                result = saved["result"]
+                value = agent.load_result(result) if agent.outputs else None
+                if sink is not None:
+                    for name, data in saved["artifacts"].items():
+                        if data is None:
+                            sink.remove(name)
+                        else:
+                            sink.write(name, data)
+            else:
+                value = agent.run(**kwargs)
+                result = agent.dump_result(value) if agent.outputs else None
+                if checkpoint is not None:
+                    artifacts = {name: sink.read(name) for name in agent.artifacts} if sink is not None else {}
+                    checkpoint.save(agent.name, digest, result, artifacts)
+            if manifest is not None:
+                manifest.record(agent.name, digest, agent.artifacts, result, sink=sink)
+            return value
+
+        return run
+
+    def run(
+        self,
+        transcript_path: Optional[Path] = None,
+        outdir: Optional[Path] = None,
+        *,
+        on_stage: Optional[Callable[[StageResult], None]] = None,
+        sink: Optional[OutputSink] = None,
+        checkpoint: Optional[Any] = None,
+    ) -> Dict[str, StageResult]:
+        """Run the agent graph; Docs, Deck and Ops execute in parallel after Notes.
+
+        Docs, Deck and Ops also wait for the project stage, which is instant
+        unless a project store is configured.
+
+        `transcript_path` and `outdir` override the constructor values, so one
+        warm Supervisor can serve many runs. Artifacts are staged in `sink`
+        (by default a `DirectorySink` on `outdir`) and published together once
+        every stage has finished. Raises `PipelineError` afterwards if any
+        stage failed, so outputs from healthy agents are still written.
+        `checkpoint` saves each stage as it finishes (see `stages`).
+        """
+
+        transcript_path = transcript_path or self.transcript_path
+        outdir = outdir or self.outdir
+        if transcript_path is None or outdir is None:
+            raise ValueError("Supervisor.run needs a transcript path and an output directory.")
+
+        transcript = self._load_transcript(transcript_path)
+        context = {"transcript": transcript, "outdir": outdir}
+        sink = sink or DirectorySink(outdir)
+        # Only a persistent sink leaves files behind that a later run could reuse.
+        manifest = BuildManifest(outdir) if sink.persistent else None
+        with use_sink(sink):
+            results = run_dag(self.stages(manifest, checkpoint), context, on_result=on_stage)
+        sink.commit()
+        if manifest is not None:
+            manifest.save()
+        for result in results.values():
+            logger.info("Stage %-5s %-7s %.3fs", result.name, result.status, result.seconds)
+        if any(result.status == "failed" for result in results.values()):
+            raise PipelineError(results)
+        return results
+
+    def _load_transcript(self, transcript_path: Path) -> TranscriptSource:
+        if not transcript_path.exists():
+            raise FileNotFoundError(f"Transcript not found at {transcript_path}")
+        source = TranscriptSource(transcript_path)
+        logger.info("Streaming transcript of %s bytes", source.size())
+        return source
 
 
 # ---------------------------------------------------------------------------
@@ -394,7 +964,12 @@ class Supervisor:
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Generate project management artifacts from a transcript.")
-    parser.add_argument("--transcript", required=True, type=Path, help="Path to the meeting transcript text file.")
+    parser.add_argument(
+        "--transcript",
+        required=True,
+        type=Path,
+        help="Path to the meeting transcript text file (with --follow it may not exist yet).",
+    )
     parser.add_argument("--outdir", required=True, type=Path, help="Directory where outputs will be written.")
     parser.add_argument(
         "--dry-run",
@@ -407,9 +982,106 @@ def parse_args() -> argparse.Namespace:
         choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
         help="Logging verbosity.",
     )
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        default=None,
+        help="Token budget per transcript chunk for map-reduce summarization (0 disables; default NOTES_CHUNK_TOKENS or 6000).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild every artifact even when its inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Re-run this command under -X importtime and print an import-time breakdown.",
+    )
+    parser.add_argument(
+        "--project",
+        default=os.getenv("PROJECT_NAME") or None,
+        help="Project this meeting belongs to; enables the cross-meeting project store.",
+    )
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=None,
+        help="Project store file (defaults to PROJECT_STORE or ~/.local/share/agents-pm-ms/projects.sqlite3).",
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=os.getenv("RETRIEVAL_INDEX") or None,
+        help="Retrieval index directory; grounds the notes in earlier meetings and adds this one.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        default=os.getenv("METRICS_FILE") or None,
+        help="Write spans, latency histograms, token usage and estimated cost for this run as JSON.",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep watching the transcript and update the artifacts as new lines are appended.",
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=None,
+        help="Seconds between checks for new lines in --follow mode (defaults to FOLLOW_POLL or 1).",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=None,
+        help="Fold buffered turns into the notes after this many quiet seconds (defaults to FOLLOW_SETTLE or 15).",
+    )
+    parser.add_argument(
+        "--idle-exit",
+        type=float,
+        default=0.0,
+        help="Stop --follow mode after this many seconds without new lines (0 runs until Ctrl+C).",
+    )
+    add_cache_arguments(parser)
     return parser.parse_args()
 
 
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=os.getenv("LLM_CACHE", "1") == "0",
+        help="Bypass the on-disk LLM response cache.",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Empty the LLM response cache before running.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Directory for the LLM response cache (defaults to LLM_CACHE_DIR or ~/.cache/agents-pm-ms).",
+    )
+
+
+def build_cache(args: argparse.Namespace) -> Optional[ResponseCache]:
+    """Open the response cache requested on the command line, if any."""
+
+    if args.no_cache and not args.clear_cache:
+        return None
+    cache = ResponseCache.from_env(args.cache_dir)
+    if args.clear_cache:
+        cache.clear()
+    if args.no_cache:
+        cache.close()
+        return None
+    return cache
+
+
 def setup_logging(level: str) -> None:
     logging.basicConfig(
         level=getattr(logging, level.upper(), logging.INFO),
@@ -418,15 +1090,63 @@ def setup_logging(level: str) -> None:
 
 
 def main() -> None:
+    load_env()
     args = parse_args()
     setup_logging(args.log_level)
-    load_dotenv()
 
-    ensure_outdir(args.outdir)
-    provider = LLMProvider.from_env(dry_override=args.dry_run)
+    if args.profile_startup:
+        from startup_profile import profile_startup
+
+        argv = [arg for arg in sys.argv[1:] if arg != "--profile-startup"]
+        raise SystemExit(profile_startup(Path(__file__), argv))
 
-    supervisor = Supervisor(provider, transcript_path=args.transcript, outdir=args.outdir)
-    supervisor.run()
+    ensure_outdir(args.outdir)
+    cache = build_cache(args)
+    provider = LLMProvider.from_env(dry_override=args.dry_run, cache=cache)
+    store = ProjectStore.from_env(args.store) if args.project else None
+    index = None
+    if args.index:
+        from retrieval import RetrievalIndex
+
+        index = RetrievalIndex(args.index)
+
+    supervisor = Supervisor(
+        provider,
+        transcript_path=args.transcript,
+        outdir=args.outdir,
+        chunk_tokens=args.chunk_tokens,
+        incremental=not args.force,
+        store=store,
+        project=args.project,
+        index=index,
+    )
+    metrics = RunMetrics() if args.metrics_file else None
+    try:
+        with collect(metrics):
+            if args.follow:
+                from follow import follow_transcript
+
+                follow_transcript(
+                    supervisor,
+                    args.transcript,
+                    args.outdir,
+                    poll=args.poll,
+                    settle=args.settle,
+                    idle_exit=args.idle_exit,
+                )
+            else:
+                supervisor.run()
+    finally:
+        if metrics is not None:
+            metrics.write(args.metrics_file)
+            logger.info("Run metrics written to %s: %s", args.metrics_file, metrics.summary())
+
+    if cache is not None:
+        logger.info("LLM cache: %s", cache.stats())
+    if store is not None:
+        store.close()
+    if index is not None:
+        index.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+"""Import-time breakdown for `--profile-startup`.
+
+The command is re-run in a child interpreter with `-X importtime`. The
+per-module timings it prints to stderr are summarised as the slowest
+top-level imports (cumulative) and the slowest individual modules (self).
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+_PREFIX = "import time:"
+
+# SDKs that must never be imported before the first live request.
+HEAVY_MODULES = ("openai", "anthropic", "google.generativeai", "httpx")
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(stderr: str) -> Tuple[List[ImportTiming], List[str]]:
+    """Split `-X importtime` output into timings and the command's own stderr lines."""
+
+    timings: List[ImportTiming] = []
+    other: List[str] = []
+    for line in stderr.splitlines():
+        if not line.startswith(_PREFIX):
+            other.append(line)
+            continue
+        fields = line[len(_PREFIX):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # column header
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        timings.append(ImportTiming(stripped, depth, int(fields[0]), int(fields[1])))
+    return timings, other
+
+
+def run_profiled(script: Path, argv: Sequence[str]) -> Tuple[float, List[ImportTiming], List[str], int]:
+    """Run `script argv` under `-X importtime`; return wall seconds, timings, stderr lines and exit code."""
+
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", str(script), *argv],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    timings, other = parse_importtime(completed.stderr)
+    return wall, timings, other, completed.returncode
+
+
+def format_report(wall: float, timings: List[ImportTiming], top: int = 15) -> str:
+    total_us = sum(timing.cumulative_us for timing in timings if timing.depth == 0)
+    heavy = sorted({t.module for t in timings if t.module.startswith(HEAVY_MODULES)})
+    lines = [
+        f"Startup profile: {wall * 1000:.0f} ms wall, {total_us / 1000:.1f} ms in {len(timings)} imports",
+        f"Heavy SDK imports: {', '.join(heavy) if heavy else 'none'}",
+        "",
+        "Top-level imports (cumulative ms)",
+    ]
+    roots = sorted((t for t in timings if t.depth == 0), key=lambda t: t.cumulative_us, reverse=True)
+    lines += [f"  {t.cumulative_us / 1000:8.1f}  {t.module}" for t in roots[:top]]
+    lines += ["", "Slowest modules (self ms)"]
+    slowest = sorted(timings, key=lambda t: t.self_us, reverse=True)
+    lines += [f"  {t.self_us / 1000:8.1f}  {t.module}" for t in slowest[:top]]
+    return "\n".join(lines)
+
+
+def profile_startup(script: Path, argv: Sequence[str], top: int = 15) -> int:
+    wall, timings, other, code = run_profiled(script, argv)
+    if other:
+        print("\n".join(other), file=sys.stderr)
+    print(format_report(wall, timings, top))
+    return code
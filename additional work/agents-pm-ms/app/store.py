@@ -0,0 +1,551 @@
+"""Cross-meeting project store for action items and risks.
+
+Every run of a project's meeting series is ingested into one SQLite file. A
+recurring action or risk is merged into the item it repeats instead of being
+added again. An item matches when its normalised text hashes to the same key,
+or when a MinHash signature over its words is close enough (found through
+LSH buckets, so a merge never scans the whole project). Actions are indexed
+on project, owner, due date and tags, so questions such as "open items for
+Zara due this week" are single indexed queries.
+
+Usage:
+    python app/store.py --project apollo actions --owner Zara --due-this-week
+    python app/store.py --project apollo risks
+    python app/store.py --project apollo done 12
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from models import ActionItem, MeetingSummary
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = Path.home() / ".local" / "share" / "agents-pm-ms" / "projects.sqlite3"
+
+# ---------------------------------------------------------------------------
+# Near-duplicate detection
+# ---------------------------------------------------------------------------
+
+_NUM_PERM = 64
+_BANDS = 16  # 16 bands of 4 rows: items at Jaccard 0.6 share a bucket ~90% of the time
+_ROWS = _NUM_PERM // _BANDS
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20251001)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(_NUM_PERM)]
+
+_SPEAKER = re.compile(r"^\s*[A-Z][a-zA-Z]+(?:\s*\([^)]*\))?\s*:")
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by date due for from in is it of on or our owner owns the this to we with".split()
+)
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Lower-case content words of `text` without speaker prefix, dates or filler."""
+
+    stripped = _ISO_DATE.sub(" ", _SPEAKER.sub(" ", text))
+    tokens = [word for word in _WORD.findall(stripped.lower()) if word not in _STOPWORDS]
+    # A bare "Name:" title keeps its words rather than collapsing into every other empty title.
+    return tokens or _WORD.findall(text.lower())
+
+
+def normalized_key(text: str) -> str:
+    return hashlib.sha1(" ".join(normalize_tokens(text)).encode("utf-8")).hexdigest()
+
+
+def minhash(tokens: Iterable[str]) -> List[int]:
+    hashes = [int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big") for token in set(tokens)]
+    if not hashes:
+        return [_PRIME] * _NUM_PERM
+    return [min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(left: Sequence[int], right: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of the word sets behind two signatures."""
+
+    return sum(1 for a, b in zip(left, right) if a == b) / _NUM_PERM
+
+
+def _buckets(signature: Sequence[int]) -> List[Tuple[int, str]]:
+    return [
+        (band, hashlib.sha1(repr(signature[band * _ROWS : (band + 1) * _ROWS]).encode()).hexdigest()[:16])
+        for band in range(_BANDS)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Records
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class StoredAction:
+    id: int
+    title: str
+    owner: str
+    due_date: Optional[str]
+    tags: List[str]
+    dependency: Optional[str]
+    status: str
+    first_meeting: str
+    last_meeting: str
+    occurrences: int
+
+    def is_overdue(self, today: Optional[date] = None) -> bool:
+        return bool(self.due_date) and self.due_date < (today or date.today()).isoformat()
+
+
+@dataclass
+class StoredRisk:
+    id: int
+    text: str
+    status: str
+    first_meeting: str
+    last_meeting: str
+    occurrences: int
+
+
+@dataclass
+class ProjectBacklog:
+    """Open actions and risks of a project as of one meeting."""
+
+    project: str
+    meeting: str
+    actions: List[StoredAction] = field(default_factory=list)
+    risks: List[StoredRisk] = field(default_factory=list)
+
+    def carried_actions(self) -> List[StoredAction]:
+        """Open actions last raised in an earlier meeting."""
+
+        return [item for item in self.actions if item.last_meeting != self.meeting]
+
+    def carried_risks(self) -> List[StoredRisk]:
+        return [item for item in self.risks if item.last_meeting != self.meeting]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProjectBacklog":
+        return cls(
+            project=data["project"],
+            meeting=data["meeting"],
+            actions=[StoredAction(**item) for item in data["actions"]],
+            risks=[StoredRisk(**item) for item in data["risks"]],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    held_on TEXT NOT NULL,
+    status TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    ingested_at REAL NOT NULL,
+    UNIQUE (project, source)
+);
+CREATE TABLE IF NOT EXISTS actions (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    key TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    title TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    due_date TEXT,
+    dependency TEXT,
+    status TEXT NOT NULL DEFAULT 'open',
+    first_meeting TEXT NOT NULL,
+    last_meeting TEXT NOT NULL,
+    occurrences INTEGER NOT NULL DEFAULT 1,
+    updated_at REAL NOT NULL,
+    UNIQUE (project, key)
+);
+CREATE TABLE IF NOT EXISTS action_tags (
+    action_id INTEGER NOT NULL REFERENCES actions (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (action_id, tag)
+);
+CREATE TABLE IF NOT EXISTS risks (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    key TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    text TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'open',
+    first_meeting TEXT NOT NULL,
+    last_meeting TEXT NOT NULL,
+    occurrences INTEGER NOT NULL DEFAULT 1,
+    updated_at REAL NOT NULL,
+    UNIQUE (project, key)
+);
+CREATE TABLE IF NOT EXISTS lsh (
+    project TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    item_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_actions_owner ON actions (project, owner, status, due_date);
+CREATE INDEX IF NOT EXISTS idx_actions_due ON actions (project, status, due_date);
+CREATE INDEX IF NOT EXISTS idx_action_tags_tag ON action_tags (tag, action_id);
+CREATE INDEX IF NOT EXISTS idx_risks_project ON risks (project, status);
+CREATE INDEX IF NOT EXISTS idx_meetings_project ON meetings (project, held_on);
+CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON lsh (project, kind, band, bucket);
+"""
+
+_ACTION_COLUMNS = "id, title, owner, due_date, dependency, status, first_meeting, last_meeting, occurrences"
+
+
+class ProjectStore:
+    """SQLite store of meetings, deduplicated action items and risks per project."""
+
+    def __init__(self, path: Path, *, threshold: float = 0.6) -> None:
+        self.path = Path(path)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls, path: Optional[Path] = None) -> "ProjectStore":
+        """Open the store at `path`, `PROJECT_STORE` or the default location."""
+
+        path = path or Path(os.getenv("PROJECT_STORE") or DEFAULT_STORE_PATH)
+        return cls(path, threshold=float(os.getenv("PROJECT_DEDUP_THRESHOLD", "0.6")))
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+    def ingest(
+        self,
+        project: str,
+        meeting: str,
+        summary: MeetingSummary,
+        actions: Iterable[ActionItem],
+        *,
+        source: str,
+        held_on: Optional[str] = None,
+    ) -> bool:
+        """Record one meeting; returns False if `source` was already ingested.
+
+        `held_on` defaults to an ISO date in the meeting name, else today.
+        """
+
+        now = time.time()
+        dated = _ISO_DATE.search(meeting)
+        held_on = held_on or (dated.group(0) if dated else date.today().isoformat())
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO meetings (project, name, source, held_on, status, summary, ingested_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (project, meeting, source, held_on, summary.status,
+                 json.dumps(asdict(summary)), now),
+            )
+            if cursor.rowcount == 0:
+                logger.info("Meeting %s is already in project '%s'; not ingesting again.", meeting, project)
+                return False
+            merged = sum(self._upsert_action(project, meeting, item, now) for item in actions)
+            merged += sum(self._upsert_risk(project, meeting, risk, now) for risk in summary.risks)
+        logger.info("Ingested meeting %s into project '%s' (%s recurring item(s) merged)", meeting, project, merged)
+        return True
+
+    def _match(self, table: str, project: str, key: str, signature: List[int]) -> Optional[int]:
+        """Return the id of the item `key`/`signature` repeats, if any."""
+
+        row = self._conn.execute(f"SELECT id FROM {table} WHERE project = ? AND key = ?", (project, key)).fetchone()
+        if row is not None:
+            return row[0]
+        candidates = set()
+        for band, bucket in _buckets(signature):
+            candidates.update(
+                item_id
+                for (item_id,) in self._conn.execute(
+                    "SELECT item_id FROM lsh WHERE project = ? AND kind = ? AND band = ? AND bucket = ?",
+                    (project, table, band, bucket),
+                )
+            )
+        best, best_score = None, self.threshold
+        for item_id in sorted(candidates):
+            (stored,) = self._conn.execute(f"SELECT signature FROM {table} WHERE id = ?", (item_id,)).fetchone()
+            score = similarity(signature, json.loads(stored))
+            if score >= best_score:
+                best, best_score = item_id, score
+        return best
+
+    def _index(self, table: str, project: str, item_id: int, signature: List[int]) -> None:
+        self._conn.executemany(
+            "INSERT INTO lsh (project, kind, band, bucket, item_id) VALUES (?, ?, ?, ?, ?)",
+            [(project, table, band, bucket, item_id) for band, bucket in _buckets(signature)],
+        )
+
+    def _upsert_action(self, project: str, meeting: str, item: ActionItem, now: float) -> bool:
+        key = normalized_key(item.title)
+        signature = minhash(normalize_tokens(item.title))
+        existing = self._match("actions", project, key, signature)
+        owner = item.owner or "Unassigned"
+        if existing is None:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO actions (project, key, signature, title, owner, due_date, dependency,
+                                     first_meeting, last_meeting, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (project, key, json.dumps(signature), item.title, owner, item.due_date, item.dependency,
+                 meeting, meeting, now),
+            )
+            action_id = cursor.lastrowid
+            self._index("actions", project, action_id, signature)
+        else:
+            action_id = existing
+            # The latest meeting wins for owner, due date and dependency when it states them.
+            self._conn.execute(
+                """
+                UPDATE actions SET
+                    title = ?,
+                    owner = CASE WHEN ? = 'Unassigned' THEN owner ELSE ? END,
+                    due_date = COALESCE(?, due_date),
+                    dependency = COALESCE(?, dependency),
+                    last_meeting = ?,
+                    occurrences = occurrences + 1,
+                    updated_at = ?
+                WHERE id = ?
+                """,
+                (item.title, owner, owner, item.due_date, item.dependency, meeting, now, action_id),
+            )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO action_tags (action_id, tag) VALUES (?, ?)", [(action_id, tag) for tag in item.tags]
+        )
+        return existing is not None
+
+    def _upsert_risk(self, project: str, meeting: str, text: str, now: float) -> bool:
+        key = normalized_key(text)
+        signature = minhash(normalize_tokens(text))
+        existing = self._match("risks", project, key, signature)
+        if existing is None:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO risks (project, key, signature, text, first_meeting, last_meeting, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (project, key, json.dumps(signature), text, meeting, meeting, now),
+            )
+            self._index("risks", project, cursor.lastrowid, signature)
+            return False
+        self._conn.execute(
+            "UPDATE risks SET text = ?, last_meeting = ?, occurrences = occurrences + 1, updated_at = ? WHERE id = ?",
+            (text, meeting, now, existing),
+        )
+        return True
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def actions(
+        self,
+        project: str,
+        *,
+        status: Optional[str] = "open",
+        owner: Optional[str] = None,
+        tag: Optional[str] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[StoredAction]:
+        """Actions of `project` filtered by status, owner, tag and due-date range (ISO dates, inclusive)."""
+
+        clauses, params = ["a.project = ?"], [project]
+        if status is not None:
+            clauses.append("a.status = ?")
+            params.append(status)
+        if owner is not None:
+            clauses.append("a.owner = ?")
+            params.append(owner)
+        if tag is not None:
+            clauses.append("a.id IN (SELECT action_id FROM action_tags WHERE tag = ?)")
+            params.append(tag)
+        if due_from is not None:
+            clauses.append("a.due_date >= ?")
+            params.append(due_from)
+        if due_to is not None:
+            clauses.append("a.due_date <= ?")
+            params.append(due_to)
+        sql = (
+            f"SELECT {', '.join('a.' + column for column in _ACTION_COLUMNS.split(', '))} FROM actions a "
+            f"WHERE {' AND '.join(clauses)} ORDER BY a.due_date IS NULL, a.due_date, a.id"
+        )
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            tags: Dict[int, List[str]] = {}
+            if rows:
+                ids = [row[0] for row in rows]
+                for action_id, tag_name in self._conn.execute(
+                    f"SELECT action_id, tag FROM action_tags WHERE action_id IN ({','.join('?' * len(ids))}) ORDER BY tag",
+                    ids,
+                ):
+                    tags.setdefault(action_id, []).append(tag_name)
+        return [
+            StoredAction(
+                id=row[0], title=row[1], owner=row[2], due_date=row[3], tags=tags.get(row[0], []),
+                dependency=row[4], status=row[5], first_meeting=row[6], last_meeting=row[7], occurrences=row[8],
+            )
+            for row in rows
+        ]
+
+    def risks(self, project: str, *, status: Optional[str] = "open") -> List[StoredRisk]:
+        sql = "SELECT id, text, status, first_meeting, last_meeting, occurrences FROM risks WHERE project = ?"
+        params: List[Any] = [project]
+        if status is not None:
+            sql += " AND status = ?"
+            params.append(status)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY occurrences DESC, id", params).fetchall()
+        return [StoredRisk(*row) for row in rows]
+
+    def meetings(self, project: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, held_on, status FROM meetings WHERE project = ? ORDER BY held_on, id", (project,)
+            ).fetchall()
+        return [{"name": name, "held_on": held_on, "status": status} for name, held_on, status in rows]
+
+    def backlog(self, project: str, meeting: str) -> ProjectBacklog:
+        return ProjectBacklog(project, meeting, self.actions(project), self.risks(project))
+
+    def set_status(self, kind: str, item_id: int, status: str) -> bool:
+        """Mark an action or risk (`kind` is "actions" or "risks") e.g. done/closed or open again."""
+
+        if kind not in ("actions", "risks"):
+            raise ValueError(f"Unknown item kind '{kind}'.")
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE {kind} SET status = ?, updated_at = ? WHERE id = ?", (status, time.time(), item_id)
+            )
+        return cursor.rowcount > 0
+
+    def revision(self, project: str) -> List[Any]:
+        """Changes whenever the project's stored items do; used in build fingerprints."""
+
+        with self._lock:
+            return [
+                list(self._conn.execute(f"SELECT COUNT(*), MAX(updated_at) FROM {table} WHERE project = ?", (project,)).fetchone())
+                for table in ("actions", "risks")
+            ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# ---------------------------------------------------------------------------
+# CLI entry point
+# ---------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Query the cross-meeting project store.")
+    parser.add_argument("--store", type=Path, default=None, help="Store file (defaults to PROJECT_STORE).")
+    parser.add_argument("--project", default=os.getenv("PROJECT_NAME"), required=not os.getenv("PROJECT_NAME"))
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    actions = commands.add_parser("actions", help="List action items (open by default).")
+    actions.add_argument("--owner")
+    actions.add_argument("--tag")
+    actions.add_argument("--status", default="open", help="open, done, or 'all'.")
+    actions.add_argument("--due-this-week", action="store_true", help="Due between Monday and Sunday of this week.")
+    actions.add_argument("--overdue", action="store_true", help="Due before today.")
+    actions.add_argument("--limit", type=int)
+
+    risks = commands.add_parser("risks", help="List risks (open by default).")
+    risks.add_argument("--status", default="open", help="open, closed, or 'all'.")
+
+    commands.add_parser("meetings", help="List ingested meetings.")
+
+    for name, kind, status in (("done", "actions", "done"), ("close-risk", "risks", "closed"), ("reopen", "actions", "open")):
+        command = commands.add_parser(name, help=f"Mark {kind} as {status}.")
+        command.add_argument("ids", nargs="+", type=int)
+        command.set_defaults(kind=kind, new_status=status)
+    return parser.parse_args()
+
+
+def main() -> int:
+    from providers import load_env
+
+    load_env()
+    args = parse_args()
+    store = ProjectStore.from_env(args.store)
+    try:
+        if args.command == "actions":
+            today = date.today()
+            due_from = due_to = None
+            if args.due_this_week:
+                monday = today - timedelta(days=today.weekday())
+                due_from, due_to = monday.isoformat(), (monday + timedelta(days=6)).isoformat()
+            if args.overdue:
+                due_to = (today - timedelta(days=1)).isoformat()
+            rows: List[Any] = store.actions(
+                args.project,
+                status=None if args.status == "all" else args.status,
+                owner=args.owner,
+                tag=args.tag,
+                due_from=due_from,
+                due_to=due_to,
+                limit=args.limit,
+            )
+            lines = [
+                f"#{a.id:<5} {a.status:<5} {a.due_date or '—':<10} {a.owner:<12} {a.title}"
+                f"{' [' + ', '.join(a.tags) + ']' if a.tags else ''} (×{a.occurrences})"
+                for a in rows
+            ]
+        elif args.command == "risks":
+            rows = store.risks(args.project, status=None if args.status == "all" else args.status)
+            lines = [f"#{r.id:<5} {r.status:<6} ×{r.occurrences:<3} {r.text} (since {r.first_meeting})" for r in rows]
+        elif args.command == "meetings":
+            rows = store.meetings(args.project)
+            lines = [f"{m['held_on']}  {m['status']:<6} {m['name']}" for m in rows]
+        else:
+            missing = [item_id for item_id in args.ids if not store.set_status(args.kind, item_id, args.new_status)]
+            if missing:
+                print(f"Unknown id(s): {', '.join(map(str, missing))}")
+            return 1 if missing else 0
+
+        if args.json:
+            print(json.dumps([row if isinstance(row, dict) else asdict(row) for row in rows], indent=2))
+        else:
+            print("\n".join(lines) if lines else "No matching items.")
+        return 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,115 @@
+"""Process-wide registry of compiled prompt and document templates.
+
+Every `*.md` under `app/templates/` and `app/agents/` is read and compiled to
+a `string.Template` once, the first time the registry is used. Later renders
+only `stat` the file: a template whose mtime or size changed is recompiled,
+so edits show up in a running service without a restart. Set
+`TEMPLATE_RELOAD=0` to skip the check entirely.
+
+`render_prompt` returns a `providers.Prompt` whose stable prefix is the text
+before the template's first placeholder. Prompt templates therefore keep
+their instructions first and the per-call values last, so the prefix can be
+cached by the provider.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from string import Template
+from typing import Dict, Iterable, Optional, Tuple
+
+from providers.prompts import Prompt
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIRS = (Path(__file__).parent / "templates", Path(__file__).parent / "agents")
+
+_MUSTACHE_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    path: Path
+    stamp: Tuple[int, int]
+    template: Template
+    # Literal text before the first placeholder, and the template for the rest.
+    head: str
+    tail: Template
+
+    def render(self, **context: object) -> str:
+        return self.template.safe_substitute(**context)
+
+    def render_prompt(self, **context: object) -> Prompt:
+        return Prompt(self.head, self.tail.safe_substitute(**context))
+
+
+def compile_template(path: Path) -> CompiledTemplate:
+    """Read `path` and compile it; `{{ name }}` placeholders become `$name` ones."""
+
+    stat = path.stat()
+    source = _MUSTACHE_PLACEHOLDER.sub(r"${\1}", path.read_text(encoding="utf-8"))
+    template = Template(source)
+    first = next(
+        (match for match in template.pattern.finditer(source) if match.group("named") or match.group("braced")),
+        None,
+    )
+    split = first.start() if first else len(source)
+    head = Template(source[:split]).safe_substitute()  # resolves `$$` escapes
+    return CompiledTemplate(path, (stat.st_mtime_ns, stat.st_size), template, head, Template(source[split:]))
+
+
+class TemplateRegistry:
+    """Compiled templates keyed by resolved path, recompiled when the file changes."""
+
+    def __init__(self, directories: Iterable[Path] = (), *, reload: bool = True) -> None:
+        self.reload = reload
+        self._lock = threading.Lock()
+        self._templates: Dict[Path, CompiledTemplate] = {}
+        for directory in directories:
+            for path in sorted(Path(directory).glob("*.md")):
+                compiled = compile_template(path.resolve())
+                self._templates[compiled.path] = compiled
+
+    def get(self, path: Path) -> CompiledTemplate:
+        key = Path(path).resolve()
+        compiled = self._templates.get(key)
+        if compiled is not None and not self.reload:
+            return compiled
+        stat = key.stat()
+        if compiled is not None and compiled.stamp == (stat.st_mtime_ns, stat.st_size):
+            return compiled
+        with self._lock:
+            compiled = compile_template(key)
+            if key in self._templates:
+                logger.info("Reloaded template %s", key.name)
+            self._templates[key] = compiled
+        return compiled
+
+    def render(self, path: Path, **context: object) -> str:
+        return self.get(path).render(**context)
+
+    def render_prompt(self, path: Path, **context: object) -> Prompt:
+        return self.get(path).render_prompt(**context)
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+
+_registry: Optional[TemplateRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def default_registry() -> TemplateRegistry:
+    """The registry preloaded with the bundled templates and agent prompts."""
+
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TemplateRegistry(TEMPLATE_DIRS, reload=os.getenv("TEMPLATE_RELOAD", "1") != "0")
+    return _registry
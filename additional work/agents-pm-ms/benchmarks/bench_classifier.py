@@ -0,0 +1,131 @@
+"""Compare the legacy multi-scan heuristics with the single-pass classifier.
+
+Usage:
+    python benchmarks/bench_classifier.py --lines 200000 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from classifier import TranscriptClassifier  # noqa: E402
+from run_supervisor import chunk_sentences  # noqa: E402
+
+SPEAKERS = ["Alex", "Priya", "Zara", "Miguel", "Jamie", "Team"]
+FILLER = [
+    "We walked through the sprint board and the burndown looks healthy.",
+    "The vendor demo went well and the team liked the reporting module.",
+    "Let's keep the status page updated after every release.",
+    "Integration testing continues on the staging environment.",
+]
+SIGNALS = [
+    "Decision: we approved the revised rollout plan.",
+    "Do we need legal sign-off before the pilot?",
+    "Current risk is vendor latency on the data feed.",
+    "Action – prepare the client briefing pack by 2025-10-0{d}.",
+    "Follow up: {owner} owns the migration runbook by 2025-11-1{d}.",
+    "Todo – schedule the architecture review. Owner {owner}.",
+]
+
+
+def synthetic_transcript(lines: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(lines):
+        speaker = rng.choice(SPEAKERS)
+        if rng.random() < 0.05:
+            text = rng.choice(SIGNALS).format(d=rng.randint(1, 9), owner=rng.choice(SPEAKERS))
+        else:
+            text = " ".join(rng.sample(FILLER, 2))
+        out.append(f"{speaker}: {text}")
+    return "\n".join(out)
+
+
+# ---------------------------------------------------------------------------
+# Pre-classifier implementation, kept verbatim for comparison
+# ---------------------------------------------------------------------------
+
+
+def legacy_detect_owner(line: str) -> str:
+    owner_match = re.search(r"(?:(?:owner|assigned|to)\s*(?:to)?\s*:?\s*)([A-Z][a-zA-Z]+)", line)
+    if owner_match:
+        return owner_match.group(1)
+    prefix_match = re.match(r"([A-Z][a-zA-Z]+)[:\-]", line)
+    if prefix_match:
+        return prefix_match.group(1)
+    return "Unassigned"
+
+
+def legacy(transcript: str) -> tuple:
+    sentences = chunk_sentences(transcript)
+    bullets = sentences[:6]
+    decisions = [s for s in sentences if re.search(r"decided|approved|confirmed", s, re.IGNORECASE)][:3]
+    questions = [s for s in sentences if "?" in s][:3]
+    risks = [s for s in sentences if re.search(r"risk|concern|blocked|slip", s, re.IGNORECASE)][:3]
+
+    action_lines = []
+    for line in transcript.splitlines():
+        if re.search(r"^(?:action|todo|task|follow up)\b", line.strip(), re.IGNORECASE):
+            action_lines.append(line.strip())
+        elif "action" in line.lower() and ":" in line:
+            action_lines.append(line.strip())
+    actions = []
+    for line in action_lines:
+        owner = legacy_detect_owner(line)
+        title = re.sub(r"(?i)(action|todo|task|follow up)[^:]*:?", "", line).strip() or "Document action item"
+        date_match = re.search(r"(\d{4}-\d{2}-\d{2})", line)
+        tags = [tag for tag in ("risk", "client") if tag in line.lower()]
+        actions.append((title, owner, date_match.group(1) if date_match else None, tags))
+    return bullets, decisions, questions, risks, actions
+
+
+def single_pass(transcript: str, classifier: TranscriptClassifier) -> tuple:
+    found = classifier.classify(chunk_sentences(transcript), transcript.splitlines())
+    actions = [(a.title, a.owner, a.due_date, a.tags) for a in found.actions]
+    return found.bullets, found.decisions, found.questions, found.risks, actions
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    transcript = synthetic_transcript(args.lines, args.seed)
+    classifier = TranscriptClassifier()
+    if legacy(transcript) != single_pass(transcript, classifier):
+        print("Outputs differ between legacy and single-pass implementations.", file=sys.stderr)
+        return 1
+
+    # chunk_sentences is shared by both paths, so time it separately.
+    split = best_of(args.repeat, lambda: chunk_sentences(transcript))
+    old = best_of(args.repeat, lambda: legacy(transcript))
+    new = best_of(args.repeat, lambda: single_pass(transcript, classifier))
+    print(f"transcript: {len(transcript) / 1e6:.1f} MB, {args.lines} lines")
+    print(f"chunk_sentences (shared): {split:.3f}s")
+    print(f"legacy:      {old:.3f}s ({old - split:.3f}s excluding sentence split)")
+    print(f"single-pass: {new:.3f}s ({new - split:.3f}s excluding sentence split)")
+    print(f"speedup:     {old / new:.2f}x overall, {(old - split) / max(new - split, 1e-9):.2f}x classification")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,148 @@
+"""Separate vs coalesced LLM drafting of the Docs/Deck/Ops artifacts.
+
+Starts `fake_llm.py` in-process (or uses `--server`) and points the real
+OpenAI or Anthropic SDK at it. The notes stage runs once per synthetic
+transcript in dry-run mode, so every mode drafts from the same summaries.
+Then, for each `ARTIFACTS_LLM` mode, `--runs` times: the Docs, Deck and Ops
+agents run in parallel, as in the pipeline, with a fresh `ArtifactWriter`
+and artifacts kept in memory. Reported per mode: stage latency percentiles,
+LLM calls, prompt/cached/completion tokens, and how many files needed the
+per-file fallback call or the template.
+
+Usage:
+    python benchmarks/coalesce_benchmark.py --runs 20
+    python benchmarks/coalesce_benchmark.py --provider anthropic --latency lognormal:800,0.5 --tokens-per-second 80
+    python benchmarks/coalesce_benchmark.py --section-defect-rate 0.2 --output coalesce.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextvars
+import json
+import logging
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import synthetic  # noqa: E402
+from artifacts import ArtifactWriter  # noqa: E402
+from fake_llm import FakeLLMServer, add_fake_arguments, fake_config  # noqa: E402
+from ingest import TranscriptSource  # noqa: E402
+from load_test import configure, percentiles  # noqa: E402
+from models import ActionItem, MeetingSummary  # noqa: E402
+from outputs import MemorySink, use_sink  # noqa: E402
+from providers import LLMProvider  # noqa: E402
+from providers.telemetry import RunMetrics, collect  # noqa: E402
+from run_supervisor import DeckAgent, DocsAgent, NotesAgent, OpsAgent  # noqa: E402
+
+COUNTERS = ("llm_calls", "prompt_tokens", "cached_prompt_tokens", "completion_tokens", "artifact_fallbacks", "artifact_template_fallbacks")
+
+
+def summaries(paths: List[Path]) -> List[Tuple[MeetingSummary, List[ActionItem]]]:
+    """Dry-run notes for each transcript, the input both modes draft from."""
+
+    notes_agent = NotesAgent(LLMProvider.from_env(dry_override=True, cache=None))
+    results = []
+    for path in paths:
+        outdir = Path("coalesce") / path.stem
+        with use_sink(MemorySink(outdir)):
+            results.append(notes_agent.run(TranscriptSource(path), outdir))
+    return results
+
+
+def one_run(provider: LLMProvider, mode: str, summary: MeetingSummary, actions: List[ActionItem]) -> Dict[str, Any]:
+    writer = ArtifactWriter(provider, mode)
+    agents = [DocsAgent(writer), DeckAgent(writer), OpsAgent(writer)]
+    outdir = Path("coalesce") / mode
+    metrics = RunMetrics()
+    started = time.perf_counter()
+    with collect(metrics), use_sink(MemorySink(outdir)):
+        with ThreadPoolExecutor(max_workers=len(agents)) as pool:
+            # Each stage thread gets its own copy of the run's context, as in `run_dag`.
+            futures = [
+                pool.submit(contextvars.copy_context().run, agent.run, summary, actions, outdir) for agent in agents
+            ]
+            for future in futures:
+                future.result()
+    return {"seconds": time.perf_counter() - started, "summary": metrics.summary()}
+
+
+def measure(provider: LLMProvider, mode: str, inputs: List[Tuple[MeetingSummary, List[ActionItem]]], runs: int) -> Dict[str, Any]:
+    results = [one_run(provider, mode, *inputs[index % len(inputs)]) for index in range(runs)]
+    totals = {name: sum(result["summary"].get(name, 0) for result in results) for name in COUNTERS}
+    return {
+        "runs": runs,
+        "latency": percentiles([result["seconds"] for result in results]),
+        "totals": totals,
+        "per_run": {name: round(value / max(1, runs), 1) for name, value in totals.items()},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare separate and coalesced LLM drafting of the Docs/Deck/Ops artifacts.")
+    parser.add_argument("--provider", choices=["openai", "anthropic"], default="openai")
+    parser.add_argument("--server", default=None, help="Use an already running fake_llm.py instead of starting one.")
+    parser.add_argument("--runs", type=int, default=10, help="Drafting runs per mode.")
+    parser.add_argument("--size", default="8KB", help="Synthetic transcript size.")
+    parser.add_argument("--transcripts", type=int, default=4, help="Distinct transcripts to cycle through.")
+    parser.add_argument("--output", type=Path, default=None, help="Write the report as JSON.")
+    parser.add_argument("--verbose", action="store_true")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR, format="%(levelname)s %(message)s")
+
+    server: Optional[FakeLLMServer] = None
+    if args.server:
+        url = args.server.rstrip("/")
+    else:
+        server = FakeLLMServer(fake_config(args)).start()
+        url = server.url
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="coalesce-") as tmp:
+            size = synthetic.parse_size(args.size)
+            paths = [synthetic.write(Path(tmp) / f"transcript_{seed}.txt", size, seed) for seed in range(1, args.transcripts + 1)]
+            inputs = summaries(paths)
+        provider = configure(args.provider, url)
+        modes = {mode: measure(provider, mode, inputs, args.runs) for mode in ("separate", "coalesced")}
+    finally:
+        if server is not None:
+            server.stop()
+
+    separate, coalesced = modes["separate"], modes["coalesced"]
+
+    def change(value: float, baseline: float) -> Optional[float]:
+        return round(value / baseline - 1, 4) if baseline else None
+
+    report = {
+        "provider": args.provider,
+        "transcript_size": args.size,
+        "section_defect_rate": args.section_defect_rate,
+        **modes,
+        "coalesced_vs_separate": {
+            "p50_latency": change(coalesced["latency"]["p50"], separate["latency"]["p50"]),
+            "p95_latency": change(coalesced["latency"]["p95"], separate["latency"]["p95"]),
+            **{
+                name: change(coalesced["totals"][name], separate["totals"][name])
+                for name in ("llm_calls", "prompt_tokens", "completion_tokens")
+            },
+        },
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
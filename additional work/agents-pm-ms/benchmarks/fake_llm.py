@@ -0,0 +1,878 @@
+"""Local stand-in for the OpenAI and Anthropic HTTP APIs, for load tests.
+
+The server speaks enough of both wire formats for the real SDK clients used by
+`LLMProvider`:
+
+- `POST /v1/chat/completions` (OpenAI), plain or streamed as SSE, with JSON
+  schema `response_format` and `stream_options.include_usage`;
+- `POST /v1/messages` (Anthropic), plain or streamed as SSE events, with
+  forced tool calls for structured output and `cache_control` breakpoints;
+- the batch APIs used by bulk mode: OpenAI `POST /v1/files`,
+  `POST /v1/batches`, `GET /v1/batches/{id}` and `GET /v1/files/{id}/content`,
+  and Anthropic `POST /v1/messages/batches`, `GET /v1/messages/batches/{id}`
+  and `GET /v1/messages/batches/{id}/results`. A batch ends `--batch-delay`
+  seconds after it is submitted, and failures are injected per request.
+
+Responses are shaped like NotesAgent output (Markdown sections plus an
+ACTION_ITEMS block, or a JSON document for a requested schema), or like the
+artifact files a `=== FILE: <name> ===` prompt asks for, so the pipeline
+parses them as it would live ones. `--section-defect-rate` drops a share of
+those files to exercise the per-file fallback. Time to first token is drawn from
+`--latency` and generation runs at `--tokens-per-second`. A share of requests
+can fail with 429 (with `retry-after-ms`) or 5xx. Token usage is estimated
+like `providers.estimate_tokens` and includes simulated prompt-prefix cache
+hits. `GET /stats` returns the totals.
+
+Point the pipeline at it with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8787/v1 OPENAI_API_KEY=fake
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8787 ANTHROPIC_API_KEY=fake
+
+Usage:
+    python benchmarks/fake_llm.py --port 8787 --latency lognormal:400,0.5 --rate-429 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from providers.tokens import CHARS_PER_TOKEN, estimate_tokens  # noqa: E402
+
+_WORD = re.compile(r"[A-Za-z][a-z]{3,}")
+_FILE_NAME = re.compile(r"`([\w.-]+\.md)`")
+_GET_ROUTES = [
+    (re.compile(r"/v1/batches/(?P<id>[\w-]+)$"), "_get_openai_batch"),
+    (re.compile(r"/v1/files/(?P<id>[\w-]+)/content$"), "_get_file_content"),
+    (re.compile(r"/v1/messages/batches/(?P<id>[\w-]+)$"), "_get_anthropic_batch"),
+    (re.compile(r"/v1/messages/batches/(?P<id>[\w-]+)/results$"), "_get_anthropic_results"),
+]
+
+
+# ---------------------------------------------------------------------------
+# Behaviour knobs
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Latency:
+    """A time-to-first-token distribution in milliseconds.
+
+    `fixed:MS`, `uniform:LOW,HIGH`, `normal:MEAN,SD` or `lognormal:MEDIAN,SIGMA`.
+    """
+
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, args = spec.partition(":")
+        values = [float(value) for value in args.split(",") if value.strip()] if args else []
+        if kind == "fixed" and len(values) == 1:
+            return cls(kind, values[0])
+        if kind in ("uniform", "normal", "lognormal") and len(values) == 2:
+            return cls(kind, values[0], values[1])
+        raise ValueError(f"Invalid latency spec '{spec}'; use fixed:MS, uniform:LO,HI, normal:MEAN,SD or lognormal:MEDIAN,SIGMA.")
+
+    def sample(self, rng: random.Random) -> float:
+        """One draw, in seconds."""
+
+        if self.kind == "uniform":
+            ms = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            ms = rng.gauss(self.a, self.b)
+        elif self.kind == "lognormal":
+            ms = self.a * math.exp(rng.gauss(0.0, self.b))
+        else:
+            ms = self.a
+        return max(0.0, ms) / 1000
+
+
+@dataclass
+class FakeConfig:
+    latency: Latency = field(default_factory=Latency)
+    tokens_per_second: float = 0.0  # 0 generates instantly
+    completion_tokens: int = 300
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    retry_after_ms: int = 200
+    # Prefixes shorter than this are never cached, as with the real APIs.
+    cache_min_tokens: int = 1024
+    # Seconds from submitting a batch until it has ended.
+    batch_delay: float = 1.0
+    # Share of requested artifact files left out of a response.
+    section_defect_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+# ---------------------------------------------------------------------------
+# Accounting
+# ---------------------------------------------------------------------------
+
+
+class FakeStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.streamed = 0
+            self.batched = 0
+            self.statuses: Dict[int, int] = {}
+            self.prompt_tokens = 0
+            self.cached_prompt_tokens = 0
+            self.cache_write_tokens = 0
+            self.completion_tokens = 0
+
+    def request(self, status: int, *, stream: bool = False, batch: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+            self.streamed += int(stream)
+            self.batched += int(batch)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def usage(self, prompt: int, cached: int, written: int, completion: int) -> None:
+        with self._lock:
+            self.prompt_tokens += prompt
+            self.cached_prompt_tokens += cached
+            self.cache_write_tokens += written
+            self.completion_tokens += completion
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "streamed": self.streamed,
+                "batched": self.batched,
+                "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+                "prompt_tokens": self.prompt_tokens,
+                "cached_prompt_tokens": self.cached_prompt_tokens,
+                "cache_write_tokens": self.cache_write_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+
+class PrefixCache:
+    """Remembers prompt prefixes by hash, like the providers' prompt caches (LRU-bounded)."""
+
+    def __init__(self, min_tokens: int, capacity: int = 100_000) -> None:
+        self.min_tokens = min_tokens
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+
+    def explicit(self, prefix: str) -> Tuple[int, int]:
+        """Anthropic-style breakpoint: `(cache read, cache write)` tokens for `prefix`."""
+
+        tokens = estimate_tokens(prefix)
+        if not prefix or tokens < self.min_tokens:
+            return 0, 0
+        return (tokens, 0) if self._touch(_digest(prefix.encode("utf-8"))) else (0, tokens)
+
+    def automatic(self, prompt: str) -> int:
+        """OpenAI-style: cached tokens for the longest seen prefix, in 128-token steps past the minimum."""
+
+        data = prompt.encode("utf-8")
+        step = 128 * CHARS_PER_TOKEN
+        cached = 0
+        hasher = hashlib.sha1()
+        position = 0
+        for boundary in range(self.min_tokens * CHARS_PER_TOKEN, len(data) + 1, step):
+            hasher.update(data[position:boundary])
+            position = boundary
+            if self._touch(hasher.copy().hexdigest()):
+                cached = boundary
+        return cached // CHARS_PER_TOKEN
+
+    def _touch(self, key: str) -> bool:
+        with self._lock:
+            seen = key in self._seen
+            self._seen[key] = None
+            self._seen.move_to_end(key)
+            if len(self._seen) > self.capacity:
+                self._seen.popitem(last=False)
+            return seen
+
+
+@dataclass
+class FakeBatch:
+    """A submitted batch; its results are computed up front and released at `ready_at`."""
+
+    id: str
+    created_at: float
+    ready_at: float
+    total: int
+    failed: int
+    # JSONL lines: successes, and (OpenAI error file) failures.
+    output: List[str]
+    errors: List[str]
+    input_file_id: str = ""
+
+    @property
+    def ended(self) -> bool:
+        return time.time() >= self.ready_at
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Response content
+# ---------------------------------------------------------------------------
+
+
+def _text_of(content: Any) -> str:
+    """Flatten OpenAI/Anthropic message content (string or block list) to text."""
+
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return ""
+
+
+def _phrases(prompt: str, rng: random.Random) -> Iterator[str]:
+    words = _WORD.findall(prompt[-4000:]) or ["workshop", "delivery", "milestone", "budget"]
+    while True:
+        yield " ".join(rng.choice(words).lower() for _ in range(rng.randint(5, 9))).capitalize()
+
+
+def from_schema(schema: Dict[str, Any], phrases: Iterator[str], rng: random.Random) -> Any:
+    """A small instance of a JSON schema (objects, arrays, strings, numbers, booleans, null)."""
+
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = "null" if "null" in kind else kind[0]
+    if kind == "object":
+        return {name: from_schema(sub, phrases, rng) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        count = max(schema.get("minItems", 0), rng.randint(2, 4))
+        return [from_schema(schema.get("items", {}), phrases, rng) for _ in range(count)]
+    if kind == "string":
+        return next(phrases)
+    if kind in ("integer", "number"):
+        return rng.randint(1, 10)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    return None
+
+
+def notes_text(phrases: Iterator[str], rng: random.Random, budget: int) -> str:
+    """Markdown notes in the layout `notes_parser` accepts, about `budget` tokens long."""
+
+    sections = [("Highlights", 6), ("Decisions", 2), ("Open Questions", 2), ("Risks", 2)]
+    lines: List[str] = []
+    for heading, count in sections:
+        lines += [f"## {heading}", *(f"- {next(phrases)}." for _ in range(count)), ""]
+    actions = [
+        {"title": next(phrases), "owner": rng.choice(["Alex", "Priya", "Zara", "Miguel"]), "due_date": None, "tags": [], "dependency": None}
+        for _ in range(3)
+    ]
+    lines += ["ACTION_ITEMS:", json.dumps(actions, indent=2)]
+    text = "\n".join(lines)
+    # Pad the highlights up to the budget so generation time tracks --completion-tokens.
+    while estimate_tokens(text) < budget:
+        text = text.replace("## Decisions", f"- {next(phrases)}.\n\n## Decisions", 1)
+    return text
+
+
+def artifact_text(names: List[str], phrases: Iterator[str], rng: random.Random, defect_rate: float = 0.0) -> str:
+    """The files named in an artifacts prompt, each under its `=== FILE: <name> ===` line."""
+
+    owners = ["Alex", "Priya", "Zara", "Miguel"]
+
+    def bullets(count: int) -> List[str]:
+        return [f"- {next(phrases)}." for _ in range(count)]
+
+    def body(name: str) -> str:
+        if name == "RAID.md":
+            lines: List[str] = []
+            for heading in ("Risks", "Assumptions", "Issues", "Dependencies"):
+                lines += [f"## {heading}", *bullets(2), ""]
+            return "\n".join(lines)
+        if name == "RACI.md":
+            rows = [f"| {next(phrases)} | {rng.choice(owners)} | Project Sponsor | Tech Lead | PMO |" for _ in range(4)]
+            return "\n".join(["| Deliverable | Responsible | Accountable | Consulted | Informed |", "| --- | --- | --- | --- | --- |", *rows])
+        if name == "update_email.md":
+            return "\n".join(["Subject: Weekly status", "", *(f"{next(phrases)}." for _ in range(8))])
+        if name == "status_deck.md":
+            slides = []
+            for index, title in enumerate(["Headline", "Progress", "Decisions", "Risks", "Next Actions", "Roadmap", "Dependencies"]):
+                extra = ["```mermaid", "flowchart LR", "Build --> Pilot", "Pilot --> Signoff", "```"] if index == 6 else []
+                slides.append("\n".join([f"# {title}", *bullets(3), *extra, f"Speaker notes: {next(phrases)}."]))
+            return "\n\n".join(slides)
+        if name == "ops_update.md":
+            tasks = [f"- {next(phrases)} ({rng.choice(owners)}, due Friday)" for _ in range(3)]
+            status = rng.choice(["Green", "Amber", "Red"])
+            return "\n".join(["## Planner tasks", *tasks, "", "## Teams update", f"- Status: {status}", *bullets(3)])
+        return "\n".join(bullets(4))
+
+    return "\n\n".join(f"=== FILE: {name} ===\n{body(name)}" for name in names if rng.random() >= defect_rate)
+
+
+# ---------------------------------------------------------------------------
+# HTTP handler
+# ---------------------------------------------------------------------------
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "fake-llm"
+
+    @property
+    def fake(self) -> "FakeLLMServer":
+        return self.server.fake  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - stdlib signature
+        pass
+
+    def do_GET(self) -> None:  # noqa: N802 - stdlib naming
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path in ("/stats", "/v1/stats"):
+            self._json(200, self.fake.stats.as_dict())
+            return
+        if path == "/healthz":
+            self._json(200, {"status": "ok"})
+            return
+        for pattern, handler in _GET_ROUTES:
+            match = pattern.search(path)
+            if match:
+                getattr(self, handler)(match.group("id"))
+                return
+        self._json(404, {"error": {"message": f"No route for GET {self.path}"}})
+
+    def do_POST(self) -> None:  # noqa: N802 - stdlib naming
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path.endswith("/files"):
+            self._upload(raw)
+            return
+        body = json.loads(raw or b"{}")
+        if path == "/stats/reset":
+            self.fake.stats.reset()
+            self._json(200, {"status": "reset"})
+        elif path.endswith("/chat/completions"):
+            self._serve(body, openai=True)
+        elif path.endswith("/messages"):
+            self._serve(body, openai=False)
+        elif path.endswith("/messages/batches"):
+            self._create_anthropic_batch(body)
+        elif path.endswith("/batches"):
+            self._create_openai_batch(body)
+        else:
+            self._json(404, {"error": {"message": f"No route for POST {self.path}"}})
+
+    # ------------------------------------------------------------------
+    def _serve(self, body: Dict[str, Any], *, openai: bool) -> None:
+        fake = self.fake
+        config = fake.config
+        rng = fake.rng()
+        stream = bool(body.get("stream"))
+
+        roll = rng.random()
+        if roll < config.rate_429 + config.rate_5xx:
+            time.sleep(min(config.latency.sample(rng), 0.05))
+            status = 429 if roll < config.rate_429 else rng.choice([500, 503])
+            fake.stats.request(status, stream=stream)
+            self._error(status, openai=openai)
+            return
+
+        text, usage, tool = self._complete(body, rng, openai=openai)
+        fake.stats.request(200, stream=stream)
+
+        time.sleep(config.latency.sample(rng))
+        model = body.get("model", "fake-model")
+        if openai:
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            if stream:
+                self._stream(self._openai_events(model, text, usage, include_usage))
+            else:
+                self._generate_delay(usage[3])
+                self._json(200, self._openai_body(model, text, usage))
+        else:
+            if stream:
+                self._stream(self._anthropic_events(model, text, usage, tool))
+            else:
+                self._generate_delay(usage[3])
+                self._json(200, self._anthropic_body(model, text, usage, tool))
+
+    def _complete(self, body: Dict[str, Any], rng: random.Random, *, openai: bool) -> Tuple[str, Tuple[int, int, int, int], bool]:
+        """The completion text for a request body, its usage, and whether it answers a tool call."""
+
+        config = self.fake.config
+        if openai:
+            prompt, cached, written, schema = self._openai_prompt(body)
+        else:
+            prompt, cached, written, schema = self._anthropic_prompt(body)
+        phrases = _phrases(prompt, rng)
+        budget = min(int(body.get("max_tokens") or config.completion_tokens), config.completion_tokens)
+        if schema is not None:
+            text = json.dumps(from_schema(schema, phrases, rng))
+        elif "=== FILE:" in prompt:
+            names = list(dict.fromkeys(_FILE_NAME.findall(prompt)))
+            text = artifact_text(names, phrases, rng, config.section_defect_rate)
+        elif "ACTION_ITEMS" in prompt:
+            text = notes_text(phrases, rng, budget)
+        else:
+            text = " ".join(next(phrases) + "." for _ in range(max(1, budget // 12)))
+        usage = (estimate_tokens(prompt), cached, written, estimate_tokens(text))
+        self.fake.stats.usage(*usage)
+        return text, usage, schema is not None
+
+    def _openai_prompt(self, body: Dict[str, Any]) -> Tuple[str, int, int, Optional[Dict[str, Any]]]:
+        response_format = body.get("response_format") or {}
+        schema = (response_format.get("json_schema") or {}).get("schema") if response_format.get("type") == "json_schema" else None
+        prompt = "\n".join(_text_of(message.get("content")) for message in body.get("messages", []))
+        # The response format is part of the cached prefix, ahead of the messages.
+        prefix = json.dumps(response_format, sort_keys=True) if response_format else ""
+        cached = self.fake.cache.automatic(prefix + prompt)
+        return prefix + prompt, cached, 0, schema
+
+    def _anthropic_prompt(self, body: Dict[str, Any]) -> Tuple[str, int, int, Optional[Dict[str, Any]]]:
+        tools = body.get("tools") or []
+        forced = (body.get("tool_choice") or {}).get("name")
+        schema = next((tool.get("input_schema") for tool in tools if tool.get("name") == forced), None)
+        # Cache order is tools, system, messages; the last breakpoint ends the cached prefix.
+        parts: List[Tuple[str, bool]] = [(json.dumps(tool, sort_keys=True), "cache_control" in tool) for tool in tools]
+        system = body.get("system")
+        blocks = system if isinstance(system, list) else ([{"text": system}] if system else [])
+        parts += [(block.get("text", ""), "cache_control" in block) for block in blocks]
+        for message in body.get("messages", []):
+            content = message.get("content")
+            blocks = content if isinstance(content, list) else [{"text": content or ""}]
+            parts += [(block.get("text", ""), "cache_control" in block) for block in blocks]
+        marked = [index for index, (_, breakpoint) in enumerate(parts) if breakpoint]
+        prompt = "\n".join(text for text, _ in parts)
+        if not marked:
+            return prompt, 0, 0, schema
+        cached, written = self.fake.cache.explicit("\n".join(text for text, _ in parts[: marked[-1] + 1]))
+        return prompt, cached, written, schema
+
+    def _generate_delay(self, completion_tokens: int) -> None:
+        rate = self.fake.config.tokens_per_second
+        if rate > 0:
+            time.sleep(completion_tokens / rate)
+
+    def _pieces(self, text: str) -> Iterator[Tuple[str, float]]:
+        """Split `text` into deltas of a few words, each with the pause before it."""
+
+        rate = self.fake.config.tokens_per_second
+        words = re.findall(r"\S+\s*|\s+", text)
+        for start in range(0, len(words), 4):
+            piece = "".join(words[start : start + 4])
+            yield piece, (estimate_tokens(piece) / rate if rate > 0 else 0.0)
+
+    # ------------------------------------------------------------------
+    # OpenAI wire format
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _openai_usage(usage: Tuple[int, int, int, int]) -> Dict[str, Any]:
+        prompt, cached, _, completion = usage
+        return {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+
+    def _openai_body(self, model: str, text: str, usage: Tuple[int, int, int, int]) -> Dict[str, Any]:
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": self._openai_usage(usage),
+        }
+
+    def _openai_events(self, model: str, text: str, usage: Tuple[int, int, int, int], include_usage: bool) -> Iterator[Tuple[str, float]]:
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:24]}", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> str:
+            payload = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            return f"data: {json.dumps(payload)}\n\n"
+
+        yield chunk({"role": "assistant", "content": ""}), 0.0
+        for piece, pause in self._pieces(text):
+            yield chunk({"content": piece}), pause
+        yield chunk({}, "stop"), 0.0
+        if include_usage:
+            yield f"data: {json.dumps({**base, 'choices': [], 'usage': self._openai_usage(usage)})}\n\n", 0.0
+        yield "data: [DONE]\n\n", 0.0
+
+    # ------------------------------------------------------------------
+    # Anthropic wire format
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _anthropic_usage(usage: Tuple[int, int, int, int]) -> Dict[str, int]:
+        prompt, cached, written, completion = usage
+        return {
+            "input_tokens": prompt - cached - written,
+            "output_tokens": completion,
+            "cache_read_input_tokens": cached,
+            "cache_creation_input_tokens": written,
+        }
+
+    def _anthropic_body(self, model: str, text: str, usage: Tuple[int, int, int, int], tool: bool) -> Dict[str, Any]:
+        if tool:
+            block: Dict[str, Any] = {"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}", "name": "structured_output", "input": json.loads(text)}
+        else:
+            block = {"type": "text", "text": text}
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [block],
+            "stop_reason": "tool_use" if tool else "end_turn",
+            "stop_sequence": None,
+            "usage": self._anthropic_usage(usage),
+        }
+
+    def _anthropic_events(self, model: str, text: str, usage: Tuple[int, int, int, int], tool: bool) -> Iterator[Tuple[str, float]]:
+        def event(name: str, payload: Dict[str, Any]) -> str:
+            return f"event: {name}\ndata: {json.dumps({'type': name, **payload})}\n\n"
+
+        message = self._anthropic_body(model, "{}" if tool else "", usage, tool)
+        message["content"], message["stop_reason"] = [], None
+        message["usage"] = {**self._anthropic_usage(usage), "output_tokens": 1}
+        yield event("message_start", {"message": message}), 0.0
+        if tool:
+            start = {"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}", "name": "structured_output", "input": {}}
+        else:
+            start = {"type": "text", "text": ""}
+        yield event("content_block_start", {"index": 0, "content_block": start}), 0.0
+        for piece, pause in self._pieces(text):
+            delta = {"type": "input_json_delta", "partial_json": piece} if tool else {"type": "text_delta", "text": piece}
+            yield event("content_block_delta", {"index": 0, "delta": delta}), pause
+        yield event("content_block_stop", {"index": 0}), 0.0
+        stop = "tool_use" if tool else "end_turn"
+        yield event("message_delta", {"delta": {"stop_reason": stop, "stop_sequence": None}, "usage": {"output_tokens": usage[3]}}), 0.0
+        yield event("message_stop", {}), 0.0
+
+    # ------------------------------------------------------------------
+    # Writing responses
+    # ------------------------------------------------------------------
+    # ------------------------------------------------------------------
+    # Batch APIs
+    # ------------------------------------------------------------------
+    def _upload(self, raw: bytes) -> None:
+        header = f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode("latin-1")
+        message = BytesParser(policy=email_policy).parsebytes(header + raw)
+        data, filename, purpose = b"", "upload.jsonl", "batch"
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name == "file":
+                data = part.get_payload(decode=True) or b""
+                filename = part.get_filename() or filename
+            elif name == "purpose":
+                purpose = part.get_content().strip()
+        file_id = self.fake.put_file(data)
+        self._json(200, self._file_object(file_id, len(data), filename, purpose))
+
+    def _run_batch(self, items: List[Tuple[str, Dict[str, Any]]], *, openai: bool, input_file_id: str = "") -> FakeBatch:
+        """Answer every request of a batch now; the results are released when the batch ends."""
+
+        fake = self.fake
+        failure_rate = fake.config.rate_429 + fake.config.rate_5xx
+        output: List[str] = []
+        errors: List[str] = []
+        for custom_id, body in items:
+            rng = fake.rng()
+            if rng.random() < failure_rate:
+                fake.stats.request(500, batch=True)
+                errors.append(json.dumps(self._batch_error(custom_id, openai=openai)))
+                continue
+            text, usage, tool = self._complete(body, rng, openai=openai)
+            fake.stats.request(200, batch=True)
+            model = body.get("model", "fake-model")
+            if openai:
+                response = {"status_code": 200, "request_id": uuid.uuid4().hex, "body": self._openai_body(model, text, usage)}
+                line = {"id": f"batch_req_{uuid.uuid4().hex[:24]}", "custom_id": custom_id, "response": response, "error": None}
+            else:
+                line = {"custom_id": custom_id, "result": {"type": "succeeded", "message": self._anthropic_body(model, text, usage, tool)}}
+            output.append(json.dumps(line))
+        return fake.add_batch("batch" if openai else "msgbatch", output, errors, input_file_id)
+
+    @staticmethod
+    def _batch_error(custom_id: str, *, openai: bool) -> Dict[str, Any]:
+        message = "Upstream failure (injected)."
+        if openai:
+            body = {"error": {"message": message, "type": "server_error", "code": None}}
+            return {"id": f"batch_req_{uuid.uuid4().hex[:24]}", "custom_id": custom_id, "response": {"status_code": 500, "request_id": uuid.uuid4().hex, "body": body}, "error": None}
+        return {"custom_id": custom_id, "result": {"type": "errored", "error": {"type": "error", "error": {"type": "api_error", "message": message}}}}
+
+    def _create_openai_batch(self, body: Dict[str, Any]) -> None:
+        data = self.fake.files.get(body.get("input_file_id", ""))
+        if data is None:
+            self._json(404, {"error": {"message": "No such file.", "type": "invalid_request_error", "code": None}})
+            return
+        lines = [json.loads(text) for text in data.decode("utf-8").splitlines() if text.strip()]
+        items = [(line["custom_id"], line["body"]) for line in lines]
+        batch = self._run_batch(items, openai=True, input_file_id=body["input_file_id"])
+        self._json(200, self._openai_batch(batch, body.get("endpoint", "/v1/chat/completions"), body.get("completion_window", "24h")))
+
+    def _get_openai_batch(self, batch_id: str) -> None:
+        batch = self.fake.batches.get(batch_id)
+        if batch is None:
+            self._json(404, {"error": {"message": "No such batch.", "type": "invalid_request_error", "code": None}})
+            return
+        self._json(200, self._openai_batch(batch))
+
+    def _get_file_content(self, file_id: str) -> None:
+        data = self.fake.files.get(file_id)
+        if data is None:
+            self._json(404, {"error": {"message": "No such file.", "type": "invalid_request_error", "code": None}})
+            return
+        self._raw(200, data, "application/octet-stream")
+
+    def _openai_batch(self, batch: FakeBatch, endpoint: str = "/v1/chat/completions", window: str = "24h") -> Dict[str, Any]:
+        ended = batch.ended
+        if ended:
+            output_id = self.fake.put_file("".join(line + "\n" for line in batch.output).encode("utf-8"), f"file-out-{batch.id}")
+            error_id = self.fake.put_file("".join(line + "\n" for line in batch.errors).encode("utf-8"), f"file-err-{batch.id}") if batch.errors else None
+        return {
+            "id": batch.id,
+            "object": "batch",
+            "endpoint": endpoint,
+            "errors": None,
+            "input_file_id": batch.input_file_id,
+            "completion_window": window,
+            "status": "completed" if ended else "in_progress",
+            "output_file_id": output_id if ended else None,
+            "error_file_id": error_id if ended else None,
+            "created_at": int(batch.created_at),
+            "completed_at": int(batch.ready_at) if ended else None,
+            "request_counts": {"total": batch.total, "completed": batch.total - batch.failed if ended else 0, "failed": batch.failed if ended else 0},
+        }
+
+    @staticmethod
+    def _file_object(file_id: str, size: int, filename: str, purpose: str) -> Dict[str, Any]:
+        return {"id": file_id, "object": "file", "bytes": size, "created_at": int(time.time()), "filename": filename, "purpose": purpose, "status": "processed"}
+
+    def _create_anthropic_batch(self, body: Dict[str, Any]) -> None:
+        items = [(request["custom_id"], request["params"]) for request in body.get("requests", [])]
+        self._json(200, self._anthropic_batch(self._run_batch(items, openai=False)))
+
+    def _get_anthropic_batch(self, batch_id: str) -> None:
+        batch = self.fake.batches.get(batch_id)
+        if batch is None:
+            self._json(404, {"type": "error", "error": {"type": "not_found_error", "message": "No such batch."}})
+            return
+        self._json(200, self._anthropic_batch(batch))
+
+    def _get_anthropic_results(self, batch_id: str) -> None:
+        batch = self.fake.batches.get(batch_id)
+        if batch is None or not batch.ended:
+            self._json(404, {"type": "error", "error": {"type": "not_found_error", "message": "Results are not available."}})
+            return
+        self._raw(200, "".join(line + "\n" for line in batch.output + batch.errors).encode("utf-8"), "application/x-jsonl")
+
+    def _anthropic_batch(self, batch: FakeBatch) -> Dict[str, Any]:
+        ended = batch.ended
+        host = self.headers.get("Host") or "127.0.0.1"
+        return {
+            "id": batch.id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else batch.total,
+                "succeeded": batch.total - batch.failed if ended else 0,
+                "errored": batch.failed if ended else 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(batch.created_at)),
+            "ended_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(batch.ready_at)) if ended else None,
+            "expires_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(batch.created_at + 86_400)),
+            "results_url": f"http://{host}/v1/messages/batches/{batch.id}/results" if ended else None,
+        }
+
+    def _error(self, status: int, *, openai: bool) -> None:
+        rate_limited = status == 429
+        message = "Rate limit exceeded (injected)." if rate_limited else "Upstream failure (injected)."
+        if openai:
+            payload = {"error": {"message": message, "type": "rate_limit_error" if rate_limited else "server_error", "code": None}}
+        else:
+            payload = {"type": "error", "error": {"type": "rate_limit_error" if rate_limited else "api_error", "message": message}}
+        headers = {"retry-after-ms": str(self.fake.config.retry_after_ms)} if rate_limited else {}
+        self._json(status, payload, headers)
+
+    def _json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        self._raw(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+    def _raw(self, status: int, data: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the request, e.g. a cancelled hedge.
+            self.close_connection = True
+
+    def _stream(self, events: Iterator[Tuple[str, float]]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for data, pause in events:
+                if pause:
+                    time.sleep(pause)
+                encoded = data.encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(encoded), encoded))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading (NotesAgent breaks after ACTION_ITEMS) or cancelled.
+            self.close_connection = True
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+
+class FakeLLMServer:
+    """Runs the fake API on a background thread; `url` is its root."""
+
+    def __init__(self, config: Optional[FakeConfig] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.config = config or FakeConfig()
+        self.stats = FakeStats()
+        self.cache = PrefixCache(self.config.cache_min_tokens)
+        self._seed = random.Random(self.config.seed)
+        self._seed_lock = threading.Lock()
+        ThreadingHTTPServer.request_queue_size = 256
+        self.httpd = ThreadingHTTPServer((host, port), FakeLLMHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, FakeBatch] = {}
+        self._store_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def rng(self) -> random.Random:
+        """A per-request generator, reproducible for a given --seed and request order."""
+
+        with self._seed_lock:
+            return random.Random(self._seed.getrandbits(64))
+
+    def put_file(self, data: bytes, file_id: Optional[str] = None) -> str:
+        file_id = file_id or f"file-{uuid.uuid4().hex[:24]}"
+        with self._store_lock:
+            self.files[file_id] = data
+        return file_id
+
+    def add_batch(self, prefix: str, output: List[str], errors: List[str], input_file_id: str = "") -> FakeBatch:
+        now = time.time()
+        batch = FakeBatch(
+            id=f"{prefix}_{uuid.uuid4().hex[:24]}",
+            created_at=now,
+            ready_at=now + self.config.batch_delay,
+            total=len(output) + len(errors),
+            failed=len(errors),
+            output=output,
+            errors=errors,
+            input_file_id=input_file_id,
+        )
+        with self._store_lock:
+            self.batches[batch.id] = batch
+        return batch
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def add_fake_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=Latency.parse, default=Latency.parse("lognormal:300,0.4"), help="Time to first token: fixed:MS, uniform:LO,HI, normal:MEAN,SD or lognormal:MEDIAN,SIGMA.")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Generation speed after the first token (0 = instant).")
+    parser.add_argument("--completion-tokens", type=int, default=300, help="Approximate completion length (capped by the request's max_tokens).")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered with 429.")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Share of requests answered with 500/503.")
+    parser.add_argument("--retry-after-ms", type=int, default=200, help="retry-after-ms sent with 429 responses.")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024, help="Shortest prompt prefix the simulated prompt cache stores.")
+    parser.add_argument("--batch-delay", type=float, default=1.0, help="Seconds until a submitted batch has ended.")
+    parser.add_argument("--section-defect-rate", type=float, default=0.0, help="Share of requested artifact files left out of a response.")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def fake_config(args: argparse.Namespace) -> FakeConfig:
+    return FakeConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after_ms=args.retry_after_ms,
+        cache_min_tokens=args.cache_min_tokens,
+        batch_delay=args.batch_delay,
+        section_defect_rate=args.section_defect_rate,
+        seed=args.seed,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(fake_config(args), args.host, args.port)
+    print(f"Fake LLM API on {server.url} (OpenAI base URL {server.url}/v1, Anthropic base URL {server.url}); Ctrl+C to stop.")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats.as_dict(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,174 @@
+"""Concurrent end-to-end load test against the fake LLM API.
+
+Starts `fake_llm.py` in-process (or uses `--server`), points the real OpenAI
+or Anthropic SDK at it through `<PROVIDER>_BASE_URL`, and pushes `--runs`
+full pipeline runs through one warm `Supervisor`, `--concurrency` at a time.
+Artifacts stay in memory. The response cache is off, so every run makes its
+LLM calls and retries, rate limiting and prompt-cache accounting are all
+exercised. Reported: throughput, run and LLM-call latency percentiles, the
+failure rate, token totals (including cached prompt tokens) and the server's
+own request counts.
+
+Usage:
+    python benchmarks/load_test.py --runs 50 --concurrency 8 --size 20KB
+    python benchmarks/load_test.py --provider anthropic --rate-429 0.1 --latency lognormal:800,0.6
+    python benchmarks/load_test.py --router --hedge --latency lognormal:300,1.0
+    python benchmarks/load_test.py --server http://127.0.0.1:8787 --output load.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import synthetic  # noqa: E402
+from fake_llm import FakeLLMServer, add_fake_arguments, fake_config  # noqa: E402
+from outputs import MemorySink  # noqa: E402
+from providers import LLMProvider  # noqa: E402
+from providers.telemetry import RunMetrics, collect  # noqa: E402
+from run_supervisor import Supervisor  # noqa: E402
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+    return {"count": len(ordered), "p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "max": round(ordered[-1], 4)}
+
+
+def configure(provider: str, url: str, *, router: bool = False) -> LLMProvider:
+    """Environment for the real SDKs against the fake server.
+
+    Providers not pointed at the fake server lose their keys, so nothing is
+    sent to a real API. Without `router` only `provider` is used (no failover).
+    """
+
+    served = ["openai", "anthropic"] if router else [provider]
+    for name in ("openai", "anthropic", "gemini"):
+        if name in served:
+            os.environ[f"{name.upper()}_API_KEY"] = "fake"
+            os.environ[f"{name.upper()}_BASE_URL"] = f"{url}/v1" if name == "openai" else url
+        else:
+            os.environ.pop(f"{name.upper()}_API_KEY", None)
+    os.environ["LLM_PROVIDER"] = provider
+    os.environ["LLM_FAILOVER"] = "0"
+    os.environ["LLM_ROUTER"] = "1" if router else "0"
+    return LLMProvider.from_env(dry_override=False, cache=None)
+
+
+def one_run(supervisor: Supervisor, transcript: Path) -> Dict[str, Any]:
+    metrics = RunMetrics()
+    started = time.perf_counter()
+    error = None
+    outdir = Path("load") / transcript.stem
+    try:
+        with collect(metrics):
+            supervisor.run(transcript, outdir, sink=MemorySink(outdir))
+    except Exception as exc:  # a failed run is a data point, not the end of the test
+        error = f"{type(exc).__name__}: {exc}"
+    return {"seconds": time.perf_counter() - started, "error": error, "metrics": metrics}
+
+
+def summarize(results: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+    llm_seconds: List[float] = []
+    totals: Dict[str, float] = {}
+    for result in results:
+        metrics: RunMetrics = result["metrics"]
+        llm_seconds += [span.seconds for span in metrics.spans if span.kind == "llm"]
+        for name, value in metrics.summary().items():
+            if name != "seconds" and isinstance(value, (int, float)):
+                totals[name] = totals.get(name, 0) + value
+    failures = [result["error"] for result in results if result["error"]]
+    prompt = totals.get("prompt_tokens", 0)
+    return {
+        "runs": len(results),
+        "failed": len(failures),
+        "error_rate": round(len(failures) / max(1, len(results)), 4),
+        "errors": sorted(set(failures))[:5],
+        "wall_seconds": round(wall, 3),
+        "runs_per_second": round(len(results) / wall, 3) if wall else None,
+        "run_latency": percentiles([result["seconds"] for result in results]),
+        "llm_latency": percentiles(llm_seconds),
+        "tokens": {name: round(value, 6) for name, value in sorted(totals.items())},
+        "cached_prompt_share": round(totals.get("cached_prompt_tokens", 0) / prompt, 4) if prompt else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Concurrent pipeline load test against a fake LLM API.")
+    parser.add_argument("--provider", choices=["openai", "anthropic"], default="openai")
+    parser.add_argument("--router", action="store_true", help="Route across OpenAI and Anthropic backends (both served by the fake API); add --hedge to hedge.")
+    parser.add_argument("--hedge", action="store_true", help="With --router, hedge slow requests (LLM_HEDGE=1).")
+    parser.add_argument("--server", default=None, help="Use an already running fake_llm.py instead of starting one.")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--size", default="8KB", help="Synthetic transcript size per run.")
+    parser.add_argument("--transcripts", type=int, default=4, help="Distinct transcripts to cycle through.")
+    parser.add_argument("--chunk-tokens", type=int, default=None, help="Force map-reduce chunking below this size.")
+    parser.add_argument("--output", type=Path, default=None, help="Write the report as JSON.")
+    parser.add_argument("--verbose", action="store_true")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR, format="%(levelname)s %(message)s")
+
+    server: Optional[FakeLLMServer] = None
+    if args.server:
+        url = args.server.rstrip("/")
+    else:
+        server = FakeLLMServer(fake_config(args)).start()
+        url = server.url
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="load-test-") as tmp:
+            size = synthetic.parse_size(args.size)
+            transcripts = [
+                synthetic.write(Path(tmp) / f"transcript_{seed}.txt", size, seed) for seed in range(1, args.transcripts + 1)
+            ]
+            if args.hedge:
+                os.environ["LLM_HEDGE"] = "1"
+            provider = configure(args.provider, url, router=args.router)
+            supervisor = Supervisor(provider, incremental=False, chunk_tokens=args.chunk_tokens)
+            jobs = [transcripts[index % len(transcripts)] for index in range(args.runs)]
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+                results = list(pool.map(lambda path: one_run(supervisor, path), jobs))
+            report = summarize(results, time.perf_counter() - started)
+    finally:
+        if server is not None:
+            server.stop()
+
+    report = {
+        "provider": "router" if args.router else args.provider,
+        "hedge": args.hedge,
+        "concurrency": args.concurrency,
+        "transcript_size": args.size,
+        **report,
+        "server": server.stats.as_dict() if server is not None else None,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
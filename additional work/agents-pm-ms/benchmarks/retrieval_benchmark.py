@@ -0,0 +1,182 @@
+"""Build and query the retrieval index over thousands of synthetic meetings.
+
+Adds `--meetings` synthetic transcripts to a fresh index (in a temporary
+folder unless `--index` is given), one meeting per `add` as the pipeline
+does. It then times queries built the way the notes stage builds them, from
+each meeting's classifier signals:
+
+- cold: a new `RetrievalIndex` per query, so a new SQLite connection and
+  new memory maps (the OS page cache stays warm);
+- warm: one open index.
+
+`--check` also scores short queries by brute force over every snippet and
+compares the top-k scores with the index's.
+
+Usage:
+    python benchmarks/retrieval_benchmark.py --meetings 2000
+    python benchmarks/retrieval_benchmark.py --meetings 200 --check --output retrieval.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import synthetic  # noqa: E402
+from classifier import TranscriptClassifier, Vocabulary  # noqa: E402
+from ingest import TranscriptDigest  # noqa: E402
+from load_test import percentiles  # noqa: E402
+from models import MeetingSummary  # noqa: E402
+from retrieval import B, K1, RetrievalIndex, meeting_snippets, query_text, tokenize  # noqa: E402
+
+
+def meeting_name(index: int) -> str:
+    day = 20_000 + index  # one meeting a day, so every meeting has earlier ones
+    return f"steerco-{time.strftime('%Y-%m-%d', time.gmtime(day * 86_400))}"
+
+
+def build(index: RetrievalIndex, count: int, size: int, project: str) -> Dict[str, Any]:
+    classifier = TranscriptClassifier(Vocabulary.from_env())
+    digests = []
+    started = time.perf_counter()
+    for number in range(count):
+        lines = synthetic.generate(size, seed=number + 1).splitlines()
+        digest = TranscriptDigest(classifier).consume(lines)
+        found = digest.found
+        summary = MeetingSummary(found.bullets, found.decisions, found.questions, found.risks, "")
+        index.add(project, meeting_name(number), f"seed-{number + 1}", meeting_snippets(lines, summary, digest.actions))
+        digests.append(digest)
+    seconds = time.perf_counter() - started
+    return {"seconds": round(seconds, 3), "meetings_per_second": round(count / seconds, 1), "digests": digests}
+
+
+def brute_force(db: Path, query: str, project: str, k: int, per_meeting: int) -> List[float]:
+    """Top BM25 scores by scoring every snippet in Python (same terms, idf and caps as the index)."""
+
+    conn = sqlite3.connect(str(db))
+    rows = conn.execute("SELECT s.text, m.name FROM snippets s JOIN meetings m ON m.id = s.meeting WHERE m.project = ?", (project,)).fetchall()
+    conn.close()
+    documents = [(Counter(tokenize(text)), name) for text, name in rows]
+    total = len(documents)
+    average = sum(sum(terms.values()) for terms, _ in documents) / total
+    query_terms = Counter(tokenize(query))
+    frequency = {term: sum(1 for terms, _ in documents if term in terms) for term in query_terms}
+    weights = {
+        term: math.log(1 + (total - df + 0.5) / (df + 0.5)) * (1 + math.log(query_terms[term]))
+        for term, df in frequency.items()
+        if df
+    }
+    scored = []
+    for terms, name in documents:
+        length = sum(terms.values())
+        score = sum(
+            weight * terms[term] * (K1 + 1) / (terms[term] + K1 * (1 - B + B * length / average))
+            for term, weight in weights.items()
+            if term in terms
+        )
+        if score > 0:
+            scored.append((score, name))
+    scored.sort(key=lambda item: -item[0])
+    per: Counter = Counter()
+    top = []
+    for score, name in scored:
+        if per[name] < per_meeting:
+            per[name] += 1
+            top.append(round(score, 3))
+        if len(top) == k:
+            break
+    return top
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Retrieval index build and query benchmark.")
+    parser.add_argument("--meetings", type=int, default=2000)
+    parser.add_argument("--size", default="4KB", help="Synthetic transcript size per meeting.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=6)
+    parser.add_argument("--index", type=Path, default=None, help="Build in this folder instead of a temporary one.")
+    parser.add_argument("--check", action="store_true", help="Compare scores with a brute-force BM25 (slow on large indexes).")
+    parser.add_argument("--output", type=Path, default=None, help="Write the report as JSON.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="retrieval-") as tmp:
+        path = args.index or Path(tmp) / "index"
+        project = "bench"
+
+        started = time.perf_counter()
+        import numpy  # noqa: F401 - timed separately; a pipeline run pays it once
+
+        numpy_ms = (time.perf_counter() - started) * 1000
+        index = RetrievalIndex(path)
+        built = build(index, args.meetings, synthetic.parse_size(args.size), project)
+        digests = built.pop("digests")
+        stats = index.stats()
+
+        picks = [rng.randrange(args.meetings) for _ in range(args.queries)]
+        queries = [(query_text(digests[pick]), meeting_name(pick)) for pick in picks]
+
+        def run(target: RetrievalIndex, query: str, meeting: str) -> int:
+            return len(target.search(query, project=project, exclude=meeting, before=meeting[-10:], k=args.k))
+
+        warm, cold, hits = [], [], []
+        for query, meeting in queries:
+            started = time.perf_counter()
+            hits.append(run(index, query, meeting))
+            warm.append((time.perf_counter() - started) * 1000)
+        index.close()
+        for query, meeting in queries:
+            started = time.perf_counter()
+            fresh = RetrievalIndex(path)
+            run(fresh, query, meeting)
+            cold.append((time.perf_counter() - started) * 1000)
+            fresh.close()
+
+        report: Dict[str, Any] = {
+            "meetings": args.meetings,
+            "transcript_size": args.size,
+            "numpy_import_ms": round(numpy_ms, 1),
+            "build": built,
+            "index": stats,
+            "query_terms_p50": sorted(len(set(tokenize(query))) for query, _ in queries)[len(queries) // 2],
+            "hits_per_query": round(sum(hits) / len(hits), 2),
+            "warm_query_ms": percentiles(warm),
+            "cold_query_ms": percentiles(cold),
+        }
+
+        if args.check:
+            checker = RetrievalIndex(path)
+            mismatches = 0
+            for pick in picks[:20]:
+                words = rng.sample(tokenize(digests[pick].excerpt[-1] + " " + " ".join(digests[pick].found.risks)), 6)
+                query = " ".join(words)
+                got = [round(hit.score, 3) for hit in checker.search(query, project=project, k=args.k)]
+                expected = brute_force(path / "index.sqlite3", query, project, args.k, 2)
+                if any(abs(a - b) > 1e-2 for a, b in zip(got, expected)) or len(got) != len(expected):
+                    mismatches += 1
+            checker.close()
+            report["check"] = {"queries": min(20, len(picks)), "mismatches": mismatches}
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return 1 if report.get("check", {}).get("mismatches") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
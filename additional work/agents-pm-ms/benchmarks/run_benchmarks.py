@@ -0,0 +1,157 @@
+"""Per-stage and end-to-end pipeline benchmarks with JSON results and baseline checks.
+
+Every benchmark runs offline: transcripts come from `synthetic.py` and the
+provider is forced into dry-run mode with no response cache. Each case is
+timed `--repeat` times; the best and median wall times are reported. With
+`--baseline`, any case whose best time grew by more than `--tolerance` (and
+by more than `--min-delta-ms`, to ignore timer noise on tiny cases) fails
+the run, so CI can catch regressions.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 1KB,1MB,10MB --output bench.json
+    python benchmarks/run_benchmarks.py --baseline bench.json --tolerance 0.25
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import synthetic  # noqa: E402
+from classifier import detect_owner  # noqa: E402
+from providers import LLMProvider  # noqa: E402
+from run_supervisor import (  # noqa: E402
+    DeckAgent,
+    DocsAgent,
+    NotesAgent,
+    OpsAgent,
+    Supervisor,
+    chunk_sentences,
+    ensure_outdir,
+)
+
+RESULTS_VERSION = 1
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {"best": min(samples), "median": statistics.median(samples)}
+
+
+def stage_cases(text: str, path: Path, provider: LLMProvider, workdir: Path) -> Dict[str, Callable[[], Any]]:
+    """Benchmark callables for one transcript; Docs/Deck/Ops reuse one Notes result."""
+
+    notes = NotesAgent(provider)
+    lines = text.splitlines()
+    stage_dir = workdir / "stages"
+    pipeline_dir = workdir / "pipeline"
+    ensure_outdir(stage_dir)
+    ensure_outdir(pipeline_dir)
+    summary, actions = notes.run(text, stage_dir)
+    supervisor = Supervisor(provider, incremental=False)
+
+    return {
+        "chunk_sentences": lambda: chunk_sentences(text),
+        "extract_action_items": lambda: notes._extract_action_items(text),
+        "detect_owner": lambda: [detect_owner(line) for line in lines],
+        "docs_agent": lambda: DocsAgent().run(summary, actions, stage_dir),
+        "deck_agent": lambda: DeckAgent().run(summary, actions, stage_dir),
+        "ops_agent": lambda: OpsAgent().run(summary, actions, stage_dir),
+        "supervisor_run": lambda: supervisor.run(path, pipeline_dir),
+    }
+
+
+def run_suite(sizes: List[str], repeat: int, seed: int, only: str) -> Dict[str, Any]:
+    provider = LLMProvider.from_env(dry_override=True, cache=None)
+    pattern = re.compile(only) if only else None
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as tmp:
+        for size in sizes:
+            size_bytes = synthetic.parse_size(size)
+            workdir = Path(tmp) / size
+            path = synthetic.write(workdir / "transcript.txt", size_bytes, seed)
+            text = path.read_text(encoding="utf-8")
+            for name, fn in stage_cases(text, path, provider, workdir).items():
+                key = f"{size}/{name}"
+                if pattern and not pattern.search(key):
+                    continue
+                timing = measure(fn, repeat)
+                results[key] = {**timing, "bytes": len(text.encode("utf-8"))}
+                print(f"{key:<32} best {timing['best'] * 1000:10.2f} ms   median {timing['median'] * 1000:10.2f} ms")
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta: float) -> List[str]:
+    """Return one message per case that is slower than the baseline allows."""
+
+    regressions = []
+    for key, timing in current["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if previous is None:
+            continue
+        ratio = timing["best"] / previous["best"] if previous["best"] else 1.0
+        delta = timing["best"] - previous["best"]
+        print(f"{key:<32} {ratio:6.2f}x baseline ({delta * 1000:+.2f} ms)")
+        if ratio > 1 + tolerance and delta > min_delta:
+            regressions.append(f"{key} is {ratio:.2f}x slower than baseline ({delta * 1000:+.2f} ms)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1KB,100KB,1MB", help="Comma-separated transcript sizes, e.g. 1KB,10MB,100MB.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", default="", help="Regex selecting cases by '<size>/<name>'.")
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this path.")
+    parser.add_argument("--baseline", type=Path, help="Compare against a previous --output file.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown ratio over baseline.")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore slowdowns smaller than this.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    current = run_suite(sizes, args.repeat, args.seed, args.only)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(current, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Wrote {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.tolerance, args.min_delta_ms / 1000)
+        for message in regressions:
+            print(f"REGRESSION: {message}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
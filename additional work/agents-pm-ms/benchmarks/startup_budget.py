@@ -0,0 +1,78 @@
+"""Fail when dry-run CLI startup exceeds its time budget or imports an SDK.
+
+The sample transcript is run end to end in dry-run mode several times. The
+median wall time is compared with a bare `python -c pass` so the budget
+measures this project's overhead rather than the machine's interpreter
+start-up. One extra `-X importtime` run checks that no provider SDK is
+imported.
+
+Usage (CI):
+    python benchmarks/startup_budget.py --budget-ms 250
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from startup_profile import HEAVY_MODULES, run_profiled  # noqa: E402
+
+SCRIPT = ROOT / "app" / "run_supervisor.py"
+SAMPLE = ROOT / "workspace" / "samples" / "transcript_short.txt"
+
+
+def _median_wall(command: List[str], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.getenv("STARTUP_BUDGET_MS", "250")),
+        help="Allowed median overhead over a bare interpreter, in milliseconds.",
+    )
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as outdir:
+        argv = ["--transcript", str(SAMPLE), "--outdir", outdir, "--dry-run", "--no-cache", "--force", "--log-level", "ERROR"]
+        baseline = _median_wall([sys.executable, "-c", "pass"], args.repeat)
+        run = _median_wall([sys.executable, str(SCRIPT), *argv], args.repeat)
+        _, timings, _, code = run_profiled(SCRIPT, argv)
+
+    overhead_ms = (run - baseline) * 1000
+    heavy = sorted({t.module for t in timings if t.module.startswith(HEAVY_MODULES)})
+    print(f"interpreter {baseline * 1000:.1f} ms | dry run {run * 1000:.1f} ms | overhead {overhead_ms:.1f} ms "
+          f"(budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    if code != 0:
+        failures.append(f"profiled run exited with {code}")
+    if overhead_ms > args.budget_ms:
+        failures.append(f"startup overhead {overhead_ms:.1f} ms exceeds {args.budget_ms:.0f} ms")
+    if heavy:
+        failures.append(f"dry run imported provider SDKs: {', '.join(heavy)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,150 @@
+"""Seeded synthetic meeting transcripts from a few KB up to hundreds of MB.
+
+Transcripts mix speaker turns (with and without roles), section headers,
+filler discussion, and the signals the pipeline looks for: decisions, open
+questions, risks and action lines with owners, ISO and spoken due dates and
+client/risk tags. The same seed and size always produce the same bytes, and
+files are streamed to disk so even 100 MB inputs never sit in memory.
+
+Usage:
+    python benchmarks/synthetic.py --size 10MB --seed 7 --out /tmp/transcript_10mb.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+from pathlib import Path
+from typing import Iterator
+
+SPEAKERS = [
+    ("Alex", "PM"),
+    ("Priya", "CTO"),
+    ("Zara", "Compliance"),
+    ("Miguel", "CX"),
+    ("Jamie", "Engineering"),
+    ("Sam", "Client"),
+]
+TOPICS = ["data migration", "identity sync", "mobile release", "API gateway", "reporting module", "pilot rollout"]
+FILLER = [
+    "We walked through the sprint board and the burndown looks healthy.",
+    "The vendor demo went well and the team liked the {topic}.",
+    "Integration testing continues on the staging environment for the {topic}.",
+    "Let's keep the status page updated after every release.",
+    "I shared the updated design notes for the {topic} in the channel.",
+    "Velocity is steady and nobody flagged new blockers on the {topic}.",
+]
+DECISIONS = [
+    "Decision: we approved the revised plan for the {topic}.",
+    "We decided to move the {topic} to sprint {n}.",
+    "Sponsor confirmed the budget for the {topic}.",
+]
+QUESTIONS = [
+    "Do we need legal sign-off before the {topic} goes live?",
+    "Who owns the cutover checklist for the {topic}?",
+    "Can the client share test data for the {topic} by Friday?",
+]
+RISKS = [
+    "Current risk is vendor latency on the {topic}.",
+    "There is a concern that the {topic} could slip a week.",
+    "The {topic} is blocked on firewall changes; risk to the client demo.",
+]
+ACTIONS = [
+    "Action – prepare the client briefing pack for the {topic} by 2025-{month:02d}-{day:02d}.",
+    "Follow up: {owner} owns the {topic} runbook by 2025-{month:02d}-{day:02d}.",
+    "Todo – schedule the {topic} architecture review. Owner {owner}.",
+    "Task: update the RAID log with the {topic} risk, assigned to {owner}.",
+    "Action item: {owner} to brief the client on the {topic} by Oct {day}.",
+]
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "B": 1, "K": 1024, "KB": 1024, "M": 1024**2, "MB": 1024**2, "G": 1024**3, "GB": 1024**3}
+
+
+def parse_size(text: str) -> int:
+    """Parse `512`, `1KB`, `2.5MB` or `1G` into bytes."""
+
+    match = _SIZE.match(text)
+    if not match:
+        raise ValueError(f"Unrecognised size '{text}'.")
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+def iter_lines(seed: int = 7) -> Iterator[str]:
+    """Yield transcript lines forever; callers stop at the size they need."""
+
+    rng = random.Random(seed)
+    yield "Project Steering Committee – Synthetic Benchmark Transcript"
+    yield ""
+    section = 0
+    while True:
+        section += 1
+        yield f"## Agenda item {section}: {rng.choice(TOPICS).title()}"
+        for _ in range(rng.randint(8, 24)):
+            name, role = rng.choice(SPEAKERS)
+            speaker = f"{name} ({role})" if rng.random() < 0.5 else name
+            fields = {
+                "topic": rng.choice(TOPICS),
+                "owner": rng.choice(SPEAKERS)[0],
+                "n": rng.randint(2, 9),
+                "month": rng.randint(1, 12),
+                "day": rng.randint(1, 28),
+            }
+            roll = rng.random()
+            if roll < 0.04:
+                text = rng.choice(ACTIONS)
+            elif roll < 0.07:
+                text = rng.choice(DECISIONS)
+            elif roll < 0.10:
+                text = rng.choice(QUESTIONS)
+            elif roll < 0.13:
+                text = rng.choice(RISKS)
+            else:
+                text = " ".join(rng.sample(FILLER, rng.randint(1, 3)))
+            line = text.format(**fields)
+            # Action lines are usually spoken as their own line, without a speaker prefix.
+            yield line if text in ACTIONS and rng.random() < 0.6 else f"{speaker}: {line}"
+        yield ""
+
+
+def generate(size_bytes: int, seed: int = 7) -> str:
+    """Return a transcript of roughly `size_bytes` bytes (whole lines, UTF-8)."""
+
+    lines = []
+    used = 0
+    for line in iter_lines(seed):
+        if used >= size_bytes:
+            break
+        lines.append(line)
+        used += len(line.encode("utf-8")) + 1
+    return "\n".join(lines) + "\n"
+
+
+def write(path: Path, size_bytes: int, seed: int = 7) -> Path:
+    """Stream a transcript of roughly `size_bytes` bytes to `path`."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    used = 0
+    with path.open("w", encoding="utf-8") as handle:
+        for line in iter_lines(seed):
+            if used >= size_bytes:
+                break
+            handle.write(line + "\n")
+            used += len(line.encode("utf-8")) + 1
+    return path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="1MB", help="Target size, e.g. 1KB, 10MB, 100MB.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args()
+    path = write(args.out, parse_size(args.size), args.seed)
+    print(f"Wrote {path} ({path.stat().st_size / 1e6:.2f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
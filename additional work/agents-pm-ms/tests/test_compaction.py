@@ -0,0 +1,18 @@
+"""Regression tests for transcript compaction (`app/compaction.py`)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from compaction import TranscriptCompactor  # noqa: E402
+
+
+def test_speakers_sharing_a_first_name_keep_distinct_labels() -> None:
+    compactor = TranscriptCompactor()
+    lines = ["Priya Shah: one", "Priya (PM): two", "Priya Shah: three", "Priya (PM): four"]
+    labels = [compactor.compact_line(line).split(":")[0] for line in lines]
+
+    assert labels == ["Priya Shah", "Priya (PM)", "Priya", "Priya (PM)"]
@@ -0,0 +1,32 @@
+"""Regression tests for the durable job queue (`app/jobs.py`)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from jobs import JobQueue  # noqa: E402
+
+
+def _fail_once(queue: JobQueue, outdir: Path) -> int:
+    job_id = queue.enqueue("m1", outdir.parent / "m1.txt", outdir)
+    job = queue.claim("worker")
+    assert job is not None and job.id == job_id
+    assert queue.fail(job, "boom", 0.1) == "failed"
+    return job_id
+
+
+def test_retry_failed_requeues_only_the_newest_job_per_outdir(tmp_path: Path) -> None:
+    queue = JobQueue(tmp_path / "jobs.sqlite3", max_attempts=1)
+    outdir = tmp_path / "out" / "m1"
+    first = _fail_once(queue, outdir)
+    second = _fail_once(queue, outdir)
+
+    assert queue.retry_failed() == 1
+    assert [job.id for job in queue.jobs("queued")] == [second]
+    assert [job.id for job in queue.jobs("failed")] == [first]
+    # The folder now has a live job, so nothing else is queued for it.
+    assert queue.retry_failed() == 0
+    queue.close()
@@ -0,0 +1,28 @@
+"""Regression tests for the provider circuit breaker (`app/providers/resilience.py`)."""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from providers.resilience import CircuitBreaker  # noqa: E402
+
+
+def test_half_open_admits_a_single_probe() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    # The probe is in flight: everyone else waits for its verdict.
+    assert not breaker.allow()
+    assert not breaker.available()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
@@ -0,0 +1,18 @@
+"""Regression tests for batch job planning (`app/run_batch.py`)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from run_batch import plan_jobs  # noqa: E402
+
+
+def test_plan_jobs_suffix_never_takes_another_transcripts_stem() -> None:
+    transcripts = [Path("a/m1.txt"), Path("b/m1.txt"), Path("c/m1-2.txt")]
+    jobs = plan_jobs(transcripts, Path("/out"))
+
+    assert [job.name for job in jobs] == ["m1", "m1-3", "m1-2"]
+    assert len({job.outdir for job in jobs}) == len(jobs)